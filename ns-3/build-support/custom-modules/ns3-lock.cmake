@@ -43,6 +43,18 @@ function(write_lock)
   endforeach()
   string(APPEND lock_contents "]\n")
 
+  string(APPEND lock_contents "NS3_MODULE_DEPENDENCIES = {")
+  foreach(module_library ${ns3-libs} ${ns3-contrib-libs})
+    remove_lib_prefix("${module_library}" module_name)
+    string(APPEND lock_contents "'ns3-${module_name}': [")
+    foreach(dependency ${ns3-${module_library}-dependencies})
+      remove_lib_prefix("${dependency}" dependency_name)
+      string(APPEND lock_contents "'ns3-${dependency_name}', ")
+    endforeach()
+    string(APPEND lock_contents "], ")
+  endforeach()
+  string(APPEND lock_contents "}\n")
+
   # Windows variables are separated with ; which CMake also uses to separate
   # list items
   set(PATH_LIST
@@ -297,6 +297,12 @@ function(build_lib_reexport_third_party_libraries libname libraries_to_link)
             "list of non-ns libraries to link to NS3_STATIC and NS3_MONOLIB"
   )
 
+  # Keep the ns-3 modules this module links to, written to the lock file so
+  # that test.py can select the tests affected by a change
+  set(ns3-${libname}-dependencies "${ns_libraries_to_link}"
+      CACHE INTERNAL "list of ns-3 modules linked by ${libname}"
+  )
+
   if(NOT ${NS3_REEXPORT_THIRD_PARTY_LIBRARIES})
     # ns-3 libraries are linked publicly, to make sure other modules can find
     # each other without being directly linked
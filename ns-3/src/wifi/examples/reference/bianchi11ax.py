@@ -10,9 +10,30 @@ import math
 import numpy as np
 
 
-def bianchi_ax(data_rate, ack_rate, k, difs):
+def bianchi_ax_batch(nA, data_rate, ack_rate, k, difs, iterations=60):
+    """
+    Bianchi saturation model of 11ax for many configurations at once.
+
+    nA, data_rate, ack_rate, k and difs are scalars or NumPy arrays broadcast
+    against each other (k <= 1 disables A-MPDU aggregation, difs == 1 selects
+    DIFS, otherwise EIFS, after collisions). The fixed point tau = taup(p(tau))
+    of every configuration is solved simultaneously by bisection; tau - taup is
+    increasing in tau, so each root is bracketed by [0, 1].
+
+    Returns a dict of arrays with the broadcast shape:
+    "throughput" (saturation throughput in Mbps), "collision_probability" (p),
+    "tau" (transmission probability per slot) and "success_airtime" (fraction
+    of channel time spent on successful exchanges).
+    """
+    nA, data_rate, ack_rate, k, difs = np.broadcast_arrays(
+        np.asarray(nA, dtype=float),
+        np.asarray(data_rate, dtype=float),
+        np.asarray(ack_rate, dtype=float),
+        np.asarray(k, dtype=float),
+        np.asarray(difs),
+    )
+
     # Parameters for 11ax
-    nA = np.linspace(5, 50, 10)
     CWmin = 15
     CWmax = 1023
     L_DATA = 1500 * 8  # data size in bits
@@ -34,83 +55,66 @@ def bianchi_ax(data_rate, ack_rate, k, difs):
     T_SLOT = 9e-6
     delta = 1e-7
 
-    Aggregation_Type = "A_MPDU"  # A_MPDU or A_MSDU (HYBRID not fully supported)
+    # A-MPDU aggregation of k MPDUs, or a single MPDU if k <= 1
+    # (A-MSDU and HYBRID aggregation are not supported)
     K_MSDU = 1
-    K_MPDU = k
-    L_MPDU_HEADER = 4
-    L_MSDU_HEADER = 14 * 8
-    if k <= 1:
-        Aggregation_Type = "NONE"
+    K_MPDU = np.where(k <= 1, 1, k)
+    L_MPDU_HEADER = np.where(k <= 1, 0, 4)
 
     N_DBPS = data_rate * T_SYMBOL_DATA  # number of data bits per OFDM symbol
-
-    if Aggregation_Type == "NONE":
-        N_SYMBOLS = math.ceil((L_SERVICE + (L_MAC + L_DATA + L_APP_HDR) + L_TAIL) / N_DBPS)
-        T_DATA = T_PHY_DATA + (T_SYMBOL_DATA * N_SYMBOLS)
-        K_MPDU = 1
-        K_MSDU = 1
-
-    if Aggregation_Type == "A_MSDU":
-        N_SYMBOLS = math.ceil(
-            (
-                L_SERVICE
-                + K_MPDU * (L_MAC + L_MPDU_HEADER + K_MSDU * (L_MSDU_HEADER + L_DATA + L_APP_HDR))
-                + L_TAIL
-            )
-            / N_DBPS
-        )
-        T_DATA = T_PHY_DATA + (T_SYMBOL_DATA * N_SYMBOLS)
-
-    if Aggregation_Type == "A_MPDU":
-        N_SYMBOLS = math.ceil(
-            (L_SERVICE + K_MPDU * (L_MAC + L_MPDU_HEADER + L_DATA + L_APP_HDR) + L_TAIL) / N_DBPS
-        )
-        T_DATA = T_PHY_DATA + (T_SYMBOL_DATA * N_SYMBOLS)
+    N_SYMBOLS = np.ceil(
+        (L_SERVICE + K_MPDU * (L_MAC + L_MPDU_HEADER + L_DATA + L_APP_HDR) + L_TAIL) / N_DBPS
+    )
+    T_DATA = T_PHY_DATA + (T_SYMBOL_DATA * N_SYMBOLS)
 
     # Calculate ACK Duration
     N_DBPS = ack_rate * T_SYMBOL_ACK  # number of data bits per OFDM symbol
-    N_SYMBOLS = math.ceil((L_SERVICE + L_ACK + L_TAIL) / N_DBPS)
+    N_SYMBOLS = np.ceil((L_SERVICE + L_ACK + L_TAIL) / N_DBPS)
     T_ACK = T_PHY_ACK + (T_SYMBOL_ACK * N_SYMBOLS)
 
-    T_s = T_DATA + T_SIFS + T_ACK + T_DIFS
-    if difs == 1:  # DIFS
-        T_C = T_DATA + T_DIFS
-    else:
-        T_s = T_DATA + T_SIFS + T_ACK + T_DIFS + delta
-        T_C = T_DATA + T_DIFS + T_SIFS + T_ACK + delta
+    T_s = np.where(
+        difs == 1, T_DATA + T_SIFS + T_ACK + T_DIFS, T_DATA + T_SIFS + T_ACK + T_DIFS + delta
+    )
+    T_C = np.where(difs == 1, T_DATA + T_DIFS, T_DATA + T_DIFS + T_SIFS + T_ACK + delta)
 
     T_S = T_s / (1 - B) + T_SLOT
 
-    S_bianchi = np.zeros(len(nA))
-    for j in range(len(nA)):
-        n = nA[j] * 1
-        W = CWmin + 1
-        m = math.log2((CWmax + 1) / (CWmin + 1))
-        tau1 = np.linspace(0, 0.1, 100000)
-        p = 1 - np.power((1 - tau1), (n - 1))
-        ps = p * 0
+    W = CWmin + 1
+    m = math.log2((CWmax + 1) / (CWmin + 1))
 
+    def taup(tau):
+        p = 1 - np.power((1 - tau), (nA - 1))
+        ps = p * 0
         for i in range(int(m)):
             ps = ps + np.power(2 * p, i)
+        return p, 2.0 / (1 + W + p * W * ps)
+
+    low = np.zeros(nA.shape)
+    high = np.ones(nA.shape)
+    for _ in range(iterations):
+        tau = (low + high) / 2
+        above = tau > taup(tau)[1]
+        high = np.where(above, tau, high)
+        low = np.where(above, low, tau)
+    tau = (low + high) / 2
+    p = taup(tau)[0]
+
+    n = np.floor(nA)
+    Ptr = 1 - np.power((1 - tau), n)
+    Ps = nA * tau * np.power((1 - tau), n - 1) / Ptr
+    slot = (1 - Ptr) * T_SLOT + Ptr * Ps * T_S + Ptr * (1 - Ps) * T_C
+
+    return {
+        "throughput": K_MSDU * K_MPDU * Ps * Ptr * EP / slot / 1e6,
+        "collision_probability": p,
+        "tau": tau,
+        "success_airtime": Ptr * Ps * T_S / slot,
+    }
 
-        taup = 2.0 / (1 + W + p * W * ps)
-        b = np.argmin(np.abs(tau1 - taup))
-        tau = taup[b]
 
-        Ptr = 1 - math.pow((1 - tau), int(n))
-        Ps = n * tau * math.pow((1 - tau), int(n - 1)) / Ptr
-
-        S_bianchi[j] = (
-            K_MSDU
-            * K_MPDU
-            * Ps
-            * Ptr
-            * EP
-            / ((1 - Ptr) * T_SLOT + Ptr * Ps * T_S + Ptr * (1 - Ps) * T_C)
-            / 1e6
-        )
-
-    bianchi_result = S_bianchi
+def bianchi_ax(data_rate, ack_rate, k, difs):
+    nA = np.linspace(5, 50, 10)
+    bianchi_result = bianchi_ax_batch(nA, data_rate, ack_rate, k, difs)["throughput"]
     return bianchi_result
 
 
@@ -186,43 +190,39 @@ data_rates_160MHz = [
 ]
 ack_rates_160MHz = [6e6, 12e6, 12e6, 24e6, 24e6, 24e6, 24e6, 24e6, 24e6, 24e6, 24e6, 24e6]
 
-# Generate results with frame aggregation disabled
-k = 1
-
-difs = 1
-with open("bianchi_11ax_difs.txt", "w", encoding="utf-8") as f:
-    for i in range(len(data_rates_20MHz)):
-        bianchi_result = bianchi_ax(data_rates_20MHz[i], ack_rates_20MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 20)
-        f.write(str_s)
-    for i in range(len(data_rates_40MHz)):
-        bianchi_result = bianchi_ax(data_rates_40MHz[i], ack_rates_40MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 40)
-        f.write(str_s)
-    for i in range(len(data_rates_80MHz)):
-        bianchi_result = bianchi_ax(data_rates_80MHz[i], ack_rates_80MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 80)
-        f.write(str_s)
-    for i in range(len(data_rates_160MHz)):
-        bianchi_result = bianchi_ax(data_rates_160MHz[i], ack_rates_160MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 160)
-        f.write(str_s)
-
-difs = 0
-with open("bianchi_11ax_eifs.txt", "w", encoding="utf-8") as f:
-    for i in range(len(data_rates_20MHz)):
-        bianchi_result = bianchi_ax(data_rates_20MHz[i], ack_rates_20MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 20)
-        f.write(str_s)
-    for i in range(len(data_rates_40MHz)):
-        bianchi_result = bianchi_ax(data_rates_40MHz[i], ack_rates_40MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 40)
-        f.write(str_s)
-    for i in range(len(data_rates_80MHz)):
-        bianchi_result = bianchi_ax(data_rates_80MHz[i], ack_rates_80MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 80)
-        f.write(str_s)
-    for i in range(len(data_rates_160MHz)):
-        bianchi_result = bianchi_ax(data_rates_160MHz[i], ack_rates_160MHz[i], k, difs)
-        str_s = str_result(bianchi_result, i, 160)
-        f.write(str_s)
+data_rates = {
+    20: data_rates_20MHz,
+    40: data_rates_40MHz,
+    80: data_rates_80MHz,
+    160: data_rates_160MHz,
+}
+ack_rates = {
+    20: ack_rates_20MHz,
+    40: ack_rates_40MHz,
+    80: ack_rates_80MHz,
+    160: ack_rates_160MHz,
+}
+
+
+def write_results(filename, k, difs):
+    nA = np.linspace(5, 50, 10)
+    with open(filename, "w", encoding="utf-8") as f:
+        for bw in data_rates:
+            # All MCSs of a channel width in one batch: (MCS, nA)
+            results = bianchi_ax_batch(
+                nA,
+                np.array(data_rates[bw])[:, np.newaxis],
+                np.array(ack_rates[bw])[:, np.newaxis],
+                k,
+                difs,
+            )["throughput"]
+            for mcs, bianchi_result in enumerate(results):
+                str_s = str_result(bianchi_result, mcs, bw)
+                f.write(str_s)
+
+
+if __name__ == "__main__":
+    # Generate results with frame aggregation disabled
+    k = 1
+    write_results("bianchi_11ax_difs.txt", k, difs=1)
+    write_results("bianchi_11ax_eifs.txt", k, difs=0)
@@ -6,6 +6,7 @@
 #
 import argparse
 import fnmatch
+import json
 import os
 import queue
 import re
@@ -16,6 +17,7 @@ import sys
 import threading
 import time
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
 from utils import get_list_from_file
 
@@ -68,6 +70,7 @@ colors = color_dict()
 interesting_config_items = [
     "NS3_ENABLED_MODULES",
     "NS3_ENABLED_CONTRIBUTED_MODULES",
+    "NS3_MODULE_DEPENDENCIES",
     "NS3_MODULE_PATH",
     "ENABLE_EXAMPLES",
     "ENABLE_TESTS",
@@ -83,6 +86,7 @@ interesting_config_items = [
     "VALGRIND_FOUND",
 ]
 
+NS3_MODULE_DEPENDENCIES = {}
 ENABLE_EXAMPLES = True
 ENABLE_TESTS = True
 NSCLICK = False
@@ -302,6 +306,58 @@ def parse_examples_to_run_file(
 #
 TMP_OUTPUT_DIR = "testpy-output"
 
+#
+# Jobs are dispatched longest first, so that a long example queued last does
+# not leave all the other workers idle while it finishes.  The elapsed time of
+# every job that ran is kept in a small database in the output directory and
+# used as the estimate for the next run.  Test suites are timed separately for
+# each fullness they were run with.  Jobs that never ran are estimated from the
+# jobs of the same kind and fullness that did, or from the defaults below.
+#
+TIMINGS_FILE = os.path.join(TMP_OUTPUT_DIR, "timings.json")
+
+default_job_times = {
+    "QUICK": 1.0,
+    "EXTENSIVE": 30.0,
+    "TAKES_FOREVER": 300.0,
+}
+
+#
+# The results file is appended to as each job completes and is only closed
+# with </Results> at the end of the run.  The reports are read back from it one
+# test suite or example at a time, so the whole tree of a large run is never
+# held in memory, and a file that is not closed (a run in progress, or one that
+# was killed) is read up to its last complete job.  While the run is going, the
+# requested text and HTML reports are rewritten at most every
+# REPORT_REFRESH_INTERVAL seconds.
+#
+REPORT_REFRESH_INTERVAL = 10.0
+
+truncated_xml_errors = [
+    expat.errors.codes[expat.errors.XML_ERROR_NO_ELEMENTS],
+    expat.errors.codes[expat.errors.XML_ERROR_UNCLOSED_TOKEN],
+]
+
+
+def iterate_results(results_file, tag=None):
+    depth = 0
+    root = None
+    try:
+        for event, element in ET.iterparse(results_file, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                if tag is None or element.tag == tag:
+                    yield element
+                root.clear()
+    except ET.ParseError as error:
+        if error.code not in truncated_xml_errors:
+            raise
+
 
 def read_test(test):
     result = test.find("Result").text
@@ -340,16 +396,16 @@ def node_to_text(test, f, test_type="Suite"):
         node_to_text(child, f, "Case")
 
 
-def translate_to_text(results_file, text_file):
+def translate_to_text(results_file, text_file, live=False):
     text_file += ".txt" if ".txt" not in text_file else ""
-    print('Writing results to text file "%s"...' % text_file, end="")
-    et = ET.parse(results_file)
+    if not live:
+        print('Writing results to text file "%s"...' % text_file, end="")
 
-    with open(text_file, "w", encoding="utf-8") as f:
-        for test in et.findall("Test"):
+    with open(text_file + ".tmp", "w", encoding="utf-8") as f:
+        for test in iterate_results(results_file, "Test"):
             node_to_text(test, f)
 
-        for example in et.findall("Example"):
+        for example in iterate_results(results_file, "Example"):
             result = example.find("Result").text
             name = example.find("Name").text
             if not example.find("Time") is None:
@@ -359,7 +415,13 @@ def translate_to_text(results_file, text_file):
             output = '%s: Example "%s" (%s)\n' % (result, name, time_real)
             f.write(output)
 
-    print("done.")
+    #
+    # The report is written aside and moved in place, so that a report refreshed
+    # during the run is never seen half written.
+    #
+    os.replace(text_file + ".tmp", text_file)
+    if not live:
+        print("done.")
 
 
 #
@@ -368,25 +430,33 @@ def translate_to_text(results_file, text_file):
 # we have time to tweak it.  This may end up being moved to a separate module
 # since it will probably grow over time.
 #
-def translate_to_html(results_file, html_file):
+def translate_to_html(results_file, html_file, live=False):
     html_file += ".html" if ".html" not in html_file else ""
-    print("Writing results to html file %s..." % html_file, end="")
+    if not live:
+        print("Writing results to html file %s..." % html_file, end="")
 
-    with open(html_file, "w", encoding="utf-8") as f:
+    with open(html_file + ".tmp", "w", encoding="utf-8") as f:
         f.write("<html>\n")
-        f.write("<body>\n")
-        f.write("<center><h1>ns-3 Test Results</h1></center>\n")
 
         #
-        # Read and parse the whole results file.
+        # While the run is going, ask the browser to reload the report.
         #
-        et = ET.parse(results_file)
+        if live:
+            f.write(
+                '<head><meta http-equiv="refresh" content="%d"></head>\n' % REPORT_REFRESH_INTERVAL
+            )
+
+        f.write("<body>\n")
+        f.write("<center><h1>ns-3 Test Results</h1></center>\n")
+        if live:
+            f.write("<center><p>Run in progress</p></center>\n")
 
         #
-        # Iterate through the test suites
+        # Iterate through the test suites, reading them from the results file
+        # one at a time.
         #
         f.write("<h2>Test Suites</h2>\n")
-        for suite in et.findall("Test"):
+        for suite in iterate_results(results_file, "Test"):
             #
             # For each test suite, get its name, result and execution time info
             #
@@ -574,7 +644,7 @@ def translate_to_html(results_file, html_file):
         #
         # Now iterate through all the examples
         #
-        for example in et.findall("Example"):
+        for example in iterate_results(results_file, "Example"):
             #
             # Start a new row for each example
             #
@@ -627,7 +697,9 @@ def translate_to_html(results_file, html_file):
         f.write("</body>\n")
         f.write("</html>\n")
 
-    print("done.")
+    os.replace(html_file + ".tmp", html_file)
+    if not live:
+        print("done.")
 
 
 #
@@ -860,6 +932,45 @@ VALGRIND_SUPPRESSIONS_FILE = ".ns3.supp"
 TEST_LOGS = bool(os.getenv("TEST_LOGS", False))
 
 
+#
+# Popen.communicate() reaps the child itself, and its resource usage is lost
+# with it.  Where os.wait4() is available, the output of the job is read by
+# helper threads instead and the job is reaped with wait4(), which returns the
+# usage of that child (and of the children it waited for) alone, even with other
+# jobs running at the same time.  The peak resident set size is returned in
+# bytes, or 0 if it could not be measured.
+#
+def communicate_and_measure(proc):
+    if not hasattr(os, "wait4"):
+        (stdout_results, stderr_results) = proc.communicate()
+        return (stdout_results, stderr_results, 0)
+
+    outputs = {}
+
+    def read_stream(name, stream):
+        outputs[name] = stream.read()
+        stream.close()
+
+    readers = []
+    for name, stream in [("stdout", proc.stdout), ("stderr", proc.stderr)]:
+        if stream is not None:
+            reader = threading.Thread(target=read_stream, args=(name, stream))
+            reader.start()
+            readers.append(reader)
+    (_, status, usage) = os.wait4(proc.pid, 0)
+    for reader in readers:
+        reader.join()
+
+    if os.WIFSIGNALED(status):
+        proc.returncode = -os.WTERMSIG(status)
+    else:
+        proc.returncode = os.WEXITSTATUS(status)
+
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return (outputs.get("stdout"), outputs.get("stderr"), peak_rss)
+
+
 def run_job_synchronously(shell_command, directory, valgrind, is_python, build_path=""):
     if VALGRIND_SUPPRESSIONS_FILE is not None:
         suppressions_path = os.path.join(NS3_BASEDIR, VALGRIND_SUPPRESSIONS_FILE)
@@ -897,7 +1008,7 @@ def run_job_synchronously(shell_command, directory, valgrind, is_python, build_p
         stdout=subprocess.PIPE if not TEST_LOGS else subprocess.DEVNULL,
         stderr=subprocess.PIPE if not TEST_LOGS else subprocess.STDOUT,
     )
-    stdout_results, stderr_results = proc.communicate()
+    stdout_results, stderr_results, peak_rss = communicate_and_measure(proc)
     stdout_results = b"" if stdout_results is None else stdout_results
     stderr_results = b"" if stderr_results is None else stderr_results
 
@@ -934,7 +1045,7 @@ def run_job_synchronously(shell_command, directory, valgrind, is_python, build_p
         print("Return code = ", retval)
         print("stderr = ", stderr_results)
 
-    return (retval, stdout_results, stderr_results, elapsed_time)
+    return (retval, stdout_results, stderr_results, elapsed_time, peak_rss)
 
 
 #
@@ -957,6 +1068,10 @@ class Job:
         self.returncode = False
         self.elapsed_time = 0
         self.build_path = ""
+        self.fullness = "QUICK"
+        self.estimated_time = 0
+        self.peak_rss = 0
+        self.estimated_rss = 0
 
     #
     # A job is either a standard job or a special job indicating that a worker
@@ -1072,6 +1187,68 @@ class Job:
     def set_elapsed_time(self, elapsed_time):
         self.elapsed_time = elapsed_time
 
+    #
+    # The fullness class of the job: that of the example, or the fullness the
+    # test suite is run with.  Used to estimate the duration of unknown jobs.
+    #
+    def set_fullness(self, fullness):
+        self.fullness = fullness.upper()
+
+    #
+    # The expected real time for the job execution, used to order dispatch.
+    #
+    def set_estimated_time(self, estimated_time):
+        self.estimated_time = estimated_time
+
+    #
+    # The peak resident set size of the job in bytes, 0 if it was not measured.
+    #
+    def set_peak_rss(self, peak_rss):
+        self.peak_rss = peak_rss
+
+    #
+    # The expected peak resident set size of the job, reserved from the memory
+    # budget while it runs.
+    #
+    def set_estimated_rss(self, estimated_rss):
+        self.estimated_rss = estimated_rss
+
+
+#
+# The jobs running at the same time must fit in a memory budget (--memory-limit),
+# so that memory-hungry examples running together do not push the machine into
+# swap.  A worker reserves the estimated peak memory of its job before running
+# it and waits while that would exceed the budget.  Jobs are admitted in the
+# order the workers asked, so that the long jobs dispatched first are not
+# overtaken by the short ones behind them, and a job always runs when nothing
+# else does, even if it alone exceeds the budget.  A limit of 0 admits every job.
+#
+class MemoryBudget:
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self.next_ticket = 0
+        self.serving = 0
+        self.condition = threading.Condition()
+
+    def fits(self, amount):
+        return not self.limit or not self.in_use or self.in_use + amount <= self.limit
+
+    def acquire(self, amount):
+        with self.condition:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            while ticket != self.serving or not self.fits(amount):
+                self.condition.wait()
+            self.serving += 1
+            self.in_use += amount
+            self.condition.notify_all()
+
+    def release(self, amount):
+        with self.condition:
+            self.in_use -= amount
+            self.condition.notify_all()
+
 
 #
 # The worker thread class that handles the actual running of a given test.
@@ -1079,10 +1256,11 @@ class Job:
 # ships the results back through the output_queue.
 #
 class worker_thread(threading.Thread):
-    def __init__(self, input_queue, output_queue):
+    def __init__(self, input_queue, output_queue, memory_budget):
         threading.Thread.__init__(self)
         self.input_queue = input_queue
         self.output_queue = output_queue
+        self.memory_budget = memory_budget
 
     def run(self):
         while True:
@@ -1117,6 +1295,7 @@ class worker_thread(threading.Thread):
             # Otherwise go about the business of running tests as normal.
             #
             else:
+                self.memory_budget.acquire(job.estimated_rss)
                 if args.verbose:
                     print("Launch %s" % job.shell_command)
 
@@ -1131,6 +1310,7 @@ class worker_thread(threading.Thread):
                         job.standard_out,
                         job.standard_err,
                         et,
+                        peak_rss,
                     ) = run_job_synchronously(
                         job.shell_command, job.cwd, args.valgrind, job.is_pyexample, job.build_path
                     )
@@ -1149,6 +1329,7 @@ class worker_thread(threading.Thread):
                         job.standard_out,
                         job.standard_err,
                         et,
+                        peak_rss,
                     ) = run_job_synchronously(
                         job.shell_command
                         + " --xml --tempdir=%s --out=%s %s"
@@ -1158,7 +1339,9 @@ class worker_thread(threading.Thread):
                         False,
                     )
 
+                self.memory_budget.release(job.estimated_rss)
                 job.set_elapsed_time(et)
+                job.set_peak_rss(peak_rss)
 
                 if args.verbose:
                     print("returncode = %d" % job.returncode)
@@ -1186,26 +1369,408 @@ def load_previously_successful_tests():
         sorted(previous_results, key=lambda x: os.path.basename(x), reverse=True)
     )[0]
 
+    #
+    # An interrupted run is read up to the last job that completed.
+    #
     try:
-        previous_run_results = ET.parse(latest_result_file)
+        for result in iterate_results(latest_result_file):
+            if result.tag in ["Test", "Example"] and result.find("Result").text in ["PASS", "SKIP"]:
+                previously_run_tests_to_skip[result.tag.lower()].append(result.find("Name").text)
     except ET.ParseError:
         print(f"Failed to parse XML {latest_result_file}")
         exit(-1)
-
-    for test_type in ["Test", "Example"]:
-        if previous_run_results.find(test_type) is not None:
-            temp = list(
-                map(
-                    lambda x: (x.find("Name").text, x.find("Result").text),
-                    previous_run_results.findall(test_type),
-                )
-            )
-            temp = list(filter(lambda x: x[1] in ["PASS", "SKIP"], temp))
-            temp = [x[0] for x in temp]
-            previously_run_tests_to_skip[test_type.lower()] = temp
     return previously_run_tests_to_skip
 
 
+#
+# The timing database maps a kind of job ("test" or "example") and a fullness
+# to the last elapsed time and peak memory (in bytes, where it was measured) of
+# each job, e.g.
+#
+#   {"example": {"QUICK": {"udp-echo": {"time": 0.52, "rss": 9437184}}}}
+#
+def load_job_timings(timings_file=TIMINGS_FILE):
+    try:
+        with open(timings_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_job_timings(timings, timings_file=TIMINGS_FILE):
+    tmp_file = timings_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(timings, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, timings_file)
+
+
+def merge_job_timings(timings, new_timings):
+    for kind, fullness_timings in new_timings.items():
+        for fullness, jobs in fullness_timings.items():
+            timings.setdefault(kind, {}).setdefault(fullness, {}).update(jobs)
+
+
+def job_timing_kind(job):
+    return "example" if (job.is_example or job.is_pyexample) else "test"
+
+
+def record_job_timing(timings, job):
+    #
+    # Skipped and crashed jobs did not run to completion, and valgrind runs are
+    # much slower than normal ones, so none of them tell us anything useful.
+    #
+    if job.is_skip or args.valgrind or job.returncode not in [0, 1, 2]:
+        return
+    jobs = timings.setdefault(job_timing_kind(job), {}).setdefault(job.fullness, {})
+    jobs[job.display_name] = {"time": round(job.elapsed_time, 3)}
+    if job.peak_rss:
+        jobs[job.display_name]["rss"] = job.peak_rss
+
+
+def estimate_job_time(timings, job):
+    if job.is_skip:
+        return 0
+    jobs = timings.get(job_timing_kind(job), {}).get(job.fullness, {})
+    if job.display_name in jobs:
+        return jobs[job.display_name]["time"]
+
+    # Use the median of the known jobs of the same kind and fullness
+    known_times = sorted(entry["time"] for entry in jobs.values())
+    if known_times:
+        return known_times[len(known_times) // 2]
+    return default_job_times.get(job.fullness, default_job_times["QUICK"])
+
+
+def estimate_job_rss(timings, job):
+    if job.is_skip:
+        return 0
+    jobs = timings.get(job_timing_kind(job), {}).get(job.fullness, {})
+    if "rss" in jobs.get(job.display_name, {}):
+        return jobs[job.display_name]["rss"]
+
+    # Use the median of the known jobs of the same kind and fullness
+    known_rss = sorted(entry["rss"] for entry in jobs.values() if "rss" in entry)
+    if known_rss:
+        return known_rss[len(known_rss) // 2]
+    return 0
+
+
+#
+# --memory-limit takes a size in bytes with an optional K, M or G suffix.  By
+# default the budget is the physical memory of the machine, or the memory limit
+# of the container (cgroup v2) if it is lower.
+#
+memory_size_units = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_memory_size(value):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([KMG]?)B?", value.strip().upper())
+    if not match:
+        raise argparse.ArgumentTypeError("expected a size such as 512M or 8G, got '%s'" % value)
+    return int(float(match.group(1)) * memory_size_units[match.group(2)])
+
+
+def default_memory_limit():
+    limit = 0
+    if hasattr(os, "sysconf") and "SC_PHYS_PAGES" in os.sysconf_names:
+        limit = max(os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"), 0)
+    try:
+        with open("/sys/fs/cgroup/memory.max", encoding="utf-8") as f:
+            cgroup_limit = f.read().strip()
+        if cgroup_limit.isdigit():
+            limit = min(limit, int(cgroup_limit)) if limit else int(cgroup_limit)
+    except OSError:
+        pass
+    return limit
+
+
+#
+# A run can be split into shards, e.g. one per machine, with --shard=i/N.
+# Every shard builds the same job list and keeps the jobs assigned to it.  The
+# jobs are assigned longest first, each to the shard with the least estimated
+# work so far, so the shards finish at about the same time.  The assignment only
+# depends on the job list and the timing database, so all shards must be run
+# with the same timings file.
+#
+def parse_shard(value):
+    match = re.fullmatch(r"(\d+)/(\d+)", value)
+    if not match:
+        raise argparse.ArgumentTypeError("expected i/N, got '%s'" % value)
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("shard %d/%d out of range" % (index, count))
+    return (index, count)
+
+
+def select_shard_jobs(jobs, index, count):
+    shard_load = [0.0] * count
+    shard_jobs = []
+    ordered = sorted(
+        jobs, key=lambda job: (-job.estimated_time, job_timing_kind(job), job.display_name)
+    )
+    for job in ordered:
+        shard = shard_load.index(min(shard_load))
+        shard_load[shard] += job.estimated_time
+        if shard == index - 1:
+            shard_jobs.append(job)
+    return shard_jobs
+
+
+#
+# Combine the results files of several shards into one results file, write the
+# requested text, HTML and XML reports from it and print the usual summary.  The
+# timings recorded next to each results file are added to the timing database.
+#
+def merge_results(results_files):
+    if not os.path.exists(TMP_OUTPUT_DIR):
+        os.makedirs(TMP_OUTPUT_DIR)
+    date_and_time = time.strftime("%Y-%m-%d-%H-%M-%S-CUT", time.gmtime())
+    xml_results_file = os.path.join(TMP_OUTPUT_DIR, f"{date_and_time}-merged-results.xml")
+
+    #
+    # The results are copied one job at a time, like the jobs of a run are
+    # appended as they complete.
+    #
+    job_timings = load_job_timings(args.timings)
+    status_counts = {"PASS": 0, "SKIP": 0, "FAIL": 0, "CRASH": 0, "VALGR": 0}
+    total_tests = 0
+    with open(xml_results_file, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write("<Results>\n")
+        for results_file in results_files:
+            try:
+                for test in iterate_results(results_file):
+                    result = test.find("Result").text
+                    status_counts[result] = status_counts.get(result, 0) + 1
+                    total_tests += 1
+                    f.write(ET.tostring(test, encoding="unicode"))
+            except (OSError, ET.ParseError) as error:
+                print("Failed to read results file %s: %s" % (results_file, error), file=sys.stderr)
+                return 2
+
+            timings_file = results_file.replace("-results.xml", "-timings.json")
+            if timings_file != results_file:
+                merge_job_timings(job_timings, load_job_timings(timings_file))
+        f.write("</Results>\n")
+    save_job_timings(job_timings, args.timings)
+
+    print(
+        "%d of %d tests passed (%d passed, %d skipped, %d failed, %d crashed, %d valgrind errors)"
+        % (
+            status_counts["PASS"],
+            total_tests,
+            status_counts["PASS"],
+            status_counts["SKIP"],
+            status_counts["FAIL"],
+            status_counts["CRASH"],
+            status_counts["VALGR"],
+        )
+    )
+
+    if len(args.html) + len(args.text) + len(args.xml):
+        print()
+
+    if len(args.html):
+        translate_to_html(xml_results_file, args.html)
+
+    if len(args.text):
+        translate_to_text(xml_results_file, args.text)
+
+    if len(args.xml):
+        xml_file = args.xml + (".xml" if ".xml" not in args.xml else "")
+        print("Writing results to xml file %s..." % xml_file, end="")
+        shutil.copyfile(xml_results_file, xml_file)
+        print("done.")
+
+    if status_counts["PASS"] + status_counts["SKIP"] == total_tests:
+        return 0
+    else:
+        return 1
+
+
+#
+# Change-impact test selection (--changed-since and --changed-files).  A change
+# to a module can only affect the test suites and examples of that module and
+# of the modules that depend on it, directly or not, and the examples that
+# link to any of them.  The module dependencies come from the lock file written
+# by CMake (NS3_MODULE_DEPENDENCIES) or, for an examples directory or an older
+# lock file, from the ${lib...} references in its CMakeLists.txt, as CMake
+# itself does when it resolves module dependencies.  The examples of a module
+# (src/<module>/examples) link their own libraries besides their module, and
+# the examples of a directory are taken together, as if each one linked all
+# the libraries of the directory.
+# Jobs whose dependencies are not known are always run, and so are all jobs if
+# a build file or a file outside the modules and examples changed.
+#
+build_files = ["ns3", "test.py", "utils.py", ".ns3rc"]
+build_directories = ["build-support"]
+unaffecting_directories = ["doc", "scratch"]
+unaffecting_extensions = [".md", ".rst"]
+
+suite_name_patterns = [
+    re.compile(r'TestSuite\s*[({]\s*"([^"]+)"'),
+    re.compile(r'ExampleAsTestSuite\s+\w+\s*[({]\s*"([^"]+)"'),
+]
+
+
+def get_changed_files():
+    if args.changed_files:
+        return args.changed_files
+    if not args.changed_since:
+        return None
+
+    # Paths relative to (and limited to) the ns-3 directory, including the
+    # uncommitted changes
+    proc = subprocess.run(
+        ["git", "diff", "--name-only", "--relative", args.changed_since],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode:
+        error = proc.stderr.decode().strip().splitlines()
+        print("git diff failed: %s" % (error[0] if error else proc.returncode), file=sys.stderr)
+        sys.exit(2)
+    return proc.stdout.decode().splitlines()
+
+
+#
+# The component of a changed file: a module name (e.g. "wifi"), an examples
+# directory (e.g. "examples/tutorial"), "" if the file cannot affect any test,
+# or None if any test may be affected.
+#
+def changed_file_component(path):
+    parts = re.split(r"[\\/]", os.path.normpath(path))
+    name = parts[-1]
+    if name == "CMakeLists.txt" or name.endswith(".cmake"):
+        return None
+    if path in build_files or parts[0] in build_directories:
+        return None
+    if parts[0] in unaffecting_directories or os.path.splitext(name)[1] in unaffecting_extensions:
+        return ""
+    if len(parts) > 2 and parts[0] in ["src", "contrib"]:
+        return "" if parts[2] == "doc" else parts[1]
+    if len(parts) > 2 and parts[0] == "examples":
+        return "examples/" + parts[1]
+    return None
+
+
+def read_component_dependencies(component):
+    module = "ns3-" + component
+    if module in NS3_MODULE_DEPENDENCIES:
+        return set(dependency[len("ns3-") :] for dependency in NS3_MODULE_DEPENDENCIES[module])
+
+    own_module = set()
+    if component.startswith("examples/"):
+        cmakelists_path = os.path.join(component, "CMakeLists.txt")
+    elif component.endswith("/examples"):
+        cmakelists_path = os.path.join(component, "CMakeLists.txt")
+        own_module = {component.split("/")[1]}
+    elif module in NS3_ENABLED_MODULES:
+        cmakelists_path = os.path.join("src", component, "CMakeLists.txt")
+    elif module in NS3_ENABLED_CONTRIBUTED_MODULES:
+        cmakelists_path = os.path.join("contrib", component, "CMakeLists.txt")
+    else:
+        return None
+
+    try:
+        with open(cmakelists_path, encoding="utf-8") as f:
+            cmakelists_contents = f.read()
+    except OSError:
+        return own_module or None
+    # Modules that are not enabled cannot be changed by a build of this tree
+    enabled_modules = NS3_ENABLED_MODULES + NS3_ENABLED_CONTRIBUTED_MODULES
+    libraries = re.findall(r"\$\{lib([\w-]+)\}", cmakelists_contents)
+    return (
+        set(library for library in libraries if "ns3-" + library in enabled_modules) | own_module
+    ) - {component}
+
+
+def component_closure(component, dependencies):
+    closure = set()
+    pending = [component]
+    while pending:
+        component = pending.pop()
+        if component in closure:
+            continue
+        if component not in dependencies:
+            dependencies[component] = read_component_dependencies(component)
+        if dependencies[component] is None:
+            return None
+        closure.add(component)
+        pending.extend(dependencies[component])
+    return closure
+
+
+#
+# Test suites are not tagged with their module by the test-runner, so look for
+# the suite names in the module sources.
+#
+def find_test_suite_components():
+    suite_components = {}
+    for top_directory in ["src", "contrib"]:
+        for dirpath, dirnames, filenames in os.walk(top_directory):
+            parts = dirpath.split(os.sep)
+            if len(parts) < 2:
+                continue
+            for filename in filenames:
+                if not filename.endswith(".cc"):
+                    continue
+                with open(os.path.join(dirpath, filename), encoding="utf-8", errors="replace") as f:
+                    contents = f.read()
+                if "TestSuite" not in contents:
+                    continue
+                for pattern in suite_name_patterns:
+                    for suite_name in pattern.findall(contents):
+                        suite_components.setdefault(suite_name, parts[1])
+    return suite_components
+
+
+def job_component(job, suite_components):
+    if not (job.is_example or job.is_pyexample):
+        return suite_components.get(job.display_name)
+    parts = re.split(r"[\\/]", job.display_name.split(" ", 1)[0])
+    if len(parts) > 3 and parts[0] in ["src", "contrib"] and parts[2] == "examples":
+        return "/".join(parts[:3])
+    if len(parts) > 2 and parts[0] in ["src", "contrib"]:
+        return parts[1]
+    if len(parts) > 2 and parts[0] == "examples":
+        return "examples/" + parts[1]
+    return None
+
+
+def select_affected_jobs(jobs, changed_files):
+    changed_components = set()
+    for path in changed_files:
+        component = changed_file_component(path)
+        if component is None:
+            print("%s changed, running all tests" % path)
+            return
+        if component:
+            changed_components.add(component)
+
+    suite_components = find_test_suite_components()
+    dependencies = {}
+    closures = {}
+    selected_jobs = 0
+    for job in jobs:
+        if job.is_skip:
+            continue
+        component = job_component(job, suite_components)
+        if component is not None and component not in closures:
+            closures[component] = component_closure(component, dependencies)
+        closure = closures.get(component)
+        if closure is not None and not closure & changed_components:
+            job.set_is_skip(True)
+            job.set_skip_reason("not affected by the changes")
+        else:
+            selected_jobs = selected_jobs + 1
+
+    print(
+        "Running %d of %d jobs affected by %d changed files"
+        % (selected_jobs, len(jobs), len(changed_files))
+    )
+
+
 #
 # This is the main function that does the work of interacting with the
 # test-runner itself.
@@ -1372,7 +1937,7 @@ def run_tests():
     #
     if args.kinds:
         path_cmd = os.path.join("utils", test_runner_name + " --print-test-type-list")
-        (rc, standard_out, standard_err, et) = run_job_synchronously(
+        (rc, standard_out, standard_err, et, _) = run_job_synchronously(
             path_cmd, os.getcwd(), False, False
         )
         print(standard_out)
@@ -1390,7 +1955,7 @@ def run_tests():
                 path_cmd = os.path.join(
                     "utils", test_runner_name + " --print-test-name-list --print-test-types"
                 )
-            (rc, standard_out, standard_err, et) = run_job_synchronously(
+            (rc, standard_out, standard_err, et, _) = run_job_synchronously(
                 path_cmd, os.getcwd(), False, False
             )
             if rc != 0:
@@ -1470,12 +2035,22 @@ def run_tests():
     if args.rerun_failed:
         previously_run_tests_to_skip = load_previously_successful_tests()
 
+    #
+    # Find the changed files to select the affected tests, if requested
+    #
+    changed_files = get_changed_files()
+
     #
     # Create the main output file and start filling it with XML.  We need to
     # do this since the tests will just append individual results to this file.
     # The file is created outside the directory that gets automatically deleted.
     #
-    xml_results_file = os.path.join(TMP_OUTPUT_DIR, f"{date_and_time}-results.xml")
+    if args.shard:
+        xml_results_file = os.path.join(
+            TMP_OUTPUT_DIR, "%s-shard-%d-of-%d-results.xml" % (date_and_time, *args.shard)
+        )
+    else:
+        xml_results_file = os.path.join(TMP_OUTPUT_DIR, f"{date_and_time}-results.xml")
     with open(xml_results_file, "w", encoding="utf-8") as f:
         f.write('<?xml version="1.0"?>\n')
         f.write("<Results>\n")
@@ -1508,7 +2083,9 @@ def run_tests():
     if len(args.suite):
         # See if this is a valid test suite.
         path_cmd = os.path.join("utils", test_runner_name + " --print-test-name-list")
-        (rc, suites, standard_err, et) = run_job_synchronously(path_cmd, os.getcwd(), False, False)
+        (rc, suites, standard_err, et, _) = run_job_synchronously(
+            path_cmd, os.getcwd(), False, False
+        )
 
         if isinstance(suites, bytes):
             suites = suites.decode()
@@ -1533,12 +2110,12 @@ def run_tests():
                 "utils",
                 test_runner_name + " --print-test-name-list --test-type=%s" % args.constrain,
             )
-            (rc, suites, standard_err, et) = run_job_synchronously(
+            (rc, suites, standard_err, et, _) = run_job_synchronously(
                 path_cmd, os.getcwd(), False, False
             )
         else:
             path_cmd = os.path.join("utils", test_runner_name + " --print-test-name-list")
-            (rc, suites, standard_err, et) = run_job_synchronously(
+            (rc, suites, standard_err, et, _) = run_job_synchronously(
                 path_cmd, os.getcwd(), False, False
             )
     else:
@@ -1566,7 +2143,7 @@ def run_tests():
         path_cmd = os.path.join(
             "utils", test_runner_name + " --print-test-name-list --test-type=%s" % "performance"
         )
-        (rc, performance_tests, standard_err, et) = run_job_synchronously(
+        (rc, performance_tests, standard_err, et, _) = run_job_synchronously(
             path_cmd, os.getcwd(), False, False
         )
         if isinstance(performance_tests, bytes):
@@ -1616,12 +2193,21 @@ def run_tests():
             processors = args.process_limit
             print("Limiting to %s worker processes" % processors)
 
+    if args.memory_limit is None:
+        memory_budget = MemoryBudget(default_memory_limit())
+    else:
+        memory_budget = MemoryBudget(args.memory_limit)
+        if args.memory_limit:
+            print(
+                "Limiting the memory of concurrent jobs to %.1f MiB" % (args.memory_limit / 1024**2)
+            )
+
     #
     # Now, spin up one thread per processor which will eventually mean one test
     # per processor running concurrently.
     #
     for i in range(processors):
-        thread = worker_thread(input_queue, output_queue)
+        thread = worker_thread(input_queue, output_queue, memory_budget)
         threads.append(thread)
         thread.start()
 
@@ -1632,6 +2218,14 @@ def run_tests():
     skipped_tests = 0
     skipped_testnames = []
 
+    #
+    # Jobs are collected here and only queued once all of them are known, so
+    # that they can be dispatched longest first.
+    #
+    job_timings = load_job_timings(args.timings)
+    run_timings = {}
+    pending_jobs = []
+
     #
     # We now have worker threads spun up, and a list of work to do.  So, run
     # through the list of test suites and dispatch a job to run each one.
@@ -1672,6 +2266,7 @@ def run_tests():
             )
 
             job.set_shell_command(path_cmd)
+            job.set_fullness(args.only_fullness if args.only_fullness else args.fullness)
 
             if args.valgrind and test in core_valgrind_skip_tests:
                 job.set_is_skip(True)
@@ -1684,7 +2279,7 @@ def run_tests():
             if args.verbose:
                 print("Queue %s" % test)
 
-            input_queue.put(job)
+            pending_jobs.append(job)
             jobs = jobs + 1
             total_tests = total_tests + 1
 
@@ -1779,6 +2374,7 @@ def run_tests():
                             job.set_tempdir(testpy_output_dir)
                             job.set_shell_command(test)
                             job.set_build_path(args.buildpath)
+                            job.set_fullness(fullness)
 
                             if args.valgrind and not eval(do_valgrind_run):
                                 job.set_is_skip(True)
@@ -1810,7 +2406,7 @@ def run_tests():
                                 )
                             # TAKES_FOREVER includes everything, so no need to exclude anything
 
-                            input_queue.put(job)
+                            pending_jobs.append(job)
                             jobs = jobs + 1
                             total_tests = total_tests + 1
 
@@ -1854,6 +2450,7 @@ def run_tests():
                         job.set_tempdir(testpy_output_dir)
                         job.set_shell_command(test)
                         job.set_build_path("")
+                        job.set_fullness(fullness)
 
                         #
                         # Python programs and valgrind do not work and play
@@ -1892,7 +2489,7 @@ def run_tests():
                             )
                         # TAKES_FOREVER includes everything, so no need to exclude anything
 
-                        input_queue.put(job)
+                        pending_jobs.append(job)
                         jobs = jobs + 1
                         total_tests = total_tests + 1
 
@@ -1929,10 +2526,38 @@ def run_tests():
             if args.verbose:
                 print("Queue %s" % args.pyexample)
 
-            input_queue.put(job)
+            pending_jobs.append(job)
             jobs = jobs + 1
             total_tests = total_tests + 1
 
+    #
+    # Dispatch the jobs longest first (LPT scheduling): the workers pull from
+    # the queue in order, so the long jobs start early and the short ones fill
+    # in the gaps at the end.  The sort is stable, so jobs with the same
+    # estimate keep their discovery order.
+    #
+    if changed_files is not None:
+        select_affected_jobs(pending_jobs, changed_files)
+
+    for job in pending_jobs:
+        job.set_estimated_time(estimate_job_time(job_timings, job))
+        job.set_estimated_rss(estimate_job_rss(job_timings, job))
+    if args.shard:
+        pending_jobs = select_shard_jobs(pending_jobs, *args.shard)
+        jobs = total_tests = len(pending_jobs)
+        print(
+            "Running shard %d of %d: %d jobs, %.1f s estimated"
+            % (*args.shard, jobs, sum(job.estimated_time for job in pending_jobs))
+        )
+    pending_jobs.sort(key=lambda job: job.estimated_time, reverse=True)
+    for job in pending_jobs:
+        if args.verbose:
+            print(
+                "Dispatch %s (estimated %.3f s, %.1f MiB)"
+                % (job.display_name, job.estimated_time, job.estimated_rss / 1024**2)
+            )
+        input_queue.put(job)
+
     #
     # Tell the worker threads to pack up and go home for the day.  Each one
     # will exit when they see their is_break task.
@@ -1960,11 +2585,14 @@ def run_tests():
     valgrind_errors = 0
     valgrind_testnames = []
     failed_jobs = []
+    last_report_refresh = time.monotonic()
     for i in range(jobs):
         job = output_queue.get()
         if job.is_break:
             continue
 
+        record_job_timing(run_timings, job)
+
         if job.is_example or job.is_pyexample:
             kind = "Example"
         else:
@@ -2098,21 +2726,26 @@ def run_tests():
                     with open(xml_results_file, "a", encoding="utf-8") as f_to, open(
                         job.tmp_file_name, encoding="utf-8"
                     ) as f_from:
-                        contents = f_from.read()
                         if status == "VALGR":
+                            contents = f_from.read()
                             pre = contents.find("<Result>") + len("<Result>")
                             post = contents.find("</Result>")
                             contents = contents[:pre] + "VALGR" + contents[post:]
-                        f_to.write(contents)
-                        # When running with sanitizers, the program may
-                        # crash before ever writing the expected xml
-                        # output file
-                        try:
-                            et = ET.parse(job.tmp_file_name)
-                            if et.find("Result").text in ["PASS", "SKIP"]:
-                                failed_jobs.pop()
-                        except:
-                            pass
+                            f_to.write(contents)
+                        else:
+                            shutil.copyfileobj(f_from, f_to)
+                    # When running with sanitizers, the program may
+                    # crash before ever writing the expected xml
+                    # output file.  The suite result comes before its
+                    # test cases, so the file is only read up to it.
+                    try:
+                        for event, element in ET.iterparse(job.tmp_file_name):
+                            if element.tag == "Result":
+                                if element.text in ["PASS", "SKIP"]:
+                                    failed_jobs.pop()
+                                break
+                    except (OSError, ET.ParseError):
+                        pass
                 else:
                     with open(xml_results_file, "a", encoding="utf-8") as f:
                         f.write("<Test>\n")
@@ -2120,6 +2753,16 @@ def run_tests():
                         f.write("  <Result>CRASH</Result>\n")
                         f.write("</Test>\n")
 
+        #
+        # Bring the requested reports up to date with the jobs completed so far.
+        #
+        if time.monotonic() - last_report_refresh >= REPORT_REFRESH_INTERVAL:
+            if len(args.html):
+                translate_to_html(xml_results_file, args.html, live=True)
+            if len(args.text):
+                translate_to_text(xml_results_file, args.text, live=True)
+            last_report_refresh = time.monotonic()
+
     #
     # We have all of the tests run and the results written out.  One final
     # bit of housekeeping is to wait for all of the threads to close down
@@ -2128,6 +2771,17 @@ def run_tests():
     for thread in threads:
         thread.join()
 
+    #
+    # Remember how long the jobs took to order the next run.  A shard keeps its
+    # timings next to its results file instead, so that the timings used by the
+    # other shards of the same run do not change; --merge adds them.
+    #
+    if args.shard:
+        save_job_timings(run_timings, xml_results_file.replace("-results.xml", "-timings.json"))
+    else:
+        merge_job_timings(job_timings, run_timings)
+        save_job_timings(job_timings, args.timings)
+
     #
     # Back at the beginning of time, we started the body of an XML document
     # since the test suites and examples were going to just write their
@@ -2444,6 +3098,16 @@ def main(argv):
         help="limit number of worker threads",
     )
 
+    parser.add_argument(
+        "--memory-limit",
+        action="store",
+        type=parse_memory_size,
+        default=None,
+        metavar="SIZE",
+        help="limit the estimated peak memory of the jobs running at the same time, "
+        "e.g. 8G (default: the physical memory, 0 for no limit)",
+    )
+
     parser.add_argument(
         "--rerun-failed",
         action="store_true",
@@ -2452,6 +3116,53 @@ def main(argv):
         help="rerun failed tests",
     )
 
+    parser.add_argument(
+        "--shard",
+        action="store",
+        type=parse_shard,
+        default=None,
+        metavar="I/N",
+        help="run only the I-th of N shards of the tests, balanced by their recorded durations",
+    )
+
+    parser.add_argument(
+        "--merge",
+        action="store",
+        nargs="+",
+        default=[],
+        metavar="RESULTS-XML",
+        help="merge the results files of several shards and write the requested reports",
+    )
+
+    change_group = parser.add_mutually_exclusive_group(required=False)
+
+    change_group.add_argument(
+        "--changed-since",
+        action="store",
+        type=str,
+        default="",
+        metavar="GIT-REV",
+        help="run only the tests affected by the changes since GIT-REV (e.g. origin/master)",
+    )
+
+    change_group.add_argument(
+        "--changed-files",
+        action="store",
+        nargs="+",
+        default=[],
+        metavar="FILE",
+        help="run only the tests affected by changes to the given files",
+    )
+
+    parser.add_argument(
+        "--timings",
+        action="store",
+        type=str,
+        default=TIMINGS_FILE,
+        metavar="TIMINGS-FILE",
+        help="file with the recorded test durations (default %s)" % TIMINGS_FILE,
+    )
+
     global args
     args = parser.parse_args()
     args.example, exargs = split_program_and_arguments(args.example)
@@ -2464,6 +3175,9 @@ def main(argv):
     if args.nocolor or envcolor == "no":
         colors_lst["USE"] = False
 
+    if args.merge:
+        return merge_results(args.merge)
+
     return run_tests()
 
 
@@ -3253,6 +3253,51 @@ class NS3QualityControlTestCase(unittest.TestCase):
         self.assertEqual(return_code, 0)
 
 
+class NS3TestPyTestCase(unittest.TestCase):
+    """!
+    Tests of the test.py job selection helpers, which do not require a configured tree
+    """
+
+    def setUp(self):
+        """!
+        Import test.py as a module, with every module of src enabled
+        @return None
+        """
+        import importlib.util
+
+        sys.path.insert(0, ns3_path)
+        spec = importlib.util.spec_from_file_location("testpy", os.path.join(ns3_path, "test.py"))
+        ## testpy holds the test.py module # noqa
+        self.testpy = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.testpy)
+        sys.path.remove(ns3_path)
+
+        self.testpy.NS3_ENABLED_MODULES = ["ns3-" + module for module in os.listdir("src")]
+        self.testpy.NS3_ENABLED_CONTRIBUTED_MODULES = []
+        self.testpy.NS3_MODULE_DEPENDENCIES = {}
+
+    def test_01_ChangedFilesSelectLinkingExamples(self):
+        """!
+        Check that a change to a module selects the examples of other modules linking it
+        @return None
+        """
+        jobs = []
+        for example in [
+            "src/wifi/examples/wifi-bianchi",
+            "examples/udp/udp-echo",
+            "src/core/examples/main-callback",
+        ]:
+            job = self.testpy.Job()
+            job.set_is_example(True)
+            job.set_display_name(example)
+            jobs.append(job)
+
+        self.testpy.select_affected_jobs(jobs, ["src/applications/model/onoff-application.cc"])
+
+        # wifi-bianchi and udp-echo link the applications module, main-callback does not
+        self.assertEqual([job.is_skip for job in jobs], [False, False, True])
+
+
 class NS3QualityControlThatCanFailTestCase(unittest.TestCase):
     """!
     ns-3 complementary tests, allowed to fail, to help control
@@ -3483,6 +3528,7 @@ def main():
             NS3BuildBaseTestCase,
             NS3ExpectedUseTestCase,
             NS3QualityControlTestCase,
+            NS3TestPyTestCase,
         ],
         "extras": [
             NS3DependenciesTestCase,
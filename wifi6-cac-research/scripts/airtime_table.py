@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Airtime cost table shared with the ns-3 CAC
+Loads the CSV written by wifi6-cac-simulation --airtimeTable=<file>
+"""
+
+import csv
+import math
+
+# Packet-size bucket width used by AirtimeAdmissionControl
+BUCKET_BYTES = 8
+
+# Safety margin for retransmissions and contention applied by the CAC
+SAFETY_MARGIN = 1.10
+
+# Traffic type IDs (TrafficType enum in wifi6-cac-airtime.h)
+VOIP, VIDEO_STREAM, BURSTY, WEB_BROWSING = range(4)
+
+# HE coded bits per subcarrier of MCS 0-11 (kHeMcsEfficiency in wifi6-cac-airtime.cc)
+HE_MCS_EFFICIENCY = [0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 4.5, 5.0, 6.0, 20.0 / 3.0, 7.5, 25.0 / 3.0]
+
+# Data bits per HE symbol and spatial stream at MCS 5, by channel width (MHz)
+BITS_PER_SYMBOL_MCS5 = {20: 234, 40: 468, 80: 980, 160: 1960}
+
+# MAC timing (s) added to every transmission by the CAC
+DIFS = 34e-6
+SIFS = 16e-6
+ACK_TIME = 44e-6
+AVG_BACKOFF = 67.5e-6
+HE_PREAMBLE = 40e-6
+
+
+def mac_overhead(traffic_type):
+    """MAC header + LLC/SNAP + FCS bytes, plus the QoS control field for voice and video"""
+    return 44 if traffic_type in (VOIP, VIDEO_STREAM) else 42
+
+
+def analytic_time_per_packet(packet_size, traffic_type, mcs=5, channel_width=80, nss=2,
+                             guard_interval=800):
+    """
+    Channel access time of one packet in seconds from the CAC's analytic PHY model
+    (AirtimeAdmissionControl::CalculateTimePerPacket without a WifiAirtimeProvider)
+    """
+    symbol_duration = 12.8e-6 + guard_interval * 1e-9
+    bits_per_symbol = (BITS_PER_SYMBOL_MCS5[channel_width] * nss
+                       * HE_MCS_EFFICIENCY[mcs] / HE_MCS_EFFICIENCY[5])
+    symbols = math.ceil((packet_size + mac_overhead(traffic_type)) * 8 / bits_per_symbol)
+    return DIFS + AVG_BACKOFF + HE_PREAMBLE + symbols * symbol_duration + SIFS + ACK_TIME
+
+
+def analytic_required_airtime(packet_size, data_rate, traffic_type, **phy):
+    """Airtime fraction of a flow from the analytic PHY model (phy: mcs, channel_width, ...)"""
+    packet_rate = data_rate / (packet_size * 8.0)
+    return packet_rate * analytic_time_per_packet(packet_size, traffic_type, **phy) * SAFETY_MARGIN
+
+
+class AirtimeTable:
+    """Per-packet airtime costs keyed by (mcs, traffic type, size bucket)"""
+
+    def __init__(self, channel_width, nss, guard_interval, entries):
+        self.channel_width = channel_width
+        self.nss = nss
+        self.guard_interval = guard_interval
+        self.max_packet = max(size for (_, _, size) in entries)
+        self._entries = entries
+
+    def time_per_packet(self, packet_size, traffic_type, mcs=5):
+        """
+        Channel access time of one packet in seconds (same lookup as the CAC)
+        Packets beyond the table are computed directly, like the CAC does; this uses
+        the analytic PHY model, so it only matches tables exported without a
+        WifiAirtimeProvider
+        """
+        if packet_size > self.max_packet:
+            return analytic_time_per_packet(packet_size, traffic_type, mcs, self.channel_width,
+                                            self.nss, self.guard_interval)
+        bucket = math.ceil(packet_size / BUCKET_BYTES) * BUCKET_BYTES
+        return self._entries[(mcs, traffic_type, bucket)]
+
+    def required_airtime(self, packet_size, data_rate, traffic_type, mcs=5):
+        """Airtime fraction of a flow, as AirtimeAdmissionControl::CalculateRequiredAirtime"""
+        packet_rate = data_rate / (packet_size * 8.0)
+        return packet_rate * self.time_per_packet(packet_size, traffic_type, mcs) * SAFETY_MARGIN
+
+
+def load_airtime_table(filename):
+    """Load an airtime table CSV exported by the simulation"""
+    entries = {}
+    config = None
+
+    with open(filename, newline='') as f:
+        for row in csv.DictReader(f):
+            config = (int(row['ChannelWidth']), int(row['Nss']), int(row['GuardInterval']))
+            key = (int(row['Mcs']), int(row['TrafficType']), int(row['PacketSize']))
+            entries[key] = float(row['TimePerPacket'])
+
+    if config is None:
+        raise ValueError(f"{filename}: empty airtime table")
+
+    return AirtimeTable(*config, entries)
@@ -3,6 +3,10 @@ import re
 import os
 import numpy as np
 
+from sim_metrics import load_scenario, yerr
+
+METRIC_NAMES = ['throughput', 'delay', 'utilization_ap1']
+
 def parse_log_file(filename):
     metrics = {
         'throughput': 0.0,
@@ -33,6 +37,7 @@ def parse_log_file(filename):
 
 def plot_ascac_comparison(hard_metrics, soft_metrics, ascac_metrics):
     labels = ['Hard CAC', 'Soft CAC', 'AS-CAC+ (Adaptive)']
+    scenarios = [hard_metrics, soft_metrics, ascac_metrics]
     throughput = [hard_metrics['throughput'], soft_metrics['throughput'], ascac_metrics['throughput']]
     delay = [hard_metrics['delay'], soft_metrics['delay'], ascac_metrics['delay']]
     utilization = [hard_metrics['utilization_ap1'] * 100, soft_metrics['utilization_ap1'] * 100, ascac_metrics['utilization_ap1'] * 100]
@@ -43,7 +48,8 @@ def plot_ascac_comparison(hard_metrics, soft_metrics, ascac_metrics):
     colors = ['#95a5a6', '#2ecc71', '#f1c40f']
     
     # Throughput Plot
-    ax1.bar(labels, throughput, color=colors, alpha=0.9, edgecolor='black')
+    ax1.bar(labels, throughput, yerr=yerr(scenarios, 'throughput'), capsize=6,
+            color=colors, alpha=0.9, edgecolor='black')
     ax1.set_title('Aggregate Throughput')
     ax1.set_ylabel('Mbps')
     ax1.grid(axis='y', linestyle='--', alpha=0.5)
@@ -51,7 +57,8 @@ def plot_ascac_comparison(hard_metrics, soft_metrics, ascac_metrics):
         ax1.text(i, v + 0.5, f"{v:.2f}", ha='center', fontweight='bold')
         
     # Delay Plot
-    ax2.bar(labels, delay, color=colors, alpha=0.9, edgecolor='black')
+    ax2.bar(labels, delay, yerr=yerr(scenarios, 'delay'), capsize=6,
+            color=colors, alpha=0.9, edgecolor='black')
     ax2.set_title('Average End-to-End Delay')
     ax2.set_ylabel('Delay (ms)')
     ax2.grid(axis='y', linestyle='--', alpha=0.5)
@@ -59,7 +66,8 @@ def plot_ascac_comparison(hard_metrics, soft_metrics, ascac_metrics):
         ax2.text(i, v + 0.05, f"{v:.2f}", ha='center', fontweight='bold')
         
     # Utilization Plot
-    ax3.bar(labels, utilization, color=colors, alpha=0.9, edgecolor='black')
+    ax3.bar(labels, utilization, yerr=yerr(scenarios, 'utilization_ap1', 100), capsize=6,
+            color=colors, alpha=0.9, edgecolor='black')
     ax3.set_title('AP Utilization')
     ax3.set_ylabel('Utilization (%)')
     ax3.grid(axis='y', linestyle='--', alpha=0.5)
@@ -75,9 +83,9 @@ def plot_ascac_comparison(hard_metrics, soft_metrics, ascac_metrics):
 def main():
     # Parse Results
     # Note: We reuse the logs from previous steps for Hard/Soft to ensure fair comparison
-    hard_metrics = parse_log_file('wifi6-multi-ap-hard-cac-cci.log')
-    soft_metrics = parse_log_file('wifi6-multi-ap-soft-cac-cci.log')
-    ascac_metrics = parse_log_file('wifi6-multi-ap-ascac-plus-cci.log')
+    hard_metrics = load_scenario('hard-cac-cci', METRIC_NAMES, parse_log_file)
+    soft_metrics = load_scenario('soft-cac-cci', METRIC_NAMES, parse_log_file)
+    ascac_metrics = load_scenario('ascac-plus-cci', METRIC_NAMES, parse_log_file)
     
     # Fallback for demo if logs are still generating
     if ascac_metrics['throughput'] == 0:
@@ -88,6 +96,8 @@ def main():
     
     # Print Summary
     print("\n=== AS-CAC+ Performance Evolution ===")
+    print(f"Runs: Hard CAC {hard_metrics.get('runs', 1)}, Soft CAC {soft_metrics.get('runs', 1)}, "
+          f"AS-CAC+ {ascac_metrics.get('runs', 1)} (error bars: 95% CI)")
     print(f"{'Metric':<20} | {'Hard CAC':<10} | {'Soft CAC':<10} | {'AS-CAC+':<10} | {'Gain (vs Hard)':<15}")
     print("-" * 80)
     print(f"{'Throughput (Mbps)':<20} | {hard_metrics['throughput']:<10.2f} | {soft_metrics['throughput']:<10.2f} | {ascac_metrics['throughput']:<10.2f} | {((ascac_metrics['throughput']-hard_metrics['throughput'])/hard_metrics['throughput'])*100:<15.1f}%")
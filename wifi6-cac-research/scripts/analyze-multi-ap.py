@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import re
 import os
 
+from sim_metrics import DEMO_METRICS, MULTI_AP_METRICS, read_metrics, select_runs, summarize_runs
+
 def parse_log_file(filename):
     metrics = {
         'throughput': 0.0,
@@ -34,6 +36,11 @@ def parse_log_file(filename):
         
     return metrics
 
+def load_runs(filename, names, **params):
+    """Mean metrics over the metrics records of a scenario, or None if it has none"""
+    runs = select_runs(read_metrics(filename), **params)
+    return summarize_runs(runs, names) if runs else None
+
 def plot_cac_comparison(cac_metrics, no_cac_metrics):
     labels = ['With CAC', 'Without CAC']
     throughput = [cac_metrics['throughput'], no_cac_metrics['throughput']]
@@ -91,12 +98,15 @@ def plot_multi_ap_comparison(cci_metrics, aci_metrics):
     print("Multi-AP graph saved to graphs/multi_ap_interference.png")
 
 def main():
-    # 1. Parse Baseline Results
-    # Note: We assume 'wifi6-cac-demo-summary.txt' has the CAC results from previous run
-    # But better to parse the log if we have it. Let's use the values we know if file missing.
-    cac_metrics = {'throughput': 8.316, 'delay': 1.47} # From previous run
+    # 1. Baseline Results from the demo's metrics records (wifi6-cac-demo --enableCac=0/1)
+    # Use the values we know if the demo has not written any.
+    cac_metrics = load_runs(DEMO_METRICS, ['throughput', 'delay'], enableCac=True)
+    if cac_metrics is None:
+        cac_metrics = {'throughput': 8.316, 'delay': 1.47} # From previous run
     
-    no_cac_metrics = parse_log_file('wifi6-no-cac.log')
+    no_cac_metrics = load_runs(DEMO_METRICS, ['throughput', 'delay'], enableCac=False)
+    if no_cac_metrics is None:
+        no_cac_metrics = parse_log_file('wifi6-no-cac.log')
     if no_cac_metrics['throughput'] == 0:
         print("Waiting for No-CAC simulation to finish...")
         # Dummy values for testing script
@@ -105,8 +115,9 @@ def main():
     plot_cac_comparison(cac_metrics, no_cac_metrics)
     
     # 2. Parse Multi-AP Results
-    cci_metrics = parse_log_file('wifi6-multi-ap-cci.log')
-    aci_metrics = parse_log_file('wifi6-multi-ap-aci.log')
+    names = ['throughput', 'delay', 'utilization_ap1', 'utilization_ap2']
+    cci_metrics = load_runs(MULTI_AP_METRICS, names, label='cci') or parse_log_file('wifi6-multi-ap-cci.log')
+    aci_metrics = load_runs(MULTI_AP_METRICS, names, label='aci') or parse_log_file('wifi6-multi-ap-aci.log')
     
     if cci_metrics['throughput'] == 0:
         print("Waiting for Multi-AP simulations to finish...")
@@ -4,7 +4,6 @@ WiFi 6 CAC Simulation Results Analysis and Visualization
 Generates publication-quality graphs for research paper
 """
 
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -12,6 +11,12 @@ from scipy import stats
 import glob
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from delay_sketch import DelaySketch
+from replications import group_by_scenario, mean_ci, scenario_key
+from sweep import load_manifest
+from trace_reader import iter_trace_file, read_trace_file
 
 # Set publication-quality plot parameters
 plt.rcParams['figure.figsize'] = (10, 6)
@@ -39,27 +44,69 @@ TRAFFIC_COLORS = {
     'Web Browsing': '#f39c12'
 }
 
+# Admission trace traffic type names
+ADMISSION_TYPES = {
+    'VOIP': 0,
+    'VIDEO': 1,
+    'BURSTY': 2,
+    'WEB': 3
+}
+
+# Columns read from each output file, with compact dtypes
+DELAY_DTYPES = {'TrafficType': 'uint8', 'Delay': 'float32'}
+ADMISSION_DTYPES = {'FlowId': 'uint32', 'TrafficType': 'category', 'Admitted': 'uint8',
+                    'RequiredAirtime': 'float64'}
+FLOWMON_DTYPES = {'TxPackets': 'uint64', 'RxPackets': 'uint64', 'Throughput': 'float64',
+                  'PacketLoss': 'float64'}
+
+# Fixed delay histogram used for the CDFs (ms); larger delays are counted as overflow
+CDF_BIN_WIDTH = 0.5
+CDF_MAX_DELAY = 1000.0
+
+# Rows per chunk when streaming the delay trace
+DELAY_CHUNK_ROWS = 1_000_000
+
 def load_simulation_data(prefix):
-    """Load all simulation output files"""
+    """
+    Load the columns used by the analysis from all simulation output files
+    The delay trace is streamed in chunks into per-traffic-type sketches, so its
+    size does not bound memory; the small admission and FlowMonitor files are
+    read whole (cached as Parquet next to the CSV) with admitted airtime grouped once
+    """
     data = {}
     
     try:
-        # Load delay data
-        delay_file = f"{prefix}-delay.csv"
-        if os.path.exists(delay_file):
-            data['delay'] = pd.read_csv(delay_file)
-            print(f"Loaded {len(data['delay'])} delay records")
+        # Stream delay data (binary trace if present, else CSV)
+        sketches = {}
+        records = 0
+        for chunk in iter_trace_file(prefix, 'delay', list(DELAY_DTYPES), DELAY_DTYPES, DELAY_CHUNK_ROWS):
+            for traffic_id, delays in chunk.groupby('TrafficType')['Delay']:
+                sketch = sketches.setdefault(int(traffic_id),
+                                             DelaySketch(cdf_bin_width=CDF_BIN_WIDTH,
+                                                         cdf_max_delay=CDF_MAX_DELAY))
+                sketch.add(delays.to_numpy())
+            records += len(chunk)
+        if sketches:
+            data['delay_sketches'] = sketches
+            print(f"Loaded {records} delay records")
         
         # Load admission data
-        admission_file = f"{prefix}-admission.csv"
-        if os.path.exists(admission_file):
-            data['admission'] = pd.read_csv(admission_file)
+        admission = read_trace_file(prefix, 'admission', list(ADMISSION_DTYPES), ADMISSION_DTYPES,
+                                    parquet_cache=True)
+        if admission is not None:
+            data['admission'] = admission
+            admitted = admission[admission['Admitted'] == 1]
+            airtime = admitted.groupby('TrafficType', observed=True)['RequiredAirtime'].sum()
+            data['admitted_airtime_by_type'] = {ADMISSION_TYPES[name]: value
+                                                for name, value in airtime.items()
+                                                if name in ADMISSION_TYPES}
             print(f"Loaded {len(data['admission'])} admission records")
         
         # Load FlowMonitor data
-        flowmon_file = f"{prefix}-flowmon.csv"
-        if os.path.exists(flowmon_file):
-            data['flowmon'] = pd.read_csv(flowmon_file)
+        flowmon = read_trace_file(prefix, 'flowmon', list(FLOWMON_DTYPES), FLOWMON_DTYPES,
+                                  parquet_cache=True)
+        if flowmon is not None:
+            data['flowmon'] = flowmon
             print(f"Loaded {len(data['flowmon'])} flow records")
         
         return data
@@ -67,6 +114,190 @@ def load_simulation_data(prefix):
         print(f"Error loading data: {e}")
         return None
 
+def summarize_delays(sketch):
+    """Reduce the delay sketch of one traffic type to statistics and a CDF"""
+    cdf_delays, cdf = sketch.cdf()
+    return {
+        'count': sketch.count,
+        'mean': sketch.mean,
+        'median': sketch.quantile(0.50),
+        'std': sketch.std(),
+        'min': sketch.min,
+        'max': sketch.max,
+        'p95': sketch.quantile(0.95),
+        'p99': sketch.quantile(0.99),
+        'below_150': sketch.count_below(150),
+        'cdf_delays': cdf_delays,
+        'cdf': cdf,
+    }
+
+def job_params(prefix):
+    """
+    Parameters of the sweep job that wrote prefix (<output-dir>/<job id>/<prefix>),
+    read from <output-dir>/manifest.json; None for prefixes outside a sweep
+    """
+    job_dir = os.path.dirname(os.path.normpath(prefix))
+    job_id = os.path.basename(job_dir)
+    for entry in load_manifest(os.path.dirname(job_dir)):
+        if entry['id'] == job_id:
+            return entry['params']
+    return None
+
+def scenario_label(prefix, params):
+    """
+    Plot label of a scenario: its grid point parameters (without the RNG run), or the
+    scenario prefix itself outside a sweep, so that different scenarios never share a label
+    """
+    if params is None:
+        return scenario_key(prefix)
+    cac = 'on' if params['enableCac'] else 'off'
+    return (f"{params['nStations']} clients, threshold {params['threshold']:g}, "
+            f"{params['channelWidth']} MHz, CAC {cac}")
+
+def reduce_simulation_data(prefix, index=0):
+    """
+    Load one scenario and reduce it to the small summary the plots are built from
+    Runs in a worker process; returns None if nothing could be loaded
+    """
+    print(f"\nLoading data from: {prefix}")
+    data = load_simulation_data(prefix)
+    if not data:
+        return None
+    
+    # Number of stations from the sweep manifest, else from the prefix if possible
+    params = job_params(prefix)
+    if params is not None:
+        n_stations = params['nStations']
+    else:
+        try:
+            n_stations = int(prefix.split('-')[-1])
+        except ValueError:
+            n_stations = 25 + index * 5  # Default progression
+    
+    summary = {
+        'prefix': prefix,
+        'label': scenario_label(prefix, params),
+        'n_stations': n_stations,
+        'total_flows': 0
+    }
+    
+    if 'admission' in data:
+        admission = data['admission']
+        total = len(admission)
+        admitted = int((admission['Admitted'] == 1).sum())
+        summary['total_flows'] = total
+        summary['admission'] = {
+            'total': total,
+            'admitted': admitted,
+            'blocked': total - admitted,
+            'blocking_prob': (total - admitted) / total if total > 0 else 0,
+            'offered_airtime': float(admission['RequiredAirtime'].sum()),
+            'admitted_airtime_by_type': data['admitted_airtime_by_type']
+        }
+    
+    if 'delay_sketches' in data:
+        summary['delay'] = {traffic_id: summarize_delays(sketch)
+                            for traffic_id, sketch in data['delay_sketches'].items() if sketch.count > 0}
+    
+    if 'flowmon' in data:
+        flowmon = data['flowmon']
+        summary['flowmon'] = {
+            'n_flows': len(flowmon),
+            'total_throughput': float(flowmon['Throughput'].sum()),
+            'mean_throughput': float(flowmon['Throughput'].mean()),
+            'tx_packets': int(flowmon['TxPackets'].sum()),
+            'rx_packets': int(flowmon['RxPackets'].sum()),
+            'mean_loss': float(flowmon['PacketLoss'].mean())
+        }
+    
+    return summary
+
+def reduce_all(prefixes, workers=None):
+    """Reduce all scenarios in parallel, keeping the command-line order"""
+    workers = min(len(prefixes), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summaries = list(pool.map(reduce_simulation_data, prefixes, range(len(prefixes))))
+    return [summary for summary in summaries if summary is not None]
+
+def combine_replications(summaries, confidence=0.95):
+    """
+    Merge the summaries of RNG runs of one scenario (sweep job directories that differ
+    only in -run<N>) into a summary of per-run means; confidence intervals of the
+    plotted metrics go to summary['ci'][metric] = (low, high)
+    """
+    combined = []
+    for runs in group_by_scenario(summaries, key=lambda summary: summary['prefix']).values():
+        ci = {}
+        
+        def mean_of(values, metric=None):
+            mean, low, high = mean_ci(values, confidence)
+            if metric is not None:
+                ci[metric] = (low, high)
+            return mean
+        
+        summary = {
+            'prefix': scenario_key(runs[0]['prefix']),
+            'label': runs[0]['label'],
+            'n_stations': runs[0]['n_stations'],
+            'total_flows': mean_of([run['total_flows'] for run in runs]),
+            'runs': len(runs),
+            'ci': ci
+        }
+        
+        admissions = [run['admission'] for run in runs if 'admission' in run]
+        if admissions:
+            summary['admission'] = {
+                name: mean_of([a[name] for a in admissions])
+                for name in ('total', 'admitted', 'blocked', 'offered_airtime')
+            }
+            summary['admission']['blocking_prob'] = mean_of([a['blocking_prob'] for a in admissions],
+                                                            'blocking_prob')
+            summary['admission']['admitted_airtime_by_type'] = {
+                traffic_id: mean_of([a['admitted_airtime_by_type'].get(traffic_id, 0) for a in admissions])
+                for traffic_id in TRAFFIC_TYPES
+            }
+        
+        delays = [run['delay'] for run in runs if 'delay' in run]
+        if delays:
+            summary['delay'] = {}
+            for traffic_id in TRAFFIC_TYPES:
+                per_run = [d[traffic_id] for d in delays if traffic_id in d]
+                if not per_run:
+                    continue
+                stats_ = {name: mean_of([r[name] for r in per_run]) for name in ('median', 'std', 'p95', 'p99')}
+                stats_['mean'] = mean_of([r['mean'] for r in per_run], ('delay', traffic_id))
+                stats_['min'] = min(r['min'] for r in per_run)
+                stats_['max'] = max(r['max'] for r in per_run)
+                stats_['count'] = sum(r['count'] for r in per_run)
+                stats_['below_150'] = sum(r['below_150'] for r in per_run)
+                stats_['cdf_delays'] = per_run[0]['cdf_delays']
+                stats_['cdf'] = np.mean([r['cdf'] for r in per_run], axis=0)
+                summary['delay'][traffic_id] = stats_
+        
+        flowmons = [run['flowmon'] for run in runs if 'flowmon' in run]
+        if flowmons:
+            summary['flowmon'] = {
+                name: mean_of([fm[name] for fm in flowmons])
+                for name in ('n_flows', 'mean_throughput', 'tx_packets', 'rx_packets', 'mean_loss')
+            }
+            summary['flowmon']['total_throughput'] = mean_of([fm['total_throughput'] for fm in flowmons],
+                                                             'total_throughput')
+        
+        combined.append(summary)
+    return combined
+
+def ci_error(data_info, metric, value):
+    """Error bar [[below], [above]] of a metric, or None without a confidence interval"""
+    low, high = data_info.get('ci', {}).get(metric, (np.nan, np.nan))
+    if np.isnan(low):
+        return None
+    return [[value - low], [high - value]]
+
+def ci_text(data_info, metric, value, fmt):
+    """' ± half-width' (formatted with fmt) when the metric has a confidence interval"""
+    error = ci_error(data_info, metric, value)
+    return '' if error is None else f" ± {format((error[0][0] + error[1][0]) / 2, fmt)}"
+
 def plot_aggregate_throughput_vs_flows(data_list, output_file='throughput_vs_flows.png'):
     """
     Plot 1: Aggregate Throughput vs Number of Offered Flows
@@ -75,17 +306,18 @@ def plot_aggregate_throughput_vs_flows(data_list, output_file='throughput_vs_flo
     plt.figure(figsize=(12, 7))
     
     for data_info in data_list:
-        data = data_info['data']
         label = data_info['label']
-        n_stations = data_info['n_stations']
         
-        if 'flowmon' in data:
-            flowmon = data['flowmon']
-            total_throughput = flowmon['Throughput'].sum()
-            n_flows = len(flowmon)
+        if 'flowmon' in data_info:
+            flowmon = data_info['flowmon']
+            total_throughput = flowmon['total_throughput']
+            n_flows = flowmon['n_flows']
             
-            plt.scatter(n_flows, total_throughput, s=150, label=f"{label} ({n_stations} clients)",
+            plt.scatter(n_flows, total_throughput, s=150, label=label,
                        alpha=0.7, edgecolors='black', linewidth=1.5)
+            error = ci_error(data_info, 'total_throughput', total_throughput)
+            if error is not None:
+                plt.errorbar(n_flows, total_throughput, yerr=error, fmt='none', ecolor='black', capsize=5)
     
     plt.xlabel('Number of Offered Flows', fontweight='bold')
     plt.ylabel('Aggregate Throughput (Mbps)', fontweight='bold')
@@ -106,21 +338,20 @@ def plot_delay_vs_flows(data_list, output_file='delay_vs_flows.png'):
     fig, ax = plt.subplots(figsize=(12, 7))
     
     # Collect data by traffic type
-    traffic_data = {ttype: {'flows': [], 'delays': []} for ttype in TRAFFIC_TYPES.values()}
+    traffic_data = {ttype: {'flows': [], 'delays': [], 'errors': []} for ttype in TRAFFIC_TYPES.values()}
     
     for data_info in data_list:
-        data = data_info['data']
         n_flows = data_info.get('total_flows', 0)
         
-        if 'delay' in data:
-            delay_df = data['delay']
-            
+        if 'delay' in data_info:
             for traffic_id, traffic_name in TRAFFIC_TYPES.items():
-                traffic_delays = delay_df[delay_df['TrafficType'] == traffic_id]['Delay']
-                if len(traffic_delays) > 0:
-                    avg_delay = traffic_delays.mean()
+                if traffic_id in data_info['delay']:
+                    avg_delay = data_info['delay'][traffic_id]['mean']
+                    error = ci_error(data_info, ('delay', traffic_id), avg_delay)
                     traffic_data[traffic_name]['flows'].append(n_flows)
                     traffic_data[traffic_name]['delays'].append(avg_delay)
+                    traffic_data[traffic_name]['errors'].append([0.0, 0.0] if error is None else
+                                                                [error[0][0], error[1][0]])
     
     # Plot each traffic type
     for traffic_name, values in traffic_data.items():
@@ -129,10 +360,11 @@ def plot_delay_vs_flows(data_list, output_file='delay_vs_flows.png'):
             sorted_indices = np.argsort(values['flows'])
             flows = np.array(values['flows'])[sorted_indices]
             delays = np.array(values['delays'])[sorted_indices]
+            errors = np.array(values['errors'])[sorted_indices].T
             
-            ax.plot(flows, delays, marker='o', linewidth=2.5, markersize=8,
-                   label=traffic_name, color=TRAFFIC_COLORS.get(traffic_name, 'gray'),
-                   alpha=0.8)
+            ax.errorbar(flows, delays, yerr=errors if errors.any() else None, marker='o',
+                       linewidth=2.5, markersize=8, capsize=4, label=traffic_name,
+                       color=TRAFFIC_COLORS.get(traffic_name, 'gray'), alpha=0.8)
     
     # Add VoIP delay threshold line
     ax.axhline(y=150, color='red', linestyle='--', linewidth=2, alpha=0.7,
@@ -158,33 +390,34 @@ def plot_blocking_probability(data_list, output_file='blocking_probability.png')
     
     loads = []
     blocking_probs = []
+    errors = []
     labels = []
     
     for data_info in data_list:
-        data = data_info['data']
         label = data_info['label']
         
-        if 'admission' in data:
-            admission = data['admission']
-            total_requests = len(admission)
-            blocked = len(admission[admission['Admitted'] == 0])
-            blocking_prob = blocked / total_requests if total_requests > 0 else 0
+        if 'admission' in data_info:
+            admission = data_info['admission']
+            blocking_prob = admission['blocking_prob']
+            error = ci_error(data_info, 'blocking_prob', blocking_prob)
             
             # Calculate offered load (sum of required airtimes)
-            offered_load = admission['RequiredAirtime'].sum()
+            offered_load = admission['offered_airtime']
             
             loads.append(offered_load)
             blocking_probs.append(blocking_prob)
+            errors.append([0.0, 0.0] if error is None else [error[0][0], error[1][0]])
             labels.append(label)
     
     # Sort by load
     sorted_indices = np.argsort(loads)
     loads = np.array(loads)[sorted_indices]
     blocking_probs = np.array(blocking_probs)[sorted_indices]
+    errors = np.array(errors).reshape(-1, 2)[sorted_indices].T
     sorted_labels = [labels[i] for i in sorted_indices]
     
-    plt.plot(loads, blocking_probs, marker='s', linewidth=3, markersize=10,
-            color='#e74c3c', alpha=0.8, label='With CAC')
+    plt.errorbar(loads, blocking_probs, yerr=errors if errors.any() else None, marker='s',
+                linewidth=3, markersize=10, capsize=5, color='#e74c3c', alpha=0.8, label='With CAC')
     
     # Add markers for each point
     for i, (load, prob, lbl) in enumerate(zip(loads, blocking_probs, sorted_labels)):
@@ -211,19 +444,13 @@ def plot_voip_delay_cdf(data_list, output_file='voip_delay_cdf.png'):
     fig, ax = plt.subplots(figsize=(12, 7))
     
     for data_info in data_list:
-        data = data_info['data']
         label = data_info['label']
         
-        if 'delay' in data:
-            delay_df = data['delay']
-            voip_delays = delay_df[delay_df['TrafficType'] == 0]['Delay'].values
+        if 0 in data_info.get('delay', {}):
+            voip = data_info['delay'][0]
             
-            if len(voip_delays) > 0:
-                # Calculate CDF
-                sorted_delays = np.sort(voip_delays)
-                cdf = np.arange(1, len(sorted_delays) + 1) / len(sorted_delays)
-                
-                ax.plot(sorted_delays, cdf, linewidth=2.5, label=label, alpha=0.8)
+            # CDF at the upper edge of each histogram bin
+            ax.plot(voip['cdf_delays'], voip['cdf'], linewidth=2.5, label=label, alpha=0.8)
     
     # Add 150ms threshold line
     ax.axvline(x=150, color='red', linestyle='--', linewidth=2, alpha=0.7,
@@ -254,23 +481,12 @@ def plot_airtime_utilization(data_list, output_file='airtime_utilization.png'):
     airtime_by_type = {ttype: [] for ttype in TRAFFIC_TYPES.values()}
     
     for data_info in data_list:
-        data = data_info['data']
         label = data_info['label']
         scenarios.append(label)
         
-        if 'admission' in data:
-            admission = data['admission']
-            
+        if 'admission' in data_info:
             for traffic_id, traffic_name in TRAFFIC_TYPES.items():
-                # Map traffic type string to ID
-                type_map = {'VOIP': 0, 'VIDEO': 1, 'BURSTY': 2, 'WEB': 3}
-                traffic_rows = admission[admission['TrafficType'].isin([traffic_name, list(type_map.keys())[traffic_id]])]
-                
-                if len(traffic_rows) > 0:
-                    total_airtime = traffic_rows[traffic_rows['Admitted'] == 1]['RequiredAirtime'].sum()
-                else:
-                    total_airtime = 0
-                
+                total_airtime = data_info['admission']['admitted_airtime_by_type'].get(traffic_id, 0)
                 airtime_by_type[traffic_name].append(total_airtime)
     
     # Create stacked bar chart
@@ -311,63 +527,65 @@ def generate_summary_statistics(data_list, output_file='summary_statistics.txt')
         f.write("=" * 80 + "\n\n")
         
         for data_info in data_list:
-            data = data_info['data']
             label = data_info['label']
             n_stations = data_info.get('n_stations', 'N/A')
             
             f.write(f"\n{'='*80}\n")
             f.write(f"Scenario: {label}\n")
             f.write(f"Number of Stations: {n_stations}\n")
+            f.write(f"Replications: {data_info.get('runs', 1)}\n")
             f.write(f"{'='*80}\n\n")
             
             # Admission statistics
-            if 'admission' in data:
-                admission = data['admission']
-                total = len(admission)
-                admitted = len(admission[admission['Admitted'] == 1])
-                blocked = total - admitted
-                blocking_prob = blocked / total if total > 0 else 0
+            if 'admission' in data_info:
+                admission = data_info['admission']
+                total = admission['total']
+                admitted = admission['admitted']
+                blocked = admission['blocked']
+                blocking_prob = admission['blocking_prob']
                 
                 f.write(f"Admission Control:\n")
-                f.write(f"  Total Flow Requests: {total}\n")
-                f.write(f"  Admitted Flows: {admitted}\n")
-                f.write(f"  Blocked Flows: {blocked}\n")
-                f.write(f"  Blocking Probability: {blocking_prob:.2%}\n")
-                f.write(f"  Total Offered Airtime: {admission['RequiredAirtime'].sum():.4f}\n\n")
+                f.write(f"  Total Flow Requests: {total:g}\n")
+                f.write(f"  Admitted Flows: {admitted:g}\n")
+                f.write(f"  Blocked Flows: {blocked:g}\n")
+                f.write(f"  Blocking Probability: {blocking_prob:.2%}"
+                        f"{ci_text(data_info, 'blocking_prob', blocking_prob, '.2%')}\n")
+                f.write(f"  Total Offered Airtime: {admission['offered_airtime']:.4f}\n\n")
             
             # Delay statistics
-            if 'delay' in data:
-                delay_df = data['delay']
-                
+            if 'delay' in data_info:
                 f.write(f"Delay Statistics (ms):\n")
                 for traffic_id, traffic_name in TRAFFIC_TYPES.items():
-                    traffic_delays = delay_df[delay_df['TrafficType'] == traffic_id]['Delay']
-                    if len(traffic_delays) > 0:
+                    traffic_delays = data_info['delay'].get(traffic_id)
+                    if traffic_delays is not None:
                         f.write(f"  {traffic_name}:\n")
-                        f.write(f"    Mean: {traffic_delays.mean():.2f}\n")
-                        f.write(f"    Median: {traffic_delays.median():.2f}\n")
-                        f.write(f"    Std Dev: {traffic_delays.std():.2f}\n")
-                        f.write(f"    Min: {traffic_delays.min():.2f}\n")
-                        f.write(f"    Max: {traffic_delays.max():.2f}\n")
-                        f.write(f"    95th Percentile: {traffic_delays.quantile(0.95):.2f}\n")
+                        f.write(f"    Mean: {traffic_delays['mean']:.2f}"
+                                f"{ci_text(data_info, ('delay', traffic_id), traffic_delays['mean'], '.2f')}\n")
+                        f.write(f"    Median: {traffic_delays['median']:.2f}\n")
+                        f.write(f"    Std Dev: {traffic_delays['std']:.2f}\n")
+                        f.write(f"    Min: {traffic_delays['min']:.2f}\n")
+                        f.write(f"    Max: {traffic_delays['max']:.2f}\n")
+                        f.write(f"    95th Percentile: {traffic_delays['p95']:.2f}\n")
+                        f.write(f"    99th Percentile: {traffic_delays['p99']:.2f}\n")
                         
                         # VoIP QoS check
                         if traffic_name == 'VoIP':
-                            below_threshold = (traffic_delays < 150).sum()
-                            total_voip = len(traffic_delays)
+                            below_threshold = traffic_delays['below_150']
+                            total_voip = traffic_delays['count']
                             qos_compliance = below_threshold / total_voip * 100
                             f.write(f"    QoS Compliance (<150ms): {qos_compliance:.1f}%\n")
                 f.write("\n")
             
             # Throughput statistics
-            if 'flowmon' in data:
-                flowmon = data['flowmon']
+            if 'flowmon' in data_info:
+                flowmon = data_info['flowmon']
                 f.write(f"Throughput Statistics:\n")
-                f.write(f"  Aggregate Throughput: {flowmon['Throughput'].sum():.2f} Mbps\n")
-                f.write(f"  Average Per-Flow Throughput: {flowmon['Throughput'].mean():.2f} Mbps\n")
-                f.write(f"  Total Packets Transmitted: {flowmon['TxPackets'].sum()}\n")
-                f.write(f"  Total Packets Received: {flowmon['RxPackets'].sum()}\n")
-                f.write(f"  Average Packet Loss: {flowmon['PacketLoss'].mean():.2f}%\n\n")
+                f.write(f"  Aggregate Throughput: {flowmon['total_throughput']:.2f}"
+                        f"{ci_text(data_info, 'total_throughput', flowmon['total_throughput'], '.2f')} Mbps\n")
+                f.write(f"  Average Per-Flow Throughput: {flowmon['mean_throughput']:.2f} Mbps\n")
+                f.write(f"  Total Packets Transmitted: {flowmon['tx_packets']:g}\n")
+                f.write(f"  Total Packets Received: {flowmon['rx_packets']:g}\n")
+                f.write(f"  Average Packet Loss: {flowmon['mean_loss']:.2f}%\n\n")
     
     print(f"Saved: {output_file}")
 
@@ -378,25 +596,9 @@ def main():
         print("Example: python3 analyze-results.py wifi6-cac-25 wifi6-cac-30 wifi6-cac-35")
         sys.exit(1)
     
-    # Load data from all specified prefixes
-    data_list = []
-    for i, prefix in enumerate(sys.argv[1:]):
-        print(f"\nLoading data from: {prefix}")
-        data = load_simulation_data(prefix)
-        
-        if data:
-            # Extract number of stations from prefix if possible
-            try:
-                n_stations = int(prefix.split('-')[-1])
-            except:
-                n_stations = 25 + i * 5  # Default progression
-            
-            data_list.append({
-                'data': data,
-                'label': f"{n_stations} clients",
-                'n_stations': n_stations,
-                'total_flows': len(data.get('admission', []))
-            })
+    # Load and reduce all specified prefixes in parallel; plots only see the summaries.
+    # RNG runs of the same sweep grid point are combined into means with 95% CIs
+    data_list = combine_replications(reduce_all(sys.argv[1:]))
     
     if not data_list:
         print("No data loaded. Exiting.")
@@ -3,6 +3,10 @@ import re
 import os
 import numpy as np
 
+from sim_metrics import load_scenario, yerr
+
+METRIC_NAMES = ['throughput', 'delay', 'utilization_ap1', 'utilization_ap2']
+
 def parse_log_file(filename):
     metrics = {
         'throughput': 0.0,
@@ -37,6 +41,7 @@ def parse_log_file(filename):
 
 def plot_soft_vs_hard_cac(soft_metrics, hard_metrics):
     labels = ['Soft CAC (Proposed)', 'Hard CAC (Legacy)']
+    scenarios = [soft_metrics, hard_metrics]
     throughput = [soft_metrics['throughput'], hard_metrics['throughput']]
     delay = [soft_metrics['delay'], hard_metrics['delay']]
     utilization = [soft_metrics['utilization_ap1'] * 100, hard_metrics['utilization_ap1'] * 100] # %
@@ -44,7 +49,8 @@ def plot_soft_vs_hard_cac(soft_metrics, hard_metrics):
     fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(18, 5))
     
     # Throughput Plot
-    ax1.bar(labels, throughput, color=['#2ecc71', '#95a5a6'], alpha=0.8)
+    ax1.bar(labels, throughput, yerr=yerr(scenarios, 'throughput'), capsize=6,
+            color=['#2ecc71', '#95a5a6'], alpha=0.8)
     ax1.set_title('Aggregate Throughput')
     ax1.set_ylabel('Mbps')
     ax1.grid(axis='y', linestyle='--', alpha=0.7)
@@ -52,7 +58,8 @@ def plot_soft_vs_hard_cac(soft_metrics, hard_metrics):
         ax1.text(i, v + 0.1, f"{v:.2f}", ha='center')
         
     # Delay Plot
-    ax2.bar(labels, delay, color=['#3498db', '#95a5a6'], alpha=0.8)
+    ax2.bar(labels, delay, yerr=yerr(scenarios, 'delay'), capsize=6,
+            color=['#3498db', '#95a5a6'], alpha=0.8)
     ax2.set_title('Average End-to-End Delay')
     ax2.set_ylabel('Delay (ms)')
     ax2.grid(axis='y', linestyle='--', alpha=0.7)
@@ -60,7 +67,8 @@ def plot_soft_vs_hard_cac(soft_metrics, hard_metrics):
         ax2.text(i, v + 0.1, f"{v:.2f}", ha='center')
         
     # Utilization Plot
-    ax3.bar(labels, utilization, color=['#e67e22', '#95a5a6'], alpha=0.8)
+    ax3.bar(labels, utilization, yerr=yerr(scenarios, 'utilization_ap1', 100), capsize=6,
+            color=['#e67e22', '#95a5a6'], alpha=0.8)
     ax3.set_title('AP Utilization')
     ax3.set_ylabel('Utilization (%)')
     ax3.grid(axis='y', linestyle='--', alpha=0.7)
@@ -75,8 +83,8 @@ def plot_soft_vs_hard_cac(soft_metrics, hard_metrics):
 
 def main():
     # Parse Results
-    soft_metrics = parse_log_file('wifi6-multi-ap-soft-cac-cci.log')
-    hard_metrics = parse_log_file('wifi6-multi-ap-hard-cac-cci.log')
+    soft_metrics = load_scenario('soft-cac-cci', METRIC_NAMES, parse_log_file)
+    hard_metrics = load_scenario('hard-cac-cci', METRIC_NAMES, parse_log_file)
     
     # Check if data exists
     if soft_metrics['throughput'] == 0 or hard_metrics['throughput'] == 0:
@@ -89,6 +97,7 @@ def main():
     
     # Print Summary Table
     print("\n=== Comparative Analysis Summary ===")
+    print(f"Runs: Soft CAC {soft_metrics.get('runs', 1)}, Hard CAC {hard_metrics.get('runs', 1)} (error bars: 95% CI)")
     print(f"{'Metric':<20} | {'Soft CAC':<15} | {'Hard CAC':<15} | {'Improvement':<15}")
     print("-" * 70)
     print(f"{'Throughput (Mbps)':<20} | {soft_metrics['throughput']:<15.2f} | {hard_metrics['throughput']:<15.2f} | {((soft_metrics['throughput']-hard_metrics['throughput'])/hard_metrics['throughput'])*100:<15.1f}%")
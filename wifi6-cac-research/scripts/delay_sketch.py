@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Mergeable streaming summary of packet delays
+Python counterpart of DelaySummary (src/wifi6-cac-delay-stats.h): running moments,
+a log-bucket quantile sketch with bounded relative error and a fixed-bin histogram
+for CDFs. Memory does not depend on the number of samples.
+"""
+
+import math
+
+import numpy as np
+
+# Range of delays (ms) resolved by the quantile sketch; values outside are clamped
+MIN_DELAY = 1e-4
+MAX_DELAY = 1e7
+
+
+class DelaySketch:
+    """Streaming delay statistics built from chunks of samples (delays in ms)"""
+
+    def __init__(self, relative_accuracy=0.01, cdf_bin_width=0.5, cdf_max_delay=1000.0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.index_offset = math.floor(math.log(MIN_DELAY) / self.log_gamma)
+        n_buckets = math.ceil(math.log(MAX_DELAY) / self.log_gamma) - self.index_offset + 1
+        self.buckets = np.zeros(n_buckets, dtype=np.int64)
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+        self.cdf_edges = np.arange(0.0, cdf_max_delay + cdf_bin_width, cdf_bin_width)
+        self.cdf_counts = np.zeros(len(self.cdf_edges) - 1, dtype=np.int64)
+        self.overflow = 0
+
+    def add(self, values):
+        """Add a chunk of delays"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+
+        chunk_mean = values.mean()
+        self._merge_moments(len(values), chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        index = np.ceil(np.log(np.clip(values, MIN_DELAY, MAX_DELAY)) / self.log_gamma)
+        index = index.astype(np.int64) - self.index_offset
+        self.buckets += np.bincount(np.clip(index, 0, len(self.buckets) - 1),
+                                    minlength=len(self.buckets))
+
+        counts, _ = np.histogram(values, bins=self.cdf_edges)
+        self.cdf_counts += counts
+        self.overflow += int((values > self.cdf_edges[-1]).sum())
+
+    def merge(self, other):
+        """Merge a sketch built with the same parameters"""
+        if other.count == 0:
+            return
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets += other.buckets
+        self.cdf_counts += other.cdf_counts
+        self.overflow += other.overflow
+
+    def _merge_moments(self, count, mean, m2):
+        """Chan et al. parallel combination of (count, mean, M2)"""
+        total = self.count + count
+        deviation = mean - self.mean
+        self.m2 += m2 + deviation * deviation * self.count * count / total
+        self.mean += deviation * count / total
+        self.count = total
+
+    def std(self):
+        """Sample standard deviation (NaN with fewer than two samples, as in pandas)"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def quantile(self, q):
+        """Delay quantile within the relative accuracy"""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        i = int(np.searchsorted(np.cumsum(self.buckets), rank, side='right'))
+        value = 2 * self.gamma ** (i + self.index_offset) / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def count_below(self, threshold):
+        """Samples below threshold; exact when threshold is a CDF bin edge"""
+        return int(self.cdf_counts[:int(np.searchsorted(self.cdf_edges, threshold))].sum())
+
+    def cdf(self):
+        """(upper bin edges, cumulative probability) over the CDF histogram"""
+        return self.cdf_edges[1:], np.cumsum(self.cdf_counts) / self.count
@@ -1,72 +1,168 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import math
 
 def erlang_b(A, N):
     """
     Calculate blocking probability using Erlang-B formula.
     A: Offered Traffic (Erlangs) = Arrival Rate * Average Holding Time
     N: Number of Servers (Channels/Airtime Units)
+    A and N may be scalars or NumPy arrays (broadcast against each other).
+
+    Uses the recursion B(0) = 1, B(n) = A*B(n-1) / (n + A*B(n-1)), which stays
+    within [0, 1] for any N instead of overflowing A**N / N! past N ~ 170.
+    """
+    A = np.asarray(A, dtype=float)
+    N = np.asarray(N)
+    if np.any(N < 0):
+        raise ValueError("Number of servers must be non-negative")
+
+    A, N = np.broadcast_arrays(A, N.astype(np.int64))
+    B = np.ones(A.shape)
+    for n in range(1, int(N.max(initial=0)) + 1):
+        AB = A * B
+        B = np.where(n <= N, AB / (n + AB), B)
+    return B if B.ndim else float(B)
+
+def erlang_b_servers(A, target_blocking, max_servers=100000):
+    """
+    Inverse Erlang-B: smallest number of servers N with erlang_b(A, N) <= target_blocking.
+    A: Offered Traffic (Erlangs), scalar or array
+    target_blocking: Target blocking probability (0-1], broadcast against A
+    Raises ValueError if some point needs more than max_servers.
+    """
+    A = np.asarray(A, dtype=float)
+    target = np.asarray(target_blocking, dtype=float)
+    if np.any(target <= 0):
+        raise ValueError("Target blocking must be positive")
+
+    A, target = np.broadcast_arrays(A, target)
+    B = np.ones(A.shape)
+    servers = np.where(B <= target, 0, -1)
+    n = 0
+    # B(n) decreases with n, so each point stops at its first n below the target
+    while np.any(servers < 0):
+        n += 1
+        if n > max_servers:
+            raise ValueError(f"Target blocking needs more than {max_servers} servers")
+        AB = A * B
+        B = AB / (n + AB)
+        servers = np.where((servers < 0) & (B <= target), n, servers)
+    return servers if servers.ndim else int(servers)
+
+def airtime_servers(capacity_threshold, flow_airtime):
+    """
+    Number of flows that fit into the airtime threshold, N = floor(threshold / airtime)
+    (with a small tolerance so that e.g. 0.6 / 0.2 gives 3, not 2).
     """
-    numerator = (A ** N) / math.factorial(N)
-    denominator = sum([(A ** i) / math.factorial(i) for i in range(N + 1)])
-    return numerator / denominator
+    ratio = np.asarray(capacity_threshold, dtype=float) / np.asarray(flow_airtime, dtype=float)
+    servers = np.floor(ratio + 1e-9).astype(np.int64)
+    return servers if servers.ndim else int(servers)
+
+def threshold_for_blocking(offered_load, flow_airtime, target_blocking):
+    """
+    Smallest CAC airtime threshold that keeps blocking at or below target_blocking,
+    i.e. erlang_b_servers(offered_load, target) flows of flow_airtime each.
+    Values above 1.0 mean the target cannot be met on a single channel.
+    """
+    return erlang_b_servers(offered_load, target_blocking) * np.asarray(flow_airtime, dtype=float)
+
+def blocking_surface(offered_load, thresholds, flow_airtimes_ms):
+    """
+    Erlang-B blocking over a grid of CAC threshold x per-flow airtime.
+    offered_load: Offered Traffic (Erlangs)
+    thresholds: CAC airtime thresholds (fraction of airtime)
+    flow_airtimes_ms: Per-flow airtime in ms of channel time per second
+    Returns an array of shape (len(thresholds), len(flow_airtimes_ms)).
+    """
+    thresholds = np.asarray(thresholds, dtype=float)[:, np.newaxis]
+    airtimes = np.asarray(flow_airtimes_ms, dtype=float)[np.newaxis, :] / 1000.0
+    return erlang_b(offered_load, airtime_servers(thresholds, airtimes))
 
 def calculate_airtime_blocking(offered_load_flows, capacity_threshold=0.80, avg_flow_airtime=0.05):
     """
     Map Airtime CAC to Erlang Loss Model.
-    
+
     In Airtime CAC:
     - "Servers" (N) can be modeled as the number of flows that fit into the Threshold.
     - N = Capacity_Threshold / Avg_Flow_Airtime
     - Offered Load (A) = Number of Flows attempting to enter
     """
-    
+
     # Effective number of "channels" available in the airtime
     # e.g., if Threshold is 0.80 and each flow takes 0.05 (5%), then N = 16 flows can fit.
-    N = int(capacity_threshold / avg_flow_airtime)
-    
-    blocking_probs = []
-    for flows in offered_load_flows:
-        # In this simplified mapping, Offered Load A is proportional to active flows
-        # assuming they are all trying to be active at once (saturation).
-        # For a more dynamic model, A = lambda / mu. 
-        # Here we treat 'flows' as the offered load in Erlangs for worst-case.
-        A = flows 
-        
-        pb = erlang_b(A, N)
-        blocking_probs.append(pb * 100) # Convert to percentage
-        
-    return blocking_probs
-
-# Simulation Parameters matching our NS-3 setup
-offered_flows = np.arange(1, 51, 1) # 1 to 50 flows
-threshold = 0.80
-
-# Scenario 1: VoIP-like flows (Low airtime, ~1-2%)
-# VoIP (64kbps) takes very little airtime, maybe 0.012 (1.2%)
-pb_voip = calculate_airtime_blocking(offered_flows, threshold, 0.012)
-
-# Scenario 2: Video-like flows (High airtime, ~20%)
-# Video (3Mbps) takes significant airtime, maybe 0.20 (20%)
-pb_video = calculate_airtime_blocking(offered_flows, threshold, 0.20)
-
-# Scenario 3: Mixed Average (e.g., ~5% avg)
-pb_mixed = calculate_airtime_blocking(offered_flows, threshold, 0.05)
-
-# Plotting
-plt.figure(figsize=(10, 6))
-plt.plot(offered_flows, pb_voip, label='VoIP Only (Small Airtime)', linestyle='--', alpha=0.7)
-plt.plot(offered_flows, pb_video, label='Video Only (Large Airtime)', linestyle='--', alpha=0.7)
-plt.plot(offered_flows, pb_mixed, label='Mixed Traffic (Avg)', linewidth=3, color='#e74c3c')
-
-plt.title('Analytical Model: Blocking Probability vs Offered Load (Erlang-B)')
-plt.xlabel('Offered Load (Number of Flows)')
-plt.ylabel('Blocking Probability (%)')
-plt.grid(True, linestyle='--', alpha=0.7)
-plt.legend()
-plt.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-plt.ylim(-5, 105)
-
-plt.savefig('graphs/analytical_model_blocking.png', dpi=300)
-print("Analytical model graph saved to graphs/analytical_model_blocking.png")
+    N = airtime_servers(capacity_threshold, avg_flow_airtime)
+
+    # In this simplified mapping, Offered Load A is proportional to active flows
+    # assuming they are all trying to be active at once (saturation).
+    # For a more dynamic model, A = lambda / mu.
+    # Here we treat 'flows' as the offered load in Erlangs for worst-case.
+    A = np.asarray(offered_load_flows, dtype=float)
+
+    return erlang_b(A, N) * 100 # Convert to percentage
+
+def plot_blocking_vs_load():
+    # Simulation Parameters matching our NS-3 setup
+    offered_flows = np.arange(1, 51, 1) # 1 to 50 flows
+    threshold = 0.80
+
+    # Scenario 1: VoIP-like flows (Low airtime, ~1-2%)
+    # VoIP (64kbps) takes very little airtime, maybe 0.012 (1.2%)
+    pb_voip = calculate_airtime_blocking(offered_flows, threshold, 0.012)
+
+    # Scenario 2: Video-like flows (High airtime, ~20%)
+    # Video (3Mbps) takes significant airtime, maybe 0.20 (20%)
+    pb_video = calculate_airtime_blocking(offered_flows, threshold, 0.20)
+
+    # Scenario 3: Mixed Average (e.g., ~5% avg)
+    pb_mixed = calculate_airtime_blocking(offered_flows, threshold, 0.05)
+
+    # Plotting
+    plt.figure(figsize=(10, 6))
+    plt.plot(offered_flows, pb_voip, label='VoIP Only (Small Airtime)', linestyle='--', alpha=0.7)
+    plt.plot(offered_flows, pb_video, label='Video Only (Large Airtime)', linestyle='--', alpha=0.7)
+    plt.plot(offered_flows, pb_mixed, label='Mixed Traffic (Avg)', linewidth=3, color='#e74c3c')
+
+    plt.title('Analytical Model: Blocking Probability vs Offered Load (Erlang-B)')
+    plt.xlabel('Offered Load (Number of Flows)')
+    plt.ylabel('Blocking Probability (%)')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+    plt.ylim(-5, 105)
+
+    plt.savefig('graphs/analytical_model_blocking.png', dpi=300)
+    print("Analytical model graph saved to graphs/analytical_model_blocking.png")
+
+def plot_blocking_surface(offered_load=30, target_blocking=0.01):
+    # Dense grid: threshold 0.50-0.95 x per-flow airtime 1-200 ms per second
+    thresholds = np.linspace(0.50, 0.95, 91)
+    airtimes_ms = np.linspace(1.0, 200.0, 200)
+    surface = blocking_surface(offered_load, thresholds, airtimes_ms) * 100
+
+    plt.figure(figsize=(10, 6))
+    mesh = plt.pcolormesh(airtimes_ms, thresholds, surface, shading='auto', cmap='viridis')
+    plt.colorbar(mesh, label='Blocking Probability (%)')
+    contours = plt.contour(airtimes_ms, thresholds, surface, levels=[1, 5, 10, 25, 50],
+                           colors='white', linewidths=1)
+    plt.clabel(contours, fmt='%g%%')
+
+    # Threshold needed for the target blocking at each airtime (inverse Erlang-B)
+    required = threshold_for_blocking(offered_load, airtimes_ms / 1000.0, target_blocking)
+    feasible = required <= thresholds[-1]
+    plt.plot(airtimes_ms[feasible], required[feasible], color='#e74c3c', linewidth=2,
+             label=f'Threshold for {target_blocking:.0%} blocking')
+
+    plt.title(f'Analytical Model: Blocking Surface at {offered_load} Erlangs (Erlang-B)')
+    plt.xlabel('Per-Flow Airtime (ms per second)')
+    plt.ylabel('CAC Airtime Threshold')
+    plt.legend(loc='lower right')
+
+    plt.savefig('graphs/analytical_blocking_surface.png', dpi=300)
+    print("Blocking surface saved to graphs/analytical_blocking_surface.png")
+
+def main():
+    plot_blocking_vs_load()
+    plot_blocking_surface()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Flow-level Monte Carlo simulator of the airtime CAC
+Flows arrive as a Poisson process, hold their airtime for an exponential or
+Pareto time and are admitted by the hard (AirtimeAdmissionControl), soft
+(per-type thresholds) or AS-CAC+ (adaptive bursty threshold) policy of the
+ns-3 code. Thousands of independent replications advance in lockstep, one
+arrival at a time, as rows of NumPy arrays. Packets are not simulated: use
+ns-3 to validate the thresholds this suggests.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from airtime_table import (BURSTY, VIDEO_STREAM, VOIP, WEB_BROWSING, analytic_required_airtime,
+                           load_airtime_table)
+from replications import mean_ci
+
+TYPE_NAMES = ['VOIP', 'VIDEO', 'BURSTY', 'WEB']
+
+# (packet size in bytes, data rate in bps) requested per flow, as in wifi6-cac-simulation
+# (bursty flows ask for their 2.5 Mbps average rate)
+FLOW_PROFILES = {
+    VOIP: (160, 64e3),
+    VIDEO_STREAM: (1200, 3e6),
+    BURSTY: (1400, 2.5e6),
+    WEB_BROWSING: (1000, 1e6),
+}
+
+# Default share of arrivals per type (flow mix of wifi6-cac-simulation)
+DEFAULT_MIX = [10, 8, 6, 6]
+
+# Per-type thresholds of the soft CAC (other types use 0.80)
+SOFT_THRESHOLDS = [0.90, 0.80, 0.95, 0.80]
+
+POLICIES = ('hard', 'soft', 'ascac')
+
+
+def flow_airtimes(table=None, mcs=5, **phy):
+    """Required airtime of each traffic type, from an exported table or the analytic PHY model"""
+    airtimes = []
+    for traffic_type in range(len(TYPE_NAMES)):
+        packet_size, data_rate = FLOW_PROFILES[traffic_type]
+        if table is not None:
+            airtimes.append(table.required_airtime(packet_size, data_rate, traffic_type, mcs))
+        else:
+            airtimes.append(analytic_required_airtime(packet_size, data_rate, traffic_type, mcs=mcs, **phy))
+    return np.array(airtimes)
+
+
+def holding_times(rng, mean, size, distribution='exponential', pareto_shape=1.5):
+    """Flow holding times with the given mean; Pareto times are heavy-tailed (shape > 1)"""
+    if distribution == 'exponential':
+        return rng.exponential(mean, size)
+    if distribution == 'pareto':
+        if pareto_shape <= 1:
+            raise ValueError("Pareto shape must exceed 1 for a finite mean")
+        scale = mean * (pareto_shape - 1) / pareto_shape
+        return scale * (1 + rng.pareto(pareto_shape, size))
+    raise ValueError(f"Unknown holding time distribution {distribution}")
+
+
+def adapt_bursty_threshold(bursty_threshold, utilization, step=0.01):
+    """
+    AS-CAC+ update applied before every request (SoftAirtimeAdmissionControl::AdaptThresholds):
+    the PER estimated from utilization lowers or raises the bursty threshold by `step`
+    """
+    per = np.select([utilization > 0.95, utilization > 0.90, utilization > 0.80],
+                    [0.15, 0.05, 0.01], 0.001)
+    lower = np.maximum(0.80, bursty_threshold - step)
+    raise_ = np.minimum(0.98, bursty_threshold + step)
+    return np.where(per > 0.05, lower,
+                    np.where((per < 0.02) & (utilization > 0.70), raise_, bursty_threshold))
+
+
+def simulate(offered_load, airtimes, mix=DEFAULT_MIX, policy='hard', threshold=0.80,
+             soft_thresholds=SOFT_THRESHOLDS, adapt_step=0.01, mean_holding=60.0,
+             distribution='exponential', pareto_shape=1.5, replications=1000, arrivals=2000,
+             warmup=200, seed=1):
+    """
+    Run independent replications of the flow-level CAC model
+    offered_load: total offered load in Erlangs (arrival rate x mean holding time)
+    airtimes: airtime fraction of each traffic type
+    mix: relative arrival share of each type
+    policy: 'hard' (one threshold), 'soft' (per-type thresholds) or 'ascac'
+            (soft with the bursty threshold adapted by adapt_step per request)
+    Statistics cover the arrivals after the first `warmup`. Utilization is the
+    airtime in use seen by arrivals, which for Poisson arrivals is the time average.
+    Returns {'blocking': (replications, types), 'overall_blocking': (replications,),
+             'utilization': (replications,)}
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy}")
+    airtimes = np.asarray(airtimes, dtype=float)
+    shares = np.asarray(mix, dtype=float) / np.sum(mix)
+    n_types = len(airtimes)
+
+    if policy == 'hard':
+        limits = np.full(n_types, threshold)
+    else:
+        limits = np.asarray(soft_thresholds, dtype=float)
+
+    rng = np.random.default_rng(seed)
+    rate = offered_load / mean_holding
+    arrival_times = np.cumsum(rng.exponential(1 / rate, (replications, arrivals)), axis=1)
+    types = rng.choice(n_types, size=(replications, arrivals), p=shares)
+    durations = holding_times(rng, mean_holding, (replications, arrivals), distribution, pareto_shape)
+
+    # Admitted flows occupy slots; a slot is free once its end time has passed
+    slots = int(np.ceil(max(limits.max(), 1.0) / airtimes.min())) + 1
+    end_times = np.zeros((replications, slots))
+    slot_airtime = np.zeros((replications, slots))
+    bursty_threshold = np.full(replications, limits[BURSTY] if BURSTY < n_types else 0.0)
+
+    offered = np.zeros((replications, n_types))
+    blocked = np.zeros((replications, n_types))
+    utilization_sum = np.zeros(replications)
+    rows = np.arange(replications)
+
+    for i in range(arrivals):
+        now = arrival_times[:, i]
+        active = end_times > now[:, np.newaxis]
+        utilization = (slot_airtime * active).sum(axis=1)
+        traffic_type = types[:, i]
+        required = airtimes[traffic_type]
+
+        limit = limits[traffic_type]
+        if policy == 'ascac':
+            bursty_threshold = adapt_bursty_threshold(bursty_threshold, utilization, adapt_step)
+            limit = np.where(traffic_type == BURSTY, bursty_threshold, limit)
+        admit = utilization + required <= limit
+
+        free = np.argmin(active, axis=1)
+        admitted_rows = rows[admit]
+        end_times[admitted_rows, free[admit]] = now[admit] + durations[admit, i]
+        slot_airtime[admitted_rows, free[admit]] = required[admit]
+
+        if i >= warmup:
+            offered[rows, traffic_type] += 1
+            blocked[rows, traffic_type] += ~admit
+            utilization_sum += utilization
+
+    with np.errstate(invalid='ignore'):
+        blocking = blocked / offered
+    return {
+        'blocking': blocking,
+        'overall_blocking': blocked.sum(axis=1) / offered.sum(axis=1),
+        'utilization': utilization_sum / max(arrivals - warmup, 1),
+    }
+
+
+def carried_throughput(result, offered_load, mix=DEFAULT_MIX):
+    """
+    Mean carried traffic (Mbps) of each replication: by Little's law a type keeps
+    offered_load x share x (1 - blocking) flows active at its profile data rate
+    """
+    shares = np.asarray(mix, dtype=float) / np.sum(mix)
+    rates = np.array([FLOW_PROFILES[k][1] for k in range(len(shares))])
+    carried = offered_load * shares * (1 - np.nan_to_num(result['blocking']))
+    return (carried * rates).sum(axis=1) / 1e6
+
+
+def summarize(result, confidence=0.95):
+    """Mean and confidence interval over replications of each statistic"""
+    summary = {
+        'overall_blocking': mean_ci(result['overall_blocking'], confidence),
+        'utilization': mean_ci(result['utilization'], confidence),
+    }
+    for k, name in enumerate(TYPE_NAMES[:result['blocking'].shape[1]]):
+        values = result['blocking'][:, k]
+        summary[name] = mean_ci(values[~np.isnan(values)], confidence)
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Flow-level Monte Carlo simulation of the airtime CAC')
+    parser.add_argument('--policy', choices=POLICIES, default='hard')
+    parser.add_argument('--threshold', type=float, default=0.80, help='Threshold of the hard policy')
+    parser.add_argument('--loads', type=float, nargs='+', default=[5, 10, 15, 20, 25, 30],
+                        help='Total offered loads (Erlangs)')
+    parser.add_argument('--mix', type=float, nargs=4, default=DEFAULT_MIX, metavar=('VOIP', 'VIDEO', 'BURSTY', 'WEB'),
+                        help='Relative arrival share of each traffic type')
+    parser.add_argument('--holding', choices=['exponential', 'pareto'], default='exponential')
+    parser.add_argument('--mean-holding', type=float, default=60.0, help='Mean flow holding time (s)')
+    parser.add_argument('--pareto-shape', type=float, default=1.5)
+    parser.add_argument('--mcs', type=int, default=5, help='HE MCS of the airtime costs')
+    parser.add_argument('--channel-width', type=int, default=80, choices=[20, 40, 80, 160])
+    parser.add_argument('--airtime-table', help='Airtime table CSV exported by the simulation')
+    parser.add_argument('--replications', type=int, default=1000)
+    parser.add_argument('--arrivals', type=int, default=2000, help='Arrivals per replication')
+    parser.add_argument('--warmup', type=int, default=200, help='Arrivals discarded per replication')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--plot', help='Save per-type blocking vs load to this PNG file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.airtime_table:
+        airtimes = flow_airtimes(load_airtime_table(args.airtime_table), args.mcs)
+    else:
+        airtimes = flow_airtimes(mcs=args.mcs, channel_width=args.channel_width)
+
+    print("Airtime per flow: " + ", ".join(f"{name} {a:.4f}" for name, a in zip(TYPE_NAMES, airtimes)))
+    print(f"\n{'Load':>6} " + " ".join(f"{name:>16}" for name in TYPE_NAMES) + f" {'Utilization':>16}")
+
+    summaries = []
+    for load in args.loads:
+        result = simulate(load, airtimes, args.mix, args.policy, args.threshold,
+                          mean_holding=args.mean_holding, distribution=args.holding,
+                          pareto_shape=args.pareto_shape, replications=args.replications,
+                          arrivals=args.arrivals, warmup=args.warmup, seed=args.seed)
+        summary = summarize(result)
+        summaries.append(summary)
+        cells = [f"{summary[name][0]:7.2%} ±{(summary[name][2] - summary[name][1]) / 2:6.2%}"
+                 for name in TYPE_NAMES]
+        utilization = summary['utilization']
+        print(f"{load:>6g} " + " ".join(f"{cell:>16}" for cell in cells)
+              + f" {utilization[0]:>9.3f} ±{(utilization[2] - utilization[1]) / 2:.3f}")
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(10, 6))
+        for name in TYPE_NAMES:
+            means = np.array([summary[name][0] for summary in summaries]) * 100
+            lows = np.array([summary[name][1] for summary in summaries]) * 100
+            highs = np.array([summary[name][2] for summary in summaries]) * 100
+            plt.errorbar(args.loads, means, yerr=[means - lows, highs - means], marker='o',
+                         capsize=4, linewidth=2, label=name)
+        plt.title(f'Flow-Level CAC Simulation ({args.policy}, {args.replications} replications)')
+        plt.xlabel('Total Offered Load (Erlangs)')
+        plt.ylabel('Blocking Probability (%)')
+        plt.grid(True, linestyle='--', alpha=0.7)
+        plt.legend()
+        plt.savefig(args.plot, dpi=300)
+        print(f"Saved: {args.plot}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Multi-class (multi-rate) loss model of the per-type airtime CAC
+Airtime is discretized into units; class k requests b_k units, offers a_k Erlangs
+and is admitted while the occupied airtime plus its request stays within its own
+threshold T_k (trunk reservation, as in the soft CAC of wifi6-multi-ap.cc).
+The occupancy distribution follows the Kaufman-Roberts recursion
+    j q(j) = sum_k a_k b_k q(j - b_k) [j <= T_k]
+(exact without reservation, Roberts' approximation with it), evaluated for a
+whole batch of loads / thresholds at once.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+# Airtime discretization (fraction of channel time per unit)
+DEFAULT_UNIT = 0.001
+
+# Per-type thresholds of the soft CAC (SoftAirtimeAdmissionControl)
+SOFT_CAC_THRESHOLDS = {'VOIP': 0.90, 'VIDEO': 0.80, 'BURSTY': 0.95}
+
+# Rescale the unnormalized distribution before it overflows
+RESCALE_LIMIT = 1e200
+
+
+def kaufman_roberts(sizes, loads, thresholds):
+    """
+    Occupancy distribution and per-class blocking of the multi-rate loss model
+    sizes: units requested by each class, shape (K,)
+    loads: offered load (Erlangs) of each class, shape (..., K)
+    thresholds: admission limit (units) of each class, shape (..., K)
+    loads and thresholds broadcast against each other over the leading batch axes.
+    Returns (q, blocking): q has shape (..., C + 1) with C the largest threshold
+    (states above a batch entry's own largest threshold have probability 0) and
+    blocking has shape (..., K).
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    loads = np.asarray(loads, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=np.int64)
+    if np.any(sizes <= 0):
+        raise ValueError("Class sizes must be positive")
+    loads, thresholds = np.broadcast_arrays(loads, thresholds)
+    capacity = int(thresholds.max(initial=0))
+
+    q = np.zeros(loads.shape[:-1] + (capacity + 1,))
+    q[..., 0] = 1.0
+    rate = loads * sizes
+    for j in range(1, capacity + 1):
+        previous = j - sizes
+        allowed = (previous >= 0) & (j <= thresholds)
+        terms = rate * np.take(q, np.maximum(previous, 0), axis=-1) * allowed
+        q[..., j] = terms.sum(axis=-1) / j
+
+        # Keep the recursion finite; only ratios of q matter
+        scale = np.where(q[..., j] > RESCALE_LIMIT, q[..., j], 1.0)
+        if np.any(scale != 1.0):
+            q[..., :j + 1] /= scale[..., np.newaxis]
+
+    q /= q.sum(axis=-1, keepdims=True)
+
+    # Class k is blocked in the states j where j + b_k exceeds T_k
+    states = np.arange(capacity + 1)
+    blocked = states[..., np.newaxis] + sizes > thresholds[..., np.newaxis, :]
+    blocking = np.einsum('...j,...jk->...k', q, blocked)
+    return q, blocking
+
+
+def airtime_units(airtime, unit=DEFAULT_UNIT):
+    """Units requested by a flow of the given airtime (rounded up, at least 1)"""
+    units = np.ceil(np.asarray(airtime, dtype=float) / unit - 1e-9).astype(np.int64)
+    return np.maximum(units, 1)
+
+
+def threshold_units(threshold, unit=DEFAULT_UNIT):
+    """Admission limit in units of an airtime threshold (rounded down)"""
+    return np.floor(np.asarray(threshold, dtype=float) / unit + 1e-9).astype(np.int64)
+
+
+def class_blocking(mix, thresholds=SOFT_CAC_THRESHOLDS, unit=DEFAULT_UNIT):
+    """
+    Per-class blocking of a traffic mix
+    mix: {class name: (offered load in Erlangs, airtime per flow)}
+    thresholds: {class name: CAC airtime threshold}
+    Returns {class name: blocking probability}
+    """
+    names = list(mix)
+    sizes = airtime_units([mix[name][1] for name in names], unit)
+    loads = [mix[name][0] for name in names]
+    limits = threshold_units([thresholds[name] for name in names], unit)
+    _, blocking = kaufman_roberts(sizes, loads, limits)
+    return dict(zip(names, blocking.tolist()))
+
+
+def size_threshold(mix, traffic_class, target_blocking, thresholds=SOFT_CAC_THRESHOLDS,
+                   candidates=None, unit=DEFAULT_UNIT):
+    """
+    Smallest threshold of one class that keeps its blocking at or below the target,
+    the other thresholds held fixed; all candidates are evaluated in one batch
+    Returns (threshold, blocking of every class at that threshold), or
+    (None, blocking at the largest candidate) if no candidate meets the target
+    """
+    if candidates is None:
+        candidates = np.arange(0.50, 1.0 + unit / 2, 0.01)
+    candidates = np.asarray(candidates, dtype=float)
+
+    names = list(mix)
+    sizes = airtime_units([mix[name][1] for name in names], unit)
+    loads = [mix[name][0] for name in names]
+    limits = np.tile(threshold_units([thresholds[name] for name in names], unit), (len(candidates), 1))
+    limits[:, names.index(traffic_class)] = threshold_units(candidates, unit)
+
+    _, blocking = kaufman_roberts(sizes, loads, limits)
+    met = np.flatnonzero(blocking[:, names.index(traffic_class)] <= target_blocking)
+    index = met[0] if len(met) else len(candidates) - 1
+    result = dict(zip(names, blocking[index].tolist()))
+    return (float(candidates[index]) if len(met) else None), result
+
+
+def flow_airtime(packet_size, data_rate, link_rate=100e6, overhead=100e-6, margin=1.1):
+    """Airtime of a flow as estimated by SoftAirtimeAdmissionControl (fixed link rate)"""
+    packets_per_second = data_rate / (packet_size * 8.0)
+    return packets_per_second * (packet_size * 8.0 / link_rate + overhead) * margin
+
+
+def main():
+    # Per-flow airtime of the wifi6-multi-ap traffic types
+    airtimes = {
+        'VOIP': flow_airtime(160, 64e3),
+        'VIDEO': flow_airtime(1400, 3e6),
+        'BURSTY': flow_airtime(1400, 5e6),
+    }
+    # Offered load split 40/30/30 across types, in total Erlangs
+    shares = {'VOIP': 0.4, 'VIDEO': 0.3, 'BURSTY': 0.3}
+    total_loads = np.arange(1, 61)
+
+    names = list(airtimes)
+    sizes = airtime_units([airtimes[name] for name in names])
+    loads = np.outer(total_loads, [shares[name] for name in names])
+    limits = threshold_units([SOFT_CAC_THRESHOLDS[name] for name in names])
+    _, blocking = kaufman_roberts(sizes, loads, limits)
+
+    plt.figure(figsize=(10, 6))
+    colors = {'VOIP': '#2ecc71', 'VIDEO': '#3498db', 'BURSTY': '#e67e22'}
+    for k, name in enumerate(names):
+        plt.plot(total_loads, blocking[:, k] * 100, linewidth=2.5, color=colors[name],
+                 label=f"{name} (airtime {airtimes[name]:.3f}, threshold {SOFT_CAC_THRESHOLDS[name]:.2f})")
+    plt.title('Multi-Class Loss Model: Per-Type Blocking (Kaufman-Roberts, Trunk Reservation)')
+    plt.xlabel('Total Offered Load (Erlangs)')
+    plt.ylabel('Blocking Probability (%)')
+    plt.grid(True, linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.savefig('graphs/multirate_model_blocking.png', dpi=300)
+    print("Multi-class model graph saved to graphs/multirate_model_blocking.png")
+
+    mix = {name: (15 * shares[name], airtimes[name]) for name in names}
+    print("\n=== Per-Type Blocking at 15 Erlangs ===")
+    for name, value in class_blocking(mix).items():
+        print(f"{name:<8} {value:.2%}")
+    threshold, result = size_threshold(mix, 'VIDEO', 0.05)
+    if threshold is None:
+        print("No VIDEO threshold up to 1.00 keeps VIDEO blocking within 5%")
+    else:
+        print(f"VIDEO threshold for 5% VIDEO blocking: {threshold:.2f} "
+              f"(VOIP {result['VOIP']:.2%}, BURSTY {result['BURSTY']:.2%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Bayesian optimization of the soft / AS-CAC+ thresholds
+Searches (voipThreshold, videoThreshold, burstyThreshold, adaptStep) for the
+highest throughput subject to VoIP blocking and delay limits. Each iteration
+fits Gaussian processes to the points evaluated so far and picks a batch of
+points by constrained expected improvement. The batch is then evaluated in
+parallel, either by wifi6-multi-ap through the sweep runner (results cached)
+or by the flow-level model of flow_sim.py.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import optimize, stats
+from scipy.stats import qmc
+
+from flow_sim import carried_throughput, flow_airtimes, simulate
+from result_cache import ResultCache
+from sim_metrics import MULTI_AP_METRICS, read_metrics
+from sweep import NS3_DIR, run_sweep
+
+DEFAULT_BINARY = os.path.join(NS3_DIR, 'build', 'scratch', 'ns3-dev-wifi6-multi-ap-default')
+
+# Search space: parameter -> (low, high, rounding step)
+# Values are rounded so that nearby suggestions reuse cached runs
+SPACE = {
+    'voipThreshold': (0.70, 0.98, 0.01),
+    'videoThreshold': (0.50, 0.95, 0.01),
+    'burstyThreshold': (0.70, 0.98, 0.01),
+    'adaptStep': (0.0, 0.05, 0.005),
+}
+
+# Candidates scored per batch point when maximizing the acquisition
+CANDIDATES = 4096
+
+
+def to_unit(points):
+    """Parameter dicts -> array in [0, 1]^d"""
+    bounds = np.array([SPACE[name][:2] for name in SPACE])
+    values = np.array([[point[name] for name in SPACE] for point in points], dtype=float)
+    return (values - bounds[:, 0]) / (bounds[:, 1] - bounds[:, 0])
+
+
+def from_unit(x):
+    """Array in [0, 1]^d -> rounded parameter dicts"""
+    points = []
+    for row in np.atleast_2d(x):
+        point = {}
+        for value, (name, (low, high, step)) in zip(row, SPACE.items()):
+            value = low + float(np.clip(value, 0, 1)) * (high - low)
+            point[name] = round(round(value / step) * step, 6)
+        points.append(point)
+    return points
+
+
+def point_id(point):
+    """Job id of a parameter point"""
+    return (f"v{point['voipThreshold']:g}-vi{point['videoThreshold']:g}"
+            f"-b{point['burstyThreshold']:g}-s{point['adaptStep']:g}")
+
+
+class GaussianProcess:
+    """GP regression with an ARD Matern-5/2 kernel on standardized targets"""
+
+    def __init__(self):
+        self.log_params = None
+
+    @staticmethod
+    def _kernel(a, b, length_scales, variance):
+        d = np.sqrt((((a[:, np.newaxis, :] - b[np.newaxis, :, :]) / length_scales) ** 2).sum(axis=-1))
+        r = math.sqrt(5) * d
+        return variance * (1 + r + r * r / 3) * np.exp(-r)
+
+    def _factor(self, log_params):
+        dims = self.x.shape[1]
+        length_scales = np.exp(log_params[:dims])
+        variance, noise = np.exp(log_params[dims:])
+        k = self._kernel(self.x, self.x, length_scales, variance) + (noise + 1e-8) * np.eye(len(self.x))
+        return np.linalg.cholesky(k)
+
+    def _neg_log_likelihood(self, log_params):
+        try:
+            chol = self._factor(log_params)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, self.y))
+        return 0.5 * self.y @ alpha + np.log(np.diag(chol)).sum()
+
+    def fit(self, x, y, optimize_params=True):
+        """Fit to inputs x (n, d) and targets y (n,); hyperparameters by maximum likelihood"""
+        self.x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.y_mean = y.mean()
+        self.y_std = y.std() if y.std() > 0 else 1.0
+        self.y = (y - self.y_mean) / self.y_std
+
+        dims = self.x.shape[1]
+        if optimize_params or self.log_params is None:
+            bounds = [(math.log(0.05), math.log(5.0))] * dims + [(math.log(0.05), math.log(20.0)),
+                                                                 (math.log(1e-6), math.log(1.0))]
+            best = None
+            for start in ([math.log(0.3)] * dims + [0.0, math.log(0.01)],
+                          [math.log(1.0)] * dims + [0.0, math.log(0.1)]):
+                result = optimize.minimize(self._neg_log_likelihood, start, method='L-BFGS-B', bounds=bounds)
+                if best is None or result.fun < best.fun:
+                    best = result
+            self.log_params = best.x
+
+        self.chol = self._factor(self.log_params)
+        self.alpha = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, self.y))
+        return self
+
+    def predict(self, x):
+        """Posterior mean and standard deviation at x (m, d), in target units"""
+        dims = self.x.shape[1]
+        length_scales = np.exp(self.log_params[:dims])
+        variance = np.exp(self.log_params[dims])
+        k = self._kernel(np.asarray(x, dtype=float), self.x, length_scales, variance)
+        mean = k @ self.alpha
+        v = np.linalg.solve(self.chol, k.T)
+        std = np.sqrt(np.maximum(variance - (v * v).sum(axis=0), 1e-12))
+        return self.y_mean + mean * self.y_std, std * self.y_std
+
+
+def expected_improvement(mean, std, best):
+    """EI of maximizing over the incumbent `best`"""
+    z = (mean - best) / std
+    return (mean - best) * stats.norm.cdf(z) + std * stats.norm.pdf(z)
+
+
+def feasible(metrics, limits):
+    """True if every constrained metric that was measured is within its limit"""
+    return all(metrics.get(name) is None or metrics[name] <= limit for name, limit in limits.items())
+
+
+def suggest_batch(history, limits, batch_size, rng):
+    """
+    Next points to evaluate: constrained EI (EI x P(all constraints met)) over random
+    candidates, with a kriging-believer update of the throughput GP between picks
+    """
+    x = to_unit([entry['point'] for entry in history])
+    throughput = np.array([entry['metrics']['throughput'] for entry in history])
+    objective = GaussianProcess().fit(x, throughput)
+
+    constraint_models = []
+    for name, limit in limits.items():
+        values = [entry['metrics'].get(name) for entry in history]
+        if all(value is not None for value in values):
+            constraint_models.append((GaussianProcess().fit(x, values), limit))
+
+    feasible_values = [entry['metrics']['throughput'] for entry in history if feasible(entry['metrics'], limits)]
+    seen = {point_id(entry['point']) for entry in history}
+    candidates = rng.random((CANDIDATES, len(SPACE)))
+
+    probability = np.ones(len(candidates))
+    for model, limit in constraint_models:
+        mean, std = model.predict(candidates)
+        probability *= stats.norm.cdf((limit - mean) / std)
+
+    batch = []
+    for _ in range(batch_size):
+        mean, std = objective.predict(candidates)
+        if feasible_values:
+            score = expected_improvement(mean, std, max(feasible_values)) * probability
+        else:
+            score = probability  # Find a feasible region first
+        for index in np.argsort(score)[::-1]:
+            point = from_unit(candidates[index])[0]
+            if point_id(point) not in seen:
+                break
+        seen.add(point_id(point))
+        batch.append(point)
+
+        # Believe the predicted throughput at the picked point
+        x = np.vstack([x, to_unit([point])])
+        throughput = np.append(throughput, objective.predict(to_unit([point]))[0])
+        objective.fit(x, throughput, optimize_params=False)
+    return batch
+
+
+def evaluate_surrogate(point, offered_load, replications, arrivals, seed):
+    """Throughput and VoIP blocking of a point from the flow-level model (no delay)"""
+    result = simulate(offered_load, flow_airtimes(), policy='ascac',
+                      soft_thresholds=[point['voipThreshold'], point['videoThreshold'],
+                                       point['burstyThreshold'], 0.80],
+                      adapt_step=point['adaptStep'], replications=replications, arrivals=arrivals,
+                      seed=seed)
+    return {
+        'throughput': float(carried_throughput(result, offered_load).mean()),
+        'voip_blocking': float(np.nanmean(result['blocking'][:, 0])),
+        'voip_delay': None,
+    }
+
+
+class SurrogateBackend:
+    """Evaluates points with flow_sim.py, one process per point of a batch"""
+
+    def __init__(self, offered_load=20.0, replications=200, arrivals=1500, seed=1, workers=None):
+        self.args = (offered_load, replications, arrivals, seed)
+        self.workers = workers
+
+    def evaluate(self, points):
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(evaluate_surrogate, points, *[[arg] * len(points) for arg in self.args]))
+
+
+class Ns3Backend:
+    """Evaluates points with wifi6-multi-ap jobs run (and cached) by the sweep runner"""
+
+    def __init__(self, binary, output_dir, runs=1, base_params=None, extra_args=(), workers=None,
+                 cache=None):
+        self.binary = binary
+        self.output_dir = output_dir
+        self.runs = runs
+        self.base_params = base_params or {}
+        self.extra_args = list(extra_args)
+        self.workers = workers
+        self.cache = cache
+        self.entries = []
+
+    def evaluate(self, points):
+        jobs = [{
+            'id': f"{point_id(point)}-run{run}",
+            'point': point_id(point),
+            'params': dict(self.base_params, **point, RngRun=run),
+            'prefix': None,
+            'extra_args': self.extra_args,
+        } for point in points for run in range(1, self.runs + 1)]
+        entries = run_sweep(jobs, self.output_dir, self.binary, self.workers, self.cache,
+                            previous=self.entries)
+        self.entries += entries
+
+        records = {point_id(point): [] for point in points}
+        for entry in entries:
+            if entry['status'] == 'ok':
+                run_records = read_metrics(os.path.join(entry['directory'], MULTI_AP_METRICS))
+                if run_records:
+                    records[entry['point']].append(run_records[-1])
+
+        results = []
+        for point in points:
+            runs = records[point_id(point)]
+            if not runs:
+                results.append(None)
+                continue
+            delays = [run['voip_delay'] for run in runs if run.get('voip_delay') is not None]
+            results.append({
+                'throughput': float(np.mean([run['throughput'] for run in runs])),
+                'voip_blocking': float(np.mean([1 - run['voip_admitted'] / run['voip_requests']
+                                                if run['voip_requests'] else 0.0 for run in runs])),
+                'voip_delay': float(np.mean(delays)) if delays else None,
+            })
+        return results
+
+
+def optimize_thresholds(backend, limits, iterations=10, batch_size=4, initial=8, seed=1,
+                        history_file=None):
+    """
+    Run the optimization; returns the evaluated entries ({'point', 'metrics'}) in order
+    Failed evaluations are reported and left out of the model
+    """
+    rng = np.random.default_rng(seed)
+    history = []
+
+    def record(points):
+        for point, metrics in zip(points, backend.evaluate(points)):
+            if metrics is None:
+                print(f"  {point_id(point)}: failed")
+                continue
+            history.append({'point': point, 'metrics': metrics})
+            mark = '✓' if feasible(metrics, limits) else '✗'
+            delay = '-' if metrics['voip_delay'] is None else f"{metrics['voip_delay']:.2f} ms"
+            print(f"  {mark} {point_id(point):<32} throughput {metrics['throughput']:8.3f} Mbps  "
+                  f"VoIP blocking {metrics['voip_blocking']:6.2%}  VoIP delay {delay}")
+        if history_file:
+            with open(history_file, 'w') as f:
+                json.dump(history, f, indent=2)
+
+    print(f"Initial design: {initial} points")
+    record(from_unit(qmc.LatinHypercube(d=len(SPACE), seed=seed).random(initial)))
+
+    for iteration in range(1, iterations + 1):
+        if len(history) < 2:
+            print("Too few successful evaluations to fit a model")
+            break
+        print(f"Iteration {iteration}/{iterations}")
+        record(suggest_batch(history, limits, batch_size, rng))
+
+    return history
+
+
+def best_entry(history, limits):
+    """Highest-throughput feasible entry, or None"""
+    candidates = [entry for entry in history if feasible(entry['metrics'], limits)]
+    return max(candidates, key=lambda entry: entry['metrics']['throughput']) if candidates else None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Bayesian optimization of the soft CAC thresholds')
+    parser.add_argument('--backend', choices=['surrogate', 'ns3'], default='surrogate')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Points evaluated in parallel per iteration (default: CPU count, at least 2)')
+    parser.add_argument('--initial', type=int, default=8, help='Latin hypercube points before the model')
+    parser.add_argument('--max-voip-blocking', type=float, default=0.01)
+    parser.add_argument('--max-voip-delay', type=float, default=50.0, help='Mean VoIP delay limit (ms)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output-dir', default='results/optimize')
+    parser.add_argument('--jobs', type=int, default=None, help='Concurrent evaluations (default: CPU count)')
+    # ns-3 backend
+    parser.add_argument('--binary', default=DEFAULT_BINARY)
+    parser.add_argument('--stations-per-ap', type=int, default=20)
+    parser.add_argument('--runs', type=int, default=1, help='Seeds per point (ns-3 backend)')
+    parser.add_argument('--cache-dir', default='results/cache')
+    parser.add_argument('--no-cache', action='store_true')
+    # Surrogate backend
+    parser.add_argument('--load', type=float, default=20.0, help='Offered load in Erlangs (surrogate)')
+    parser.add_argument('--replications', type=int, default=200, help='Replications per point (surrogate)')
+    parser.add_argument('extra', nargs=argparse.REMAINDER, help='Extra simulation arguments after "--"')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+    batch_size = args.batch_size or max(2, args.jobs or os.cpu_count() or 1)
+    limits = {'voip_blocking': args.max_voip_blocking, 'voip_delay': args.max_voip_delay}
+
+    if args.backend == 'ns3':
+        cache = None if args.no_cache else ResultCache(args.cache_dir)
+        backend = Ns3Backend(os.path.abspath(args.binary), args.output_dir, args.runs,
+                             {'nStationsPerAp': args.stations_per_ap},
+                             [a for a in args.extra if a != '--'], args.jobs, cache)
+    else:
+        backend = SurrogateBackend(args.load, args.replications, seed=args.seed, workers=args.jobs)
+        print("Surrogate backend: the VoIP delay limit is not evaluated")
+
+    history = optimize_thresholds(backend, limits, args.iterations, batch_size, args.initial, args.seed,
+                                  os.path.join(args.output_dir, 'history.json'))
+
+    best = best_entry(history, limits)
+    if best is None:
+        print("\nNo evaluated point met the constraints")
+        return 1
+    print(f"\nBest feasible point after {len(history)} evaluations:")
+    print("  " + " ".join(f"--{name}={value:g}" for name, value in best['point'].items()))
+    print(f"  throughput {best['metrics']['throughput']:.3f} Mbps, "
+          f"VoIP blocking {best['metrics']['voip_blocking']:.2%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
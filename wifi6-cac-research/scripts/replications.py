@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Statistics across independent replications (RNG runs) of a scenario
+Confidence intervals of per-run metrics, grouping of sweep results by parameter
+set and a sequential stopping rule that decides when enough runs were made
+"""
+
+import csv
+import math
+import os
+import re
+
+import numpy as np
+from scipy import stats
+
+from trace_reader import read_trace_columns
+
+# Sweep job directories end in -run<RngRun>
+RUN_SUFFIX = re.compile(r'-run\d+$')
+
+
+def mean_ci(values, confidence=0.95, method='t', n_boot=2000, seed=1):
+    """
+    Mean and confidence interval of per-run values
+    method 't' uses the Student-t interval, 'bootstrap' the percentile bootstrap
+    Returns (mean, low, high); the bounds are NaN with fewer than two runs
+    """
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean()) if len(values) else math.nan
+    if len(values) < 2:
+        return mean, math.nan, math.nan
+
+    if method == 'bootstrap':
+        rng = np.random.default_rng(seed)
+        means = rng.choice(values, size=(n_boot, len(values)), replace=True).mean(axis=1)
+        alpha = (1 - confidence) / 2
+        low, high = np.quantile(means, [alpha, 1 - alpha])
+        return mean, float(low), float(high)
+
+    half_width = stats.t.ppf((1 + confidence) / 2, len(values) - 1) * values.std(ddof=1) / math.sqrt(len(values))
+    return mean, mean - half_width, mean + half_width
+
+
+def error_bar(values, confidence=0.95, method='t'):
+    """(mean, [[lower error], [upper error]]) for matplotlib yerr; zero error for a single run"""
+    mean, low, high = mean_ci(values, confidence, method)
+    if math.isnan(low):
+        return mean, [[0.0], [0.0]]
+    return mean, [[mean - low], [high - mean]]
+
+
+def scenario_key(prefix):
+    """
+    Parameter-set key of a result prefix
+    Prefixes in sweep job directories (<dir>/<job>-run<N>/<prefix>) share the key of
+    their other runs; any other prefix is its own scenario
+    """
+    job_dir, name = os.path.split(os.path.normpath(prefix))
+    parent, job = os.path.split(job_dir)
+    if RUN_SUFFIX.search(job):
+        return os.path.join(parent, RUN_SUFFIX.sub('', job), name)
+    return prefix
+
+
+def group_by_scenario(items, key=lambda item: item):
+    """Group items by scenario_key of key(item), keeping first-seen order"""
+    groups = {}
+    for item in items:
+        groups.setdefault(scenario_key(key(item)), []).append(item)
+    return groups
+
+
+def enough_runs(values, precision=0.05, confidence=0.95, min_runs=3):
+    """
+    Sequential stopping rule: True once at least min_runs values were collected and
+    the confidence interval half-width is within `precision` (relative) of the mean
+    """
+    if len(values) < min_runs:
+        return False
+    mean, low, high = mean_ci(values, confidence)
+    if mean == 0:
+        return high - low == 0
+    return (high - low) / 2 <= precision * abs(mean)
+
+
+def runs_needed(values, precision=0.05, confidence=0.95, min_runs=3):
+    """
+    Estimated total runs for the half-width to reach `precision`, assuming the
+    sample variance holds (n * (current half-width / target)^2)
+    """
+    if len(values) < min_runs:
+        return min_runs
+    if enough_runs(values, precision, confidence, min_runs):
+        return len(values)
+    mean, low, high = mean_ci(values, confidence)
+    target = precision * abs(mean)
+    if target == 0:
+        return len(values) + 1
+    return max(len(values) + 1, math.ceil(len(values) * ((high - low) / 2 / target) ** 2))
+
+
+def read_run_metric(prefix, metric):
+    """
+    Per-run metric read directly from a run's output files
+    'throughput': aggregate FlowMonitor throughput (Mbps)
+    'blocking': fraction of flow requests rejected
+    Returns None if the file is missing
+    """
+    if metric == 'throughput':
+        filename = f"{prefix}-flowmon.csv"
+        if not os.path.exists(filename):
+            return None
+        with open(filename) as f:
+            return sum(float(row['Throughput']) for row in csv.DictReader(f))
+
+    if metric == 'blocking':
+        if os.path.exists(f"{prefix}-admission.bin"):
+            admitted = read_trace_columns(f"{prefix}-admission.bin", ['Admitted'])['Admitted'][0]
+        elif os.path.exists(f"{prefix}-admission.csv"):
+            with open(f"{prefix}-admission.csv") as f:
+                admitted = [int(row['Admitted']) for row in csv.DictReader(f)]
+        else:
+            return None
+        return (len(admitted) - int(np.sum(admitted))) / len(admitted) if len(admitted) else 0.0
+
+    raise ValueError(f"Unknown metric {metric}")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of simulation results
+A run is keyed by the hash of the simulation binary, its parameters (including
+the RngRun seed) and the CAC source; its output directory is stored under
+<cache root>/<key[:2]>/<key>
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..', 'src'))
+
+# Sources whose edits invalidate cached results even if the binary was not rebuilt
+CAC_SOURCES = [
+    os.path.join(SRC_DIR, 'wifi6-cac-airtime.cc'),
+    os.path.join(SRC_DIR, 'wifi6-cac-airtime.h'),
+]
+
+KEY_FILE = 'cache-key.json'
+
+_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file, memoized on (path, size, mtime)"""
+    stat = os.stat(path)
+    memo = (path, stat.st_size, stat.st_mtime_ns)
+    if memo not in _digests:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _digests[memo] = digest.hexdigest()
+    return _digests[memo]
+
+
+def source_digest(paths=CAC_SOURCES):
+    """Combined digest of the CAC sources (missing files hash as empty)"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_digest(path).encode() if os.path.exists(path) else b'-')
+    return digest.hexdigest()
+
+
+def job_inputs(binary, params, extra_args=()):
+    """Everything that determines a run's output"""
+    return {
+        'binary': file_digest(binary) if os.path.exists(binary) else None,
+        'source': source_digest(),
+        'params': params,
+        'extra_args': list(extra_args),
+    }
+
+
+def job_key(inputs):
+    """Cache key of a run"""
+    canonical = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """Directory store of completed runs"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        """Directory of a cached run"""
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, key):
+        """Directory of the run if it is cached, else None"""
+        path = self.path(key)
+        return path if os.path.exists(os.path.join(path, KEY_FILE)) else None
+
+    def staging_dir(self, key):
+        """
+        Fresh directory to run a job in before it is committed
+        Unique even between jobs of the same key running on threads of one process
+        """
+        parent = os.path.dirname(self.path(key))
+        os.makedirs(parent, exist_ok=True)
+        return tempfile.mkdtemp(dir=parent, prefix=f"{key}.tmp-")
+
+    def commit(self, key, staging, inputs):
+        """Move a finished run into the cache; returns its directory"""
+        with open(os.path.join(staging, KEY_FILE), 'w') as f:
+            json.dump(dict(inputs, key=key), f, indent=2, sort_keys=True)
+        path = self.path(key)
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(staging, path)
+        except OSError:
+            # A concurrent job of the same key committed in between; keep its result
+            if self.lookup(key) is None:
+                raise
+            shutil.rmtree(staging, ignore_errors=True)
+        return path
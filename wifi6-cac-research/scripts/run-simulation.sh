@@ -12,6 +12,14 @@ cd ../../ns-3 || exit 1
 echo "Copying source files to NS-3 scratch directory..."
 cp ../wifi6-cac-research/src/wifi6-cac-airtime.h scratch/
 cp ../wifi6-cac-research/src/wifi6-cac-airtime.cc scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-airtime-provider.h scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-airtime-provider.cc scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-delay-stats.h scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-delay-stats.cc scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-trace-sink.h scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-trace-sink.cc scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-metrics.h scratch/
+cp ../wifi6-cac-research/src/wifi6-cac-metrics.cc scratch/
 cp ../wifi6-cac-research/src/wifi6-cac-simulation.cc scratch/
 
 # Build the simulation
@@ -29,39 +37,16 @@ echo "========================================"
 echo "Running simulations with different client counts..."
 echo "========================================"
 
-# Create results directory
-mkdir -p ../wifi6-cac-research/results
-cd ../wifi6-cac-research/results || exit 1
-
 # Run simulations for different client counts (25, 30, 35, 40, 45, 50)
-for nStations in 25 30 35 40 45 50; do
-    echo ""
-    echo "Running simulation with $nStations clients..."
-    
-    # Calculate flows based on station count
-    nVoip=$((nStations * 40 / 100))    # 40% VoIP
-    nVideo=$((nStations * 30 / 100))   # 30% Video
-    nBursty=$((nStations * 20 / 100))  # 20% Bursty
-    nWeb=$((nStations * 10 / 100))     # 10% Web
-    
-    ../../ns-3/build/scratch/ns3-dev-wifi6-cac-simulation-default \
-        --nStations=$nStations \
-        --nVoipFlows=$nVoip \
-        --nVideoFlows=$nVideo \
-        --nBurstyFlows=$nBursty \
-        --nWebFlows=$nWeb \
-        --simTime=60 \
-        --threshold=0.80 \
-        --enableCac=1 \
-        --channelWidth=80 \
-        --outputPrefix=wifi6-cac-$nStations
-    
-    if [ $? -eq 0 ]; then
-        echo "✓ Simulation with $nStations clients completed successfully"
-    else
-        echo "✗ Simulation with $nStations clients failed"
-    fi
-done
+# in parallel, one job directory per run under results/sweep
+cd ../wifi6-cac-research || exit 1
+python3 scripts/sweep.py \
+    --stations 25 30 35 40 45 50 \
+    --thresholds 0.80 \
+    --channel-widths 80 \
+    --enable-cac 1 \
+    --sim-time 60 \
+    --output-dir results/sweep
 
 echo ""
 echo "========================================"
@@ -70,10 +55,8 @@ echo "========================================"
 echo ""
 echo "Analyzing results..."
 
-# Run analysis script
-cd ..
-python3 scripts/analyze-results.py results/wifi6-cac-25 results/wifi6-cac-30 results/wifi6-cac-35 \
-                           results/wifi6-cac-40 results/wifi6-cac-45 results/wifi6-cac-50
+# Run analysis script on every successful job
+python3 scripts/analyze-results.py $(python3 scripts/sweep.py --print-prefixes --output-dir results/sweep)
 
 echo ""
 echo "========================================"
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Saturation capacity of the 802.11ax channel and the airtime thresholds it allows
+Uses the batched Bianchi model of ns-3 (src/wifi/examples/reference/bianchi11ax.py).
+With n saturated stations only the success_airtime share of the channel carries
+successful exchanges (the rest is idle backoff and collisions), so admitting more
+airtime than that share cannot be served; thresholds are capped at it.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from sweep import NS3_DIR
+
+sys.path.insert(0, os.path.join(NS3_DIR, 'src', 'wifi', 'examples', 'reference'))
+from bianchi11ax import ack_rates, bianchi_ax_batch, data_rates  # noqa: E402
+
+
+def he_rates(mcs, channel_width=80, nss=1):
+    """Data and ACK rates (bps) of HE MCS / channel width from the ns-3 reference tables (800 ns GI)"""
+    mcs = np.asarray(mcs)
+    data_rate = np.asarray(data_rates[channel_width])[mcs] * nss
+    ack_rate = np.asarray(ack_rates[channel_width])[mcs]
+    return data_rate, ack_rate
+
+
+def saturation(n_stations, mcs=5, channel_width=80, nss=1, aggregation=1, difs=1):
+    """
+    Bianchi saturation results for a grid of configurations
+    n_stations, mcs, nss and aggregation (A-MPDU size) may be arrays and broadcast
+    Returns the dict of bianchi_ax_batch (throughput in Mbps, collision_probability,
+    tau, success_airtime)
+    """
+    data_rate, ack_rate = he_rates(mcs, channel_width, nss)
+    return bianchi_ax_batch(n_stations, data_rate, ack_rate, aggregation, difs)
+
+
+def max_admissible_threshold(n_stations, **config):
+    """Largest airtime threshold the channel can serve with n_stations contending"""
+    return saturation(n_stations, **config)['success_airtime']
+
+
+def cap_thresholds(thresholds, n_stations, **config):
+    """CAC thresholds ({name: threshold}) capped at the saturation airtime share"""
+    cap = float(max_admissible_threshold(n_stations, **config))
+    return {name: min(threshold, cap) for name, threshold in thresholds.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Saturation capacity and airtime threshold caps (Bianchi)')
+    parser.add_argument('--stations', type=int, nargs='+', default=[5, 10, 20, 30, 40, 50])
+    parser.add_argument('--mcs', type=int, nargs='+', default=[0, 5, 11])
+    parser.add_argument('--channel-width', type=int, default=80, choices=[20, 40, 80, 160])
+    parser.add_argument('--nss', type=int, default=1)
+    parser.add_argument('--aggregation', type=int, default=1, help='A-MPDU size (1 disables aggregation)')
+    args = parser.parse_args(argv)
+
+    stations = np.array(args.stations)
+    result = saturation(stations, np.array(args.mcs)[:, np.newaxis], args.channel_width, args.nss,
+                        args.aggregation)
+
+    print(f"{'MCS':>4} {'Stations':>9} {'Throughput':>12} {'Collision':>10} {'Max threshold':>14}")
+    for i, mcs in enumerate(args.mcs):
+        for j, n in enumerate(stations):
+            print(f"{mcs:>4} {n:>9} {result['throughput'][i, j]:>7.1f} Mbps "
+                  f"{result['collision_probability'][i, j]:>10.3f} {result['success_airtime'][i, j]:>14.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Reader for the per-run metrics records of the multi-AP and demo simulators
+Each run appends one JSON object per line (MetricsRecord, src/wifi6-cac-metrics.h)
+to wifi6-multi-ap-metrics.jsonl or wifi6-cac-demo-metrics.jsonl
+"""
+
+import glob
+import json
+import os
+
+from replications import error_bar
+
+MULTI_AP_METRICS = 'wifi6-multi-ap-metrics.jsonl'
+DEMO_METRICS = 'wifi6-cac-demo-metrics.jsonl'
+
+# Fields of a record that describe the simulated configuration rather than its results
+CONFIG_FIELDS = ('label', 'nStationsPerAp', 'useCci', 'usePhyAirtime', 'voipThreshold', 'videoThreshold',
+                 'burstyThreshold', 'adaptStep', 'nStations', 'enableCac', 'simTime')
+
+
+def read_metrics(filename):
+    """All records of a metrics file ([] if it does not exist); unreadable lines are skipped"""
+    if not os.path.exists(filename):
+        return []
+    records = []
+    with open(filename) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"Warning: skipping malformed record {filename}:{number}")
+    return records
+
+
+def run_config(record):
+    """Configuration fields of a record, as a hashable tuple"""
+    return tuple((name, record.get(name)) for name in CONFIG_FIELDS)
+
+
+def select_runs(records, **params):
+    """
+    Records whose fields equal all of params (e.g. label='soft-cac-cci')
+    The metrics files are only appended to, so re-running a scenario adds new records
+    after the old ones: only the last record of each configuration and rngRun is kept.
+    """
+    latest = {}
+    for record in records:
+        if all(record.get(name) == value for name, value in params.items()):
+            latest.pop((run_config(record), record.get('rngRun')), None)
+            latest[(run_config(record), record.get('rngRun'))] = record
+    return list(latest.values())
+
+
+def summarize_runs(runs, names, confidence=0.95):
+    """
+    Mean of each metric over the runs of a scenario (e.g. different RngRun seeds)
+    Error bars for matplotlib are kept in metrics['errors']
+    Raises ValueError if the runs do not share one configuration (select_runs the
+    differing fields to pick one)
+    """
+    configs = set(run_config(run) for run in runs)
+    if len(configs) > 1:
+        differing = [name for name in CONFIG_FIELDS if len(set(dict(config)[name] for config in configs)) > 1]
+        raise ValueError(f"Runs of {len(configs)} configurations differing in {', '.join(differing)}: "
+                         "select one of them with these fields")
+    metrics = {'runs': len(runs), 'errors': {}}
+    for name in names:
+        values = [run[name] for run in runs if run.get(name) is not None]
+        if values:
+            metrics[name], metrics['errors'][name] = error_bar(values, confidence)
+        else:
+            metrics[name] = 0.0
+    return metrics
+
+
+def load_scenario(label, names, parse_log_file, **config):
+    """
+    Mean metrics over the runs of a multi-AP scenario: the metrics records written by
+    wifi6-multi-ap --label=<label> or, for older runs, wifi6-multi-ap-<label>.log
+    and its replications (<name>-run<N>.log) read with parse_log_file.
+    Error bars are kept in metrics['errors']
+    config selects records by their other configuration fields (e.g. usePhyAirtime=True)
+    """
+    runs = select_runs(read_metrics(MULTI_AP_METRICS), label=label, **config)
+    filename = f"wifi6-multi-ap-{label}.log"
+    if not runs:
+        stem = os.path.splitext(filename)[0]
+        runs = [parse_log_file(name) for name in [filename] + sorted(glob.glob(f"{stem}-run*.log"))
+                if os.path.exists(name)]
+        runs = [run for run in runs if run['throughput'] > 0]
+    if not runs:
+        return parse_log_file(filename)
+    return summarize_runs(runs, names)
+
+
+def yerr(metrics_list, name, scale=1.0):
+    """Error bars of one metric across scenarios (zero where a scenario has a single run)"""
+    errors = [metrics.get('errors', {}).get(name, [[0.0], [0.0]]) for metrics in metrics_list]
+    return [[error[0][0] * scale for error in errors], [error[1][0] * scale for error in errors]]
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep for wifi6-cac-simulation
+Expands a grid of (nStations, threshold, channelWidth, enableCac, run) into jobs,
+runs them concurrently and records each job in <output-dir>/manifest.json.
+Results are kept in a content-addressed cache (result_cache.py) and jobs whose
+result is already cached are not run again. With --target-precision, seeds are
+added per grid point until the confidence interval of a metric is tight enough.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from replications import enough_runs, mean_ci, read_run_metric, runs_needed
+from result_cache import ResultCache, job_inputs, job_key
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+NS3_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, '..', '..', 'ns-3'))
+DEFAULT_BINARY = os.path.join(NS3_DIR, 'build', 'scratch', 'ns3-dev-wifi6-cac-simulation-default')
+
+MANIFEST = 'manifest.json'
+
+# Traffic mix as a percentage of the station count
+FLOW_MIX = {
+    'nVoipFlows': 40,
+    'nVideoFlows': 30,
+    'nBurstyFlows': 20,
+    'nWebFlows': 10,
+}
+
+
+def unique(values):
+    """Values in first-seen order without repeats (a value given twice is one grid point)"""
+    return list(dict.fromkeys(values))
+
+
+def grid_points(stations, thresholds, channel_widths, enable_cac, sim_time):
+    """Return one parameter set per grid point (without the RNG run)"""
+    points = []
+    for n, threshold, width, cac in itertools.product(unique(stations), unique(thresholds),
+                                                      unique(channel_widths), unique(enable_cac)):
+        params = {
+            'nStations': n,
+            'threshold': threshold,
+            'channelWidth': width,
+            'enableCac': cac,
+            'simTime': sim_time,
+        }
+        for name, share in FLOW_MIX.items():
+            params[name] = n * share // 100
+        points.append({
+            'id': f"n{n}-t{threshold:g}-w{width}-cac{cac}",
+            'params': params,
+            'prefix': f"wifi6-cac-{n}",
+        })
+    return points
+
+
+def point_job(point, run, extra_args=()):
+    """Job running one RNG run of a grid point"""
+    return {
+        'id': f"{point['id']}-run{run}",
+        'point': point['id'],
+        'params': dict(point['params'], RngRun=run),
+        'prefix': point['prefix'],
+        'extra_args': list(extra_args),
+    }
+
+
+def expand_grid(stations, thresholds, channel_widths, enable_cac, runs, sim_time, extra_args=()):
+    """Return one job description per grid point and run"""
+    return [point_job(point, run, extra_args)
+            for point in grid_points(stations, thresholds, channel_widths, enable_cac, sim_time)
+            for run in unique(runs)]
+
+
+def job_command(binary, job):
+    """Command line of a job (run inside the job directory); jobs without a prefix get no --outputPrefix"""
+    args = [binary] + [f"--{name}={value}" for name, value in job['params'].items()]
+    if job.get('prefix'):
+        args.append(f"--outputPrefix={job['prefix']}")
+    return args + job['extra_args']
+
+
+def clear_job_dir(output_dir, job_id):
+    """Remove <output-dir>/<job id> (link or directory); returns its path"""
+    path = os.path.join(output_dir, job_id)
+    if os.path.islink(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+    return path
+
+
+def link_job_dir(output_dir, job_id, target):
+    """Point <output-dir>/<job id> at a cached result directory"""
+    link = clear_job_dir(output_dir, job_id)
+    os.symlink(os.path.relpath(target, output_dir), link)
+    return link
+
+
+def run_job(binary, output_dir, job, cache=None, refresh=False):
+    """
+    Run one simulation; stdout/stderr go to <job dir>/job.log
+    With a cache, a cached result is reused unless refresh is set, and a
+    successful run is stored in the cache and linked from <output-dir>/<job id>
+    """
+    command = job_command(binary, job)
+    key = None
+    if cache is None:
+        job_dir = os.path.join(output_dir, job['id'])
+        os.makedirs(job_dir, exist_ok=True)
+    else:
+        inputs = job_inputs(binary, job['params'], job['extra_args'])
+        key = job_key(inputs)
+        cached = cache.lookup(key)
+        if cached and not refresh:
+            return dict(job, command=command, key=key, cached=True,
+                        directory=link_job_dir(output_dir, job['id'], cached),
+                        returncode=0, status='ok', elapsed=0.0)
+        job_dir = cache.staging_dir(key)
+
+    start = time.time()
+    with open(os.path.join(job_dir, 'job.log'), 'w') as log:
+        returncode = subprocess.call(command, cwd=job_dir, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = round(time.time() - start, 3)
+
+    if cache is not None:
+        if returncode == 0:
+            job_dir = link_job_dir(output_dir, job['id'], cache.commit(key, job_dir, inputs))
+        else:
+            # Failed runs are not cached; keep them next to the manifest for inspection
+            failed_dir = clear_job_dir(output_dir, job['id'])
+            os.replace(job_dir, failed_dir)
+            job_dir = failed_dir
+
+    return dict(job,
+                command=command,
+                key=key,
+                cached=False,
+                directory=job_dir,
+                returncode=returncode,
+                status='ok' if returncode == 0 else 'failed',
+                elapsed=elapsed)
+
+
+def write_manifest(output_dir, entries):
+    """Write the manifest atomically so an interrupted sweep leaves a valid file"""
+    path = os.path.join(output_dir, MANIFEST)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'jobs': sorted(entries, key=lambda e: e['id'])}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_manifest(output_dir):
+    """Return the manifest job entries ([] if there is no manifest)"""
+    path = os.path.join(output_dir, MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)['jobs']
+
+
+def result_prefixes(output_dir):
+    """Output prefixes of the successful jobs, for analyze-results.py"""
+    return [os.path.join(entry['directory'], entry['prefix'])
+            for entry in load_manifest(output_dir) if entry['status'] == 'ok']
+
+
+def run_sweep(jobs, output_dir, binary=DEFAULT_BINARY, workers=None, cache=None, refresh=False,
+              previous=()):
+    """
+    Run all jobs with at most `workers` simulations at once; return their manifest entries
+    Entries of earlier rounds passed as `previous` are kept in the manifest
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    entries = []
+    failed = 0
+    reused = 0
+
+    print(f"Running {len(jobs)} jobs with {workers} workers...")
+    start = time.time()
+    # Each job is its own ns-3 process; the threads only wait on them
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, binary, output_dir, job, cache, refresh) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry = future.result()
+            entries.append(entry)
+            failed += entry['status'] != 'ok'
+            reused += entry.get('cached', False)
+            mark = '✓' if entry['status'] == 'ok' else '✗'
+            timing = 'cached' if entry.get('cached') else f"{entry['elapsed']:.1f} s"
+            print(f"[{done}/{len(jobs)}] {mark} {entry['id']} ({timing})", flush=True)
+            write_manifest(output_dir, list(previous) + entries)
+
+    print(f"Sweep finished in {time.time() - start:.1f} s, {reused} cached, {failed} failed")
+    return entries
+
+
+def run_until_precise(points, output_dir, binary, metric, precision, confidence=0.95,
+                      min_runs=3, max_runs=30, workers=None, cache=None, refresh=False, extra_args=()):
+    """
+    Sequential stopping: run min_runs seeds per grid point, then add seeds to the
+    points whose metric confidence interval half-width exceeds precision * |mean|,
+    sized by the current variance estimate, until max_runs
+    """
+    runs = {point['id']: 0 for point in points}
+    target = {point['id']: min_runs for point in points}
+    values = {point['id']: [] for point in points}
+    entries = []
+
+    while True:
+        jobs = [point_job(point, run, extra_args) for point in points
+                for run in range(runs[point['id']] + 1, target[point['id']] + 1)]
+        if not jobs:
+            break
+        new_entries = run_sweep(jobs, output_dir, binary, workers, cache, refresh, entries)
+        entries += new_entries
+        runs.update(target)
+
+        for entry in new_entries:
+            if entry['status'] == 'ok':
+                value = read_run_metric(os.path.join(entry['directory'], entry['prefix']), metric)
+                if value is not None:
+                    values[entry['point']].append(value)
+
+        print(f"\n{'Point':<28} {'Runs':>5} {metric:>12} {'CI half-width':>14}")
+        for point in points:
+            point_values = values[point['id']]
+            mean, low, high = mean_ci(point_values, confidence)
+            done = enough_runs(point_values, precision, confidence, min_runs)
+            capped = runs[point['id']] >= max_runs
+            note = '' if done else ('  (max runs reached)' if capped else '  (more runs)')
+            print(f"{point['id']:<28} {len(point_values):>5} {mean:>12.4f} {(high - low) / 2:>14.4f}{note}")
+            if not done and not capped:
+                needed = runs_needed(point_values, precision, confidence, min_runs)
+                target[point['id']] = min(max_runs, max(runs[point['id']] + 1, needed))
+        print()
+
+    return entries
+
+
+def build_ns3():
+    """Build ns-3 once before the sweep"""
+    return subprocess.call(['./ns3', 'build'], cwd=NS3_DIR) == 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run a parallel wifi6-cac-simulation sweep')
+    parser.add_argument('--stations', type=int, nargs='+', default=[25, 30, 35, 40, 45, 50])
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.80])
+    parser.add_argument('--channel-widths', type=int, nargs='+', default=[80])
+    parser.add_argument('--enable-cac', type=int, nargs='+', default=[1])
+    parser.add_argument('--runs', type=int, default=1, help='Seeds per grid point (RngRun 1..N)')
+    parser.add_argument('--sim-time', type=float, default=60.0)
+    parser.add_argument('--jobs', type=int, default=None, help='Concurrent simulations (default: CPU count)')
+    parser.add_argument('--output-dir', default='results/sweep')
+    parser.add_argument('--binary', default=DEFAULT_BINARY)
+    parser.add_argument('--build', action='store_true', help='Run ./ns3 build before the sweep')
+    parser.add_argument('--cache-dir', default='results/cache',
+                        help='Content-addressed result cache shared between sweeps')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Run every job in <output-dir>/<job id> without using the cache')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-run cached jobs and replace their results')
+    parser.add_argument('--target-precision', type=float, default=None,
+                        help='Add runs until the CI half-width of --metric is within this '
+                             'fraction of its mean (ignores --runs)')
+    parser.add_argument('--metric', choices=['throughput', 'blocking'], default='throughput',
+                        help='Per-run metric for --target-precision')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--min-runs', type=int, default=3)
+    parser.add_argument('--max-runs', type=int, default=30)
+    parser.add_argument('--print-prefixes', action='store_true',
+                        help='Print the result prefixes of a finished sweep and exit')
+    parser.add_argument('extra', nargs=argparse.REMAINDER,
+                        help='Extra simulation arguments after "--"')
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+
+    if args.print_prefixes:
+        print('\n'.join(result_prefixes(args.output_dir)))
+        return
+
+    if args.build and not build_ns3():
+        print("Build failed! Please check for compilation errors.")
+        sys.exit(1)
+
+    extra = [a for a in args.extra if a != '--']
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    binary = os.path.abspath(args.binary)
+    if args.target_precision is not None:
+        points = grid_points(args.stations, args.thresholds, args.channel_widths, args.enable_cac,
+                             args.sim_time)
+        entries = run_until_precise(points, args.output_dir, binary, args.metric, args.target_precision,
+                                    args.confidence, args.min_runs, args.max_runs, args.jobs, cache,
+                                    args.refresh, extra)
+    else:
+        jobs = expand_grid(args.stations, args.thresholds, args.channel_widths, args.enable_cac,
+                           range(1, args.runs + 1), args.sim_time, extra)
+        entries = run_sweep(jobs, args.output_dir, binary, args.jobs, cache, args.refresh)
+    sys.exit(0 if all(e['status'] == 'ok' for e in entries) else 1)
+
+
+if __name__ == '__main__':
+    main()
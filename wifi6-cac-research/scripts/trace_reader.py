@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Reader for the columnar binary traces written by wifi6-cac-simulation --traceFormat=binary
+
+File layout (see BinaryTraceSink in src/wifi6-cac-trace-sink.h):
+    "CACTRACE 1\\n"
+    "name:type[:label0|label1|...],...\\n"   type is u8, u32 or f64
+    blocks until EOF: uint32 row count N, then N values of each column in turn
+All numbers are little-endian.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"CACTRACE 1\n"
+
+DTYPES = {
+    'u8': np.dtype('<u1'),
+    'u32': np.dtype('<u4'),
+    'f64': np.dtype('<f8'),
+}
+
+
+def parse_schema(line):
+    """Parse the schema line into a list of (name, dtype, labels)"""
+    columns = []
+    for entry in line.decode().strip().split(','):
+        parts = entry.split(':')
+        labels = parts[2].split('|') if len(parts) > 2 else None
+        columns.append((parts[0], DTYPES[parts[1]], labels))
+    return columns
+
+
+def read_schema(f, filename):
+    """Check the magic line and parse the schema of an open trace"""
+    if f.readline() != MAGIC:
+        raise ValueError(f"{filename} is not a CAC binary trace")
+    return parse_schema(f.readline())
+
+
+def iter_trace_blocks(filename, columns=None):
+    """
+    Yield (schema, {column: numpy array}) per block, reading one block at a time
+    Unrequested columns are skipped without being read
+    """
+    with open(filename, 'rb') as f:
+        schema = read_schema(f, filename)
+        wanted = set(name for name, _, _ in schema) if columns is None else set(columns)
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                break
+            rows = int.from_bytes(header, 'little')
+            block = {}
+            for name, dtype, _ in schema:
+                size = rows * dtype.itemsize
+                if name in wanted:
+                    block[name] = np.frombuffer(f.read(size), dtype=dtype)
+                else:
+                    f.seek(size, os.SEEK_CUR)
+            yield schema, block
+
+
+def read_trace_columns(filename, columns=None):
+    """
+    Read a binary trace into a dict of {column: (numpy array, labels)}
+    Only the requested columns are decoded
+    """
+    with open(filename, 'rb') as f:
+        schema = read_schema(f, filename)
+    wanted = [name for name, _, _ in schema] if columns is None else list(columns)
+
+    chunks = {name: [] for name in wanted}
+    for _, block in iter_trace_blocks(filename, wanted):
+        for name, values in block.items():
+            chunks[name].append(values)
+
+    result = {}
+    for name, dtype, labels in schema:
+        if name not in chunks:
+            continue
+        parts = chunks[name]
+        values = np.concatenate(parts) if len(parts) > 1 else (parts[0] if parts else np.empty(0, dtype))
+        result[name] = (values, labels)
+    return result
+
+
+def to_frame(columns):
+    """DataFrame from {column: (values, labels)} (coded columns become categoricals)"""
+    data = {}
+    for name, (values, labels) in columns.items():
+        if labels:
+            data[name] = pd.Categorical.from_codes(values.astype(np.int16), categories=labels)
+        else:
+            data[name] = values
+    return pd.DataFrame(data)
+
+
+def read_trace(filename, columns=None):
+    """Read a binary trace into a DataFrame (coded columns become categoricals)"""
+    return to_frame(read_trace_columns(filename, columns))
+
+
+def read_csv_cached(csv_file, columns=None, dtypes=None, parquet_cache=False):
+    """
+    Read selected CSV columns with the given dtypes
+    With parquet_cache the parsed frame is kept as <name>.parquet next to the CSV
+    and reused while it is newer than the CSV (skipped if no Parquet engine is installed)
+    """
+    parquet_file = os.path.splitext(csv_file)[0] + '.parquet'
+    if (parquet_cache and os.path.exists(parquet_file)
+            and os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file)):
+        try:
+            return pd.read_parquet(parquet_file, columns=columns)
+        except (ImportError, ValueError, KeyError):
+            pass  # No engine, or the cache lacks a requested column: parse again
+
+    df = pd.read_csv(csv_file, usecols=columns, dtype=dtypes)
+    if parquet_cache:
+        try:
+            df.to_parquet(parquet_file, index=False)
+        except ImportError:
+            pass
+    return df
+
+
+def read_trace_file(prefix, kind, columns=None, dtypes=None, parquet_cache=False):
+    """
+    Load <prefix>-<kind>.bin if present, otherwise <prefix>-<kind>.csv
+    Only `columns` are read and `dtypes` ({column: dtype}) are applied
+    Returns None when neither exists
+    """
+    binary_file = f"{prefix}-{kind}.bin"
+    csv_file = f"{prefix}-{kind}.csv"
+    if os.path.exists(binary_file):
+        df = read_trace(binary_file, columns)
+    elif os.path.exists(csv_file):
+        df = read_csv_cached(csv_file, columns, dtypes, parquet_cache)
+    else:
+        return None
+
+    return apply_dtypes(df, dtypes)
+
+
+def apply_dtypes(df, dtypes):
+    """Cast the columns named in dtypes that df has"""
+    if dtypes:
+        df = df.astype({name: dtype for name, dtype in dtypes.items() if name in df.columns}, copy=False)
+    return df
+
+
+def iter_trace_file(prefix, kind, columns=None, dtypes=None, chunksize=1_000_000):
+    """
+    Stream <prefix>-<kind>.bin block by block, or <prefix>-<kind>.csv in chunks of
+    `chunksize` rows, as DataFrames; memory is bounded by one chunk
+    Yields nothing when neither file exists
+    """
+    binary_file = f"{prefix}-{kind}.bin"
+    csv_file = f"{prefix}-{kind}.csv"
+    if os.path.exists(binary_file):
+        for schema, block in iter_trace_blocks(binary_file, columns):
+            labels = {name: column_labels for name, _, column_labels in schema}
+            yield apply_dtypes(to_frame({name: (values, labels[name]) for name, values in block.items()}),
+                               dtypes)
+    elif os.path.exists(csv_file):
+        with pd.read_csv(csv_file, usecols=columns, dtype=dtypes, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: trace_reader.py <trace.bin> [output.csv]")
+        sys.exit(1)
+
+    df = read_trace(sys.argv[1])
+    if len(sys.argv) > 2:
+        df.to_csv(sys.argv[2], index=False)
+        print(f"Wrote {len(df)} rows to {sys.argv[2]}")
+    else:
+        print(df.describe(include='all'))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@
 #include "ns3/applications-module.h"
 #include "ns3/flow-monitor-module.h"
 #include "ns3/netanim-module.h"
+#include "wifi6-cac-metrics.h"
 
 #include <fstream>
 #include <iostream>
@@ -62,14 +63,20 @@ int main(int argc, char *argv[]) {
     uint32_t nStations = 30;
     double simTime = 10.0;
     bool enableCac = true;
+    std::string metricsFile = "wifi6-cac-demo-metrics.jsonl";
+    bool verbose = true;
     
     CommandLine cmd;
     cmd.AddValue("nStations", "Number of stations", nStations);
     cmd.AddValue("simTime", "Simulation time", simTime);
     cmd.AddValue("enableCac", "Enable CAC", enableCac);
+    cmd.AddValue("metricsFile", "JSON-lines file the run's metrics record is appended to", metricsFile);
+    cmd.AddValue("verbose", "Log every admission decision and the results", verbose);
     cmd.Parse(argc, argv);
     
-    LogComponentEnable("Wifi6CacDemo", LOG_LEVEL_INFO);
+    if (verbose) {
+        LogComponentEnable("Wifi6CacDemo", LOG_LEVEL_INFO);
+    }
     
     NS_LOG_INFO("=== WiFi 6 CAC Demo ===");
     NS_LOG_INFO("Stations: " << nStations << ", CAC: " << (enableCac ? "ON" : "OFF"));
@@ -256,6 +263,20 @@ int main(int argc, char *argv[]) {
     summary << "Avg Delay: " << (flowCount > 0 ? totalDelay / flowCount : 0) << " ms\n";
     summary.close();
     
+    MetricsRecord record;
+    record.SetInteger("nStations", nStations)
+        .SetBool("enableCac", enableCac)
+        .SetDouble("simTime", simTime)
+        .SetInteger("rngRun", RngSeedManager::GetRun())
+        .SetInteger("requests", g_cacStats.totalRequests)
+        .SetInteger("admitted", g_cacStats.admittedFlows)
+        .SetInteger("blocked", g_cacStats.blockedFlows)
+        .SetDouble("airtime", g_cacStats.currentAirtime)
+        .SetInteger("flows", flowCount)
+        .SetDouble("throughput", totalThroughput)   // Mbps
+        .SetDouble("delay", flowCount > 0 ? totalDelay / flowCount : 0);  // ms
+    record.Append(metricsFile);
+    
     g_resultsFile.close();
     
     NS_LOG_INFO("\nResults saved!");
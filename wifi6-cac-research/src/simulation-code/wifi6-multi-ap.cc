@@ -6,9 +6,13 @@
 #include "ns3/applications-module.h"
 #include "ns3/flow-monitor-module.h"
 #include "ns3/netanim-module.h"
+#include "wifi6-cac-airtime-provider.h"
+#include "wifi6-cac-metrics.h"
 
+#include <cmath>
 #include <fstream>
 #include <iostream>
+#include <map>
 #include <vector>
 #include <string>
 
@@ -44,11 +48,30 @@ public:
         : m_voipThreshold(0.90),  // 90% for VoIP (High Priority)
           m_videoThreshold(0.80), // 80% for Video (Medium Priority)
           m_burstyThreshold(0.95), // 95% for Bursty (Low Priority - Fill the gaps)
-          m_currentUtilization(0.0) 
+          m_currentUtilization(0.0),
+          m_adaptStep(0.01),
+          m_requests{},
+          m_admitted{},
+          m_txVector(WifiAirtimeProvider::MakeHeTxVector(5, 20, 800, 1))
     {}
 
     void SetApId(uint32_t apId) { m_apId = apId; }
 
+    void SetThresholds(double voip, double video, double bursty) {
+        m_voipThreshold = voip;
+        m_videoThreshold = video;
+        m_burstyThreshold = bursty;
+    }
+
+    // Change of the adaptive bursty threshold per admission request (0 disables adaptation)
+    void SetAdaptStep(double step) { m_adaptStep = step; }
+
+    // Use PPDU durations from the PHY model instead of the fixed link rate
+    // (default 20 MHz 11ax channel, HeMcs5, 1 SS)
+    void SetAirtimeProvider(Ptr<WifiAirtimeProvider> provider) {
+        m_airtimeProvider = provider;
+    }
+
     double CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type) {
         // Simplified Airtime Calculation for WiFi 6 (802.11ax)
         // Considering overheads, MCS, etc.
@@ -68,6 +91,14 @@ public:
         double overhead = 100e-6; // 100us overhead (preamble, IFS, ACK)
         double txTime = (packetSize * 8.0) / 100e6; // Assuming 100Mbps effective link rate
         
+        if (m_airtimeProvider) {
+            // PPDU duration (incl. preamble) of the MPDU: MAC header + LLC/SNAP + FCS = 42 bytes
+            txTime = m_airtimeProvider->GetTxDuration(packetSize + 42, m_txVector).GetSeconds();
+            // DIFS, backoff, SIFS and ACK as in AirtimeAdmissionControl; HE preamble is in txTime
+            overhead = WifiAirtimeProvider::DIFS + WifiAirtimeProvider::AVG_BACKOFF +
+                       WifiAirtimeProvider::SIFS + WifiAirtimeProvider::ACK_TIME;
+        }
+        
         double timePerPacket = txTime + overhead;
         
         double packetsPerSecond = dataRate / (packetSize * 8.0);
@@ -92,15 +123,16 @@ public:
         
         // Adaptive adjustment
         if (simulatedPER > 0.05) {
-            m_burstyThreshold = std::max(0.80, m_burstyThreshold - 0.01);
+            m_burstyThreshold = std::max(0.80, m_burstyThreshold - m_adaptStep);
         } else if (simulatedPER < 0.02 && m_currentUtilization > 0.70) {
-            m_burstyThreshold = std::min(0.98, m_burstyThreshold + 0.01);
+            m_burstyThreshold = std::min(0.98, m_burstyThreshold + m_adaptStep);
         }
     }
 
     bool RequestAdmission(FlowDescriptor& flow) {
         // Adapt thresholds based on current state
         AdaptThresholds();
+        m_requests[flow.type]++;
     
         flow.requiredAirtime = CalculateRequiredAirtime(flow.packetSize, flow.dataRate, flow.type);
         
@@ -125,34 +157,47 @@ public:
                 typeStr = "OTHER";
         }
 
-        NS_LOG_UNCOND("AP " << m_apId << " Traffic ID: Flow " << flow.flowId << " (" << typeStr << ") requesting " << flow.requiredAirtime << " airtime. Threshold: " << threshold);
+        NS_LOG_INFO("AP " << m_apId << " Traffic ID: Flow " << flow.flowId << " (" << typeStr << ") requesting " << flow.requiredAirtime << " airtime. Threshold: " << threshold);
 
         if (m_currentUtilization + flow.requiredAirtime <= threshold) {
             m_currentUtilization += flow.requiredAirtime;
             flow.admitted = true;
-            NS_LOG_UNCOND("  -> ADMITTED (AS-CAC+). New AP " << m_apId << " Util: " << m_currentUtilization << " (Threshold: " << threshold << ")");
+            m_admitted[flow.type]++;
+            NS_LOG_INFO("  -> ADMITTED (AS-CAC+). New AP " << m_apId << " Util: " << m_currentUtilization << " (Threshold: " << threshold << ")");
             return true;
         } else {
             flow.admitted = false;
-            NS_LOG_UNCOND("  -> BLOCKED (AS-CAC+). AP " << m_apId << " Util: " << m_currentUtilization << " + " << flow.requiredAirtime << " > " << threshold);
+            NS_LOG_INFO("  -> BLOCKED (AS-CAC+). AP " << m_apId << " Util: " << m_currentUtilization << " + " << flow.requiredAirtime << " > " << threshold);
             return false;
         }
     }
 
     double GetUtilization() const { return m_currentUtilization; }
+    uint32_t GetRequests(TrafficType type) const { return m_requests[type]; }
+    uint32_t GetAdmitted(TrafficType type) const { return m_admitted[type]; }
+    uint32_t GetRequests() const { return m_requests[VOIP] + m_requests[VIDEO] + m_requests[BURSTY] + m_requests[WEB]; }
+    uint32_t GetAdmitted() const { return m_admitted[VOIP] + m_admitted[VIDEO] + m_admitted[BURSTY] + m_admitted[WEB]; }
 
 private:
     double m_voipThreshold;
     double m_videoThreshold;
     double m_burstyThreshold;
     double m_currentUtilization;
+    double m_adaptStep;
+    uint32_t m_requests[4];  // Admission requests per TrafficType
+    uint32_t m_admitted[4];  // Admitted flows per TrafficType
     uint32_t m_apId;
+    Ptr<WifiAirtimeProvider> m_airtimeProvider;
+    WifiTxVector m_txVector;
 };
 
 // Global CAC objects (one per AP)
 SoftAirtimeAdmissionControl g_cacAp1;
 SoftAirtimeAdmissionControl g_cacAp2;
 
+// Traffic type of each admitted flow, keyed by its destination port
+std::map<uint16_t, TrafficType> g_portTypes;
+
 // Application Helpers
 void SetupVoipApp(Ptr<Node> node, Ipv4Address destAddr, uint32_t flowId, uint32_t apId) {
     FlowDescriptor flow;
@@ -166,6 +211,7 @@ void SetupVoipApp(Ptr<Node> node, Ipv4Address destAddr, uint32_t flowId, uint32_
 
     if (cac->RequestAdmission(flow)) {
         uint16_t port = 9000 + flowId;
+        g_portTypes[port] = flow.type;
         OnOffHelper onoff("ns3::UdpSocketFactory", InetSocketAddress(destAddr, port));
         onoff.SetConstantRate(DataRate("64kbps"), 160);
         onoff.SetAttribute("OnTime", StringValue("ns3::ConstantRandomVariable[Constant=1.0]"));
@@ -194,6 +240,7 @@ void SetupVideoApp(Ptr<Node> node, Ipv4Address destAddr, uint32_t flowId, uint32
 
     if (cac->RequestAdmission(flow)) {
         uint16_t port = 9000 + flowId;
+        g_portTypes[port] = flow.type;
         OnOffHelper onoff("ns3::UdpSocketFactory", InetSocketAddress(destAddr, port));
         onoff.SetConstantRate(DataRate("3Mbps"), 1400);
         
@@ -215,6 +262,7 @@ void SetupBurstyApp(Ptr<Node> node, Ipv4Address destAddr, uint32_t flowId, uint3
 
     if (cac->RequestAdmission(flow)) {
         uint16_t port = 9000 + flowId;
+        g_portTypes[port] = flow.type;
         OnOffHelper onoff("ns3::UdpSocketFactory", InetSocketAddress(destAddr, port));
         onoff.SetAttribute("DataRate", StringValue("5Mbps"));
         onoff.SetAttribute("PacketSize", UintegerValue(1400));
@@ -230,14 +278,43 @@ void SetupBurstyApp(Ptr<Node> node, Ipv4Address destAddr, uint32_t flowId, uint3
 int main(int argc, char *argv[]) {
     uint32_t nStationsPerAp = 20;
     bool useCci = true; // Co-Channel Interference (Same channel)
+    bool usePhyAirtime = false; // CAC airtime from the WifiPhy model
+    std::string label = ""; // Scenario name in the metrics record (default "cci"/"aci")
+    std::string metricsFile = "wifi6-multi-ap-metrics.jsonl";
+    double voipThreshold = 0.90;
+    double videoThreshold = 0.80;
+    double burstyThreshold = 0.95; // Initial value; adapted per request (AS-CAC+)
+    double adaptStep = 0.01;
     
     CommandLine cmd;
     cmd.AddValue("nStationsPerAp", "Number of stations per AP", nStationsPerAp);
     cmd.AddValue("useCci", "Enable Co-Channel Interference (true=Same Channel, false=Different)", useCci);
+    cmd.AddValue("usePhyAirtime", "Compute CAC airtime from the WifiPhy model", usePhyAirtime);
+    cmd.AddValue("label", "Scenario label written to the metrics record", label);
+    cmd.AddValue("metricsFile", "JSON-lines file the run's metrics record is appended to", metricsFile);
+    cmd.AddValue("voipThreshold", "Soft CAC airtime threshold for VoIP flows", voipThreshold);
+    cmd.AddValue("videoThreshold", "Soft CAC airtime threshold for video flows", videoThreshold);
+    cmd.AddValue("burstyThreshold", "Initial soft CAC airtime threshold for bursty flows", burstyThreshold);
+    cmd.AddValue("adaptStep", "AS-CAC+ bursty threshold step per request (0 = fixed thresholds)", adaptStep);
     cmd.Parse(argc, argv);
 
+    if (label.empty()) {
+        label = useCci ? "cci" : "aci";
+    }
+
     g_cacAp1.SetApId(1);
     g_cacAp2.SetApId(2);
+    for (SoftAirtimeAdmissionControl* cac : {&g_cacAp1, &g_cacAp2}) {
+        cac->SetThresholds(voipThreshold, videoThreshold, burstyThreshold);
+        cac->SetAdaptStep(adaptStep);
+    }
+
+    if (usePhyAirtime) {
+        // One memoized provider shared by both APs
+        Ptr<WifiAirtimeProvider> airtimeProvider = CreateObject<WifiAirtimeProvider>();
+        g_cacAp1.SetAirtimeProvider(airtimeProvider);
+        g_cacAp2.SetAirtimeProvider(airtimeProvider);
+    }
 
     NodeContainer wifiApNodes;
     wifiApNodes.Create(2); // 2 APs
@@ -411,20 +488,54 @@ int main(int argc, char *argv[]) {
     double totalThroughput = 0;
     double totalDelay = 0;
     uint32_t flowCount = 0;
+    double voipDelay = 0;
+    uint32_t voipFlowCount = 0;
 
     for (std::map<FlowId, FlowMonitor::FlowStats>::const_iterator i = stats.begin(); i != stats.end(); ++i) {
         if (i->second.rxBytes > 0) {
+            double flowDelay = i->second.delaySum.GetSeconds() / i->second.rxPackets;
             totalThroughput += i->second.rxBytes * 8.0 / 10.0 / 1000 / 1000; // Mbps
-            totalDelay += i->second.delaySum.GetSeconds() / i->second.rxPackets;
+            totalDelay += flowDelay;
             flowCount++;
+
+            auto type = g_portTypes.find(classifier->FindFlow(i->first).destinationPort);
+            if (type != g_portTypes.end() && type->second == VOIP) {
+                voipDelay += flowDelay;
+                voipFlowCount++;
+            }
         }
     }
 
+    double avgDelay = flowCount > 0 ? totalDelay / flowCount : 0;
+
     NS_LOG_UNCOND("Total Throughput: " << totalThroughput << " Mbps");
-    NS_LOG_UNCOND("Avg Delay: " << (flowCount > 0 ? totalDelay/flowCount : 0) << " s");
+    NS_LOG_UNCOND("Avg Delay: " << avgDelay << " s");
     NS_LOG_UNCOND("AP1 Utilization: " << g_cacAp1.GetUtilization());
     NS_LOG_UNCOND("AP2 Utilization: " << g_cacAp2.GetUtilization());
 
+    // One record per run for the analysis scripts (scripts/sim_metrics.py)
+    MetricsRecord record;
+    record.SetString("label", label)
+        .SetInteger("nStationsPerAp", nStationsPerAp)
+        .SetBool("useCci", useCci)
+        .SetBool("usePhyAirtime", usePhyAirtime)
+        .SetInteger("rngRun", RngSeedManager::GetRun())
+        .SetInteger("flows", flowCount)
+        .SetDouble("throughput", totalThroughput)   // Mbps
+        .SetDouble("delay", avgDelay * 1000.0)      // ms
+        .SetDouble("utilization_ap1", g_cacAp1.GetUtilization())
+        .SetDouble("utilization_ap2", g_cacAp2.GetUtilization())
+        .SetInteger("requests", g_cacAp1.GetRequests() + g_cacAp2.GetRequests())
+        .SetInteger("admitted", g_cacAp1.GetAdmitted() + g_cacAp2.GetAdmitted())
+        .SetDouble("voipThreshold", voipThreshold)
+        .SetDouble("videoThreshold", videoThreshold)
+        .SetDouble("burstyThreshold", burstyThreshold)
+        .SetDouble("adaptStep", adaptStep)
+        .SetInteger("voip_requests", g_cacAp1.GetRequests(VOIP) + g_cacAp2.GetRequests(VOIP))
+        .SetInteger("voip_admitted", g_cacAp1.GetAdmitted(VOIP) + g_cacAp2.GetAdmitted(VOIP))
+        .SetDouble("voip_delay", voipFlowCount > 0 ? voipDelay / voipFlowCount * 1000.0 : NAN);  // ms
+    record.Append(metricsFile);
+
     Simulator::Destroy();
     return 0;
 }
@@ -0,0 +1,131 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * WiFi 6 Airtime Provider Implementation
+ */
+
+#include "wifi6-cac-airtime-provider.h"
+#include "ns3/log.h"
+
+namespace ns3 {
+
+NS_LOG_COMPONENT_DEFINE("WifiAirtimeProvider");
+NS_OBJECT_ENSURE_REGISTERED(WifiAirtimeProvider);
+
+const uint32_t WifiAirtimeProvider::DEFAULT_MAX_CACHE_SIZE;
+
+TypeId
+WifiAirtimeProvider::GetTypeId(void)
+{
+    static TypeId tid = TypeId("ns3::WifiAirtimeProvider")
+        .SetParent<Object>()
+        .SetGroupName("Wifi")
+        .AddConstructor<WifiAirtimeProvider>()
+        .AddAttribute("MaxCacheSize",
+                      "Maximum number of memoized PPDU durations",
+                      UintegerValue(DEFAULT_MAX_CACHE_SIZE),
+                      MakeUintegerAccessor(&WifiAirtimeProvider::SetMaxCacheSize),
+                      MakeUintegerChecker<uint32_t>(1));
+    return tid;
+}
+
+WifiAirtimeProvider::WifiAirtimeProvider()
+    : m_band(WIFI_PHY_BAND_5GHZ),
+      m_maxCacheSize(DEFAULT_MAX_CACHE_SIZE),
+      m_hits(0),
+      m_misses(0)
+{
+    NS_LOG_FUNCTION(this);
+}
+
+WifiAirtimeProvider::~WifiAirtimeProvider()
+{
+    NS_LOG_FUNCTION(this);
+}
+
+void
+WifiAirtimeProvider::SetPhyBand(WifiPhyBand band)
+{
+    NS_LOG_FUNCTION(this << band);
+    m_band = band;
+    m_lru.clear();
+    m_cache.clear();
+}
+
+void
+WifiAirtimeProvider::SetMaxCacheSize(uint32_t maxSize)
+{
+    NS_LOG_FUNCTION(this << maxSize);
+    NS_ASSERT(maxSize > 0);
+    m_maxCacheSize = maxSize;
+
+    while (m_lru.size() > m_maxCacheSize) {
+        m_cache.erase(m_lru.back().first);
+        m_lru.pop_back();
+    }
+}
+
+Time
+WifiAirtimeProvider::GetTxDuration(uint32_t size, const WifiTxVector& txVector)
+{
+    CacheKey key(size,
+                 txVector.GetMode().GetUid(),
+                 static_cast<uint8_t>(txVector.GetPreambleType()),
+                 txVector.GetGuardInterval().GetNanoSeconds(),
+                 txVector.GetNss(),
+                 static_cast<uint32_t>(txVector.GetChannelWidth()));
+
+    auto it = m_cache.find(key);
+    if (it != m_cache.end()) {
+        m_hits++;
+        // Move to the front of the LRU list
+        m_lru.splice(m_lru.begin(), m_lru, it->second);
+        return it->second->second;
+    }
+
+    m_misses++;
+    Time duration = WifiPhy::CalculateTxDuration(size, txVector, m_band);
+
+    m_lru.emplace_front(key, duration);
+    m_cache[key] = m_lru.begin();
+
+    if (m_lru.size() > m_maxCacheSize) {
+        m_cache.erase(m_lru.back().first);
+        m_lru.pop_back();
+    }
+
+    NS_LOG_DEBUG("PPDU duration size=" << size << " mode=" << txVector.GetMode()
+                 << " duration=" << duration.As(Time::US));
+
+    return duration;
+}
+
+WifiTxVector
+WifiAirtimeProvider::MakeHeTxVector(uint8_t mcs, uint16_t channelWidth,
+                                    uint16_t guardInterval, uint8_t nss)
+{
+    return WifiTxVector(HePhy::GetHeMcs(mcs),
+                        0,                          // power level
+                        WIFI_PREAMBLE_HE_SU,
+                        NanoSeconds(guardInterval),
+                        nss,                        // number of TX antennas
+                        nss,
+                        0,                          // Ness
+                        channelWidth,
+                        false);                     // aggregation
+}
+
+uint64_t
+WifiAirtimeProvider::GetCacheHits() const
+{
+    return m_hits;
+}
+
+uint64_t
+WifiAirtimeProvider::GetCacheMisses() const
+{
+    return m_misses;
+}
+
+} // namespace ns3
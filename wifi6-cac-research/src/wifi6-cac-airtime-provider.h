@@ -0,0 +1,120 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * WiFi 6 Airtime Provider
+ * Memoized PPDU duration oracle backed by the ns-3 WifiPhy model
+ */
+
+#ifndef WIFI6_CAC_AIRTIME_PROVIDER_H
+#define WIFI6_CAC_AIRTIME_PROVIDER_H
+
+#include "ns3/core-module.h"
+#include "ns3/wifi-module.h"
+#include <list>
+#include <map>
+#include <tuple>
+
+namespace ns3 {
+
+/**
+ * \brief Airtime oracle for admission control
+ *
+ * Returns the PPDU duration the simulated PHY would use for a given
+ * payload size and WifiTxVector, as computed by WifiPhy::CalculateTxDuration.
+ * Results are memoized in an LRU cache keyed by (size, TX vector), so a
+ * single provider can be shared by several admission controllers.
+ */
+class WifiAirtimeProvider : public Object
+{
+public:
+    /**
+     * \brief Get the type ID
+     * \return the object TypeId
+     */
+    static TypeId GetTypeId(void);
+
+    /**
+     * \brief Constructor
+     */
+    WifiAirtimeProvider();
+
+    /**
+     * \brief Destructor
+     */
+    virtual ~WifiAirtimeProvider();
+
+    /**
+     * \brief Set the frequency band used for duration computations
+     * \param band PHY band
+     */
+    void SetPhyBand(WifiPhyBand band);
+
+    /**
+     * \brief Set the maximum number of memoized durations
+     * \param maxSize Cache capacity (entries)
+     */
+    void SetMaxCacheSize(uint32_t maxSize);
+
+    /**
+     * \brief Get the PPDU duration of a frame
+     * \param size MPDU size in bytes (including MAC overhead)
+     * \param txVector TX vector used for the transmission
+     * \return PPDU duration, including PHY preamble and header
+     */
+    Time GetTxDuration(uint32_t size, const WifiTxVector& txVector);
+
+    /**
+     * \brief Build an HE SU TX vector
+     * \param mcs HE MCS index (0-11)
+     * \param channelWidth Channel width in MHz
+     * \param guardInterval Guard interval in nanoseconds
+     * \param nss Number of spatial streams
+     * \return the TX vector
+     */
+    static WifiTxVector MakeHeTxVector(uint8_t mcs, uint16_t channelWidth,
+                                       uint16_t guardInterval, uint8_t nss);
+
+    /**
+     * \brief Get number of lookups answered from the cache
+     * \return Cache hit count
+     */
+    uint64_t GetCacheHits() const;
+
+    /**
+     * \brief Get number of lookups that queried the PHY model
+     * \return Cache miss count
+     */
+    uint64_t GetCacheMisses() const;
+
+    /// Default cache capacity: enough for the 12 x 4 x 289 = 13872 lookups of an
+    /// AirtimeAdmissionControl airtime table, so rebuilding the table hits the cache
+    static const uint32_t DEFAULT_MAX_CACHE_SIZE = 16384;
+
+    // MAC timing around each PPDU in seconds, shared by the admission controllers:
+    // DIFS and the average backoff before the PPDU, SIFS and the ACK after it
+    static constexpr double DIFS = 34e-6;          ///< DIFS
+    static constexpr double SIFS = 16e-6;          ///< SIFS
+    static constexpr double ACK_TIME = 44e-6;      ///< ACK transmission time
+    static constexpr double AVG_BACKOFF = 67.5e-6; ///< Average backoff (CW_min = 15)
+
+private:
+    /// Cache key: size, mode UID, preamble, GI (ns), NSS, channel width (MHz)
+    typedef std::tuple<uint32_t, uint32_t, uint8_t, int64_t, uint8_t, uint32_t> CacheKey;
+    typedef std::list<std::pair<CacheKey, Time>> LruList;
+
+    WifiPhyBand m_band;                                ///< PHY band
+    uint32_t m_maxCacheSize;                           ///< Cache capacity
+    LruList m_lru;                                     ///< Entries, most recently used first
+    std::map<CacheKey, LruList::iterator> m_cache;     ///< Key to LRU position
+    uint64_t m_hits;                                   ///< Cache hits
+    uint64_t m_misses;                                 ///< Cache misses
+};
+
+} // namespace ns3
+
+#endif /* WIFI6_CAC_AIRTIME_PROVIDER_H */
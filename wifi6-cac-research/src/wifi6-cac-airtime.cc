@@ -16,6 +16,24 @@ namespace ns3 {
 NS_LOG_COMPONENT_DEFINE("AirtimeAdmissionControl");
 NS_OBJECT_ENSURE_REGISTERED(AirtimeAdmissionControl);
 
+const uint32_t AirtimeAdmissionControl::AIRTIME_TABLE_BUCKET_BYTES;
+const uint32_t AirtimeAdmissionControl::AIRTIME_TABLE_MAX_PACKET;
+const uint8_t AirtimeAdmissionControl::AIRTIME_TABLE_NUM_MCS;
+const uint8_t AirtimeAdmissionControl::AIRTIME_TABLE_NUM_TYPES;
+
+namespace {
+
+/// Number of packet-size buckets in the airtime cost table
+const uint32_t kNumSizeBuckets =
+    AirtimeAdmissionControl::AIRTIME_TABLE_MAX_PACKET / AirtimeAdmissionControl::AIRTIME_TABLE_BUCKET_BYTES + 1;
+
+/// Coded bits per subcarrier (modulation bits * coding rate) for HE MCS 0-11
+const double kHeMcsEfficiency[AirtimeAdmissionControl::AIRTIME_TABLE_NUM_MCS] = {
+    0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 4.5, 5.0, 6.0, 20.0 / 3.0, 7.5, 25.0 / 3.0
+};
+
+} // namespace
+
 TypeId
 AirtimeAdmissionControl::GetTypeId(void)
 {
@@ -34,9 +52,11 @@ AirtimeAdmissionControl::AirtimeAdmissionControl()
       m_blockedFlows(0),
       m_channelWidth(80),        // 80 MHz for WiFi 6
       m_guardInterval(800),      // 800 ns GI
-      m_nss(2)                   // 2 spatial streams
+      m_nss(2),                  // 2 spatial streams
+      m_mcs(5)                   // HE MCS 5
 {
     NS_LOG_FUNCTION(this);
+    BuildAirtimeTable();
 }
 
 AirtimeAdmissionControl::~AirtimeAdmissionControl()
@@ -59,12 +79,88 @@ AirtimeAdmissionControl::GetAirtimeThreshold() const
 }
 
 void
-AirtimeAdmissionControl::SetWifiPhyParameters(uint16_t channelWidth, uint16_t guardInterval, uint8_t nss)
+AirtimeAdmissionControl::SetWifiPhyParameters(uint16_t channelWidth, uint16_t guardInterval, uint8_t nss,
+                                              uint8_t mcs)
 {
-    NS_LOG_FUNCTION(this << channelWidth << guardInterval << (uint16_t)nss);
+    NS_LOG_FUNCTION(this << channelWidth << guardInterval << (uint16_t)nss << (uint16_t)mcs);
+    NS_ASSERT_MSG(channelWidth == 20 || channelWidth == 40 || channelWidth == 80 || channelWidth == 160,
+                  "Unsupported channel width " << channelWidth);
+    NS_ASSERT_MSG(mcs < AIRTIME_TABLE_NUM_MCS, "Unsupported HE MCS " << (uint16_t)mcs);
     m_channelWidth = channelWidth;
     m_guardInterval = guardInterval;
     m_nss = nss;
+    m_mcs = mcs;
+    BuildAirtimeTable();
+}
+
+void
+AirtimeAdmissionControl::BuildAirtimeTable()
+{
+    NS_LOG_FUNCTION(this);
+    
+    m_airtimeTable.assign(AIRTIME_TABLE_NUM_MCS * AIRTIME_TABLE_NUM_TYPES * kNumSizeBuckets, 0.0);
+    
+    // Each bucket holds the cost of its upper edge, so lookups never undercharge a flow
+    for (uint8_t mcs = 0; mcs < AIRTIME_TABLE_NUM_MCS; mcs++) {
+        for (uint8_t type = 0; type < AIRTIME_TABLE_NUM_TYPES; type++) {
+            for (uint32_t bucket = 0; bucket < kNumSizeBuckets; bucket++) {
+                uint32_t index = (mcs * AIRTIME_TABLE_NUM_TYPES + type) * kNumSizeBuckets + bucket;
+                m_airtimeTable[index] = CalculateTimePerPacket(bucket * AIRTIME_TABLE_BUCKET_BYTES,
+                                                               static_cast<TrafficType>(type), mcs);
+            }
+        }
+    }
+    
+    m_mcsDataRates.resize(AIRTIME_TABLE_NUM_MCS);
+    for (uint8_t mcs = 0; mcs < AIRTIME_TABLE_NUM_MCS; mcs++) {
+        m_mcsDataRates[mcs] = HePhy::GetHeMcs(mcs).GetDataRate(m_channelWidth,
+                                                              NanoSeconds(m_guardInterval), m_nss);
+    }
+    
+    NS_LOG_DEBUG("Airtime table built: width=" << m_channelWidth << " gi=" << m_guardInterval
+                 << " nss=" << (uint16_t)m_nss << " entries=" << m_airtimeTable.size());
+}
+
+void
+AirtimeAdmissionControl::SetAirtimeProvider(Ptr<WifiAirtimeProvider> provider)
+{
+    NS_LOG_FUNCTION(this << provider);
+    m_airtimeProvider = provider;
+    BuildAirtimeTable();
+}
+
+double
+AirtimeAdmissionControl::GetTimePerPacket(uint32_t packetSize, TrafficType type, uint8_t mcs) const
+{
+    NS_ASSERT(mcs < AIRTIME_TABLE_NUM_MCS);
+    
+    if (packetSize > AIRTIME_TABLE_MAX_PACKET) {
+        return CalculateTimePerPacket(packetSize, type, mcs);
+    }
+    
+    uint32_t bucket = (packetSize + AIRTIME_TABLE_BUCKET_BYTES - 1) / AIRTIME_TABLE_BUCKET_BYTES;
+    return m_airtimeTable[(mcs * AIRTIME_TABLE_NUM_TYPES + type) * kNumSizeBuckets + bucket];
+}
+
+void
+AirtimeAdmissionControl::WriteAirtimeTable(std::ostream& os) const
+{
+    os << "ChannelWidth,Nss,GuardInterval,Mcs,TrafficType,PacketSize,TimePerPacket\n";
+    
+    for (uint8_t mcs = 0; mcs < AIRTIME_TABLE_NUM_MCS; mcs++) {
+        for (uint8_t type = 0; type < AIRTIME_TABLE_NUM_TYPES; type++) {
+            for (uint32_t bucket = 0; bucket < kNumSizeBuckets; bucket++) {
+                os << m_channelWidth << ","
+                   << (uint16_t)m_nss << ","
+                   << m_guardInterval << ","
+                   << (uint16_t)mcs << ","
+                   << (uint16_t)type << ","
+                   << bucket * AIRTIME_TABLE_BUCKET_BYTES << ","
+                   << m_airtimeTable[(mcs * AIRTIME_TABLE_NUM_TYPES + type) * kNumSizeBuckets + bucket]
+                   << "\n";
+            }
+        }
+    }
 }
 
 AcIndex
@@ -100,7 +196,7 @@ AirtimeAdmissionControl::GetPriority(TrafficType type)
 }
 
 uint32_t
-AirtimeAdmissionControl::GetMacOverhead(TrafficType type)
+AirtimeAdmissionControl::GetMacOverhead(TrafficType type) const
 {
     // MAC header (30 bytes) + LLC/SNAP (8 bytes) + FCS (4 bytes)
     uint32_t baseOverhead = 42;
@@ -114,15 +210,22 @@ AirtimeAdmissionControl::GetMacOverhead(TrafficType type)
 }
 
 double
-AirtimeAdmissionControl::CalculatePhyTxTime(uint32_t packetSize)
+AirtimeAdmissionControl::CalculatePhyTxTime(uint32_t packetSize, uint8_t mcs) const
 {
+    if (m_airtimeProvider) {
+        WifiTxVector txVector = WifiAirtimeProvider::MakeHeTxVector(mcs, m_channelWidth,
+                                                                    m_guardInterval, m_nss);
+        return m_airtimeProvider->GetTxDuration(packetSize, txVector).GetSeconds();
+    }
+    
     // WiFi 6 (802.11ax) PHY parameters
-    const double symbolDuration = 13.6e-6;  // 13.6 μs symbol duration (with 0.8 μs GI)
+    const double symbolDuration = 12.8e-6 + m_guardInterval * 1e-9;  // 13.6 μs with 0.8 μs GI
     const uint32_t phyPreamble = 40;        // 40 μs preamble for HE format
     
     // Calculate data rate based on channel width and NSS
-    // Using conservative MCS 5 for reliability in dense environment
-    // MCS 5: 64-QAM, coding rate 3/4
+    // The per-width figures below are for MCS 5, the conservative default
+    // for reliability in dense environments; other MCS values scale them
+    // by their coded bits per subcarrier relative to MCS 5.
     double bitsPerSymbol = 0;
     
     if (m_channelWidth == 20) {
@@ -134,6 +237,7 @@ AirtimeAdmissionControl::CalculatePhyTxTime(uint32_t packetSize)
     } else if (m_channelWidth == 160) {
         bitsPerSymbol = 1960 * m_nss; // 1960 bits per symbol per stream for 160 MHz
     }
+    bitsPerSymbol *= kHeMcsEfficiency[mcs] / kHeMcsEfficiency[5];
     
     // Calculate number of symbols needed
     uint32_t totalBits = packetSize * 8;
@@ -146,24 +250,33 @@ AirtimeAdmissionControl::CalculatePhyTxTime(uint32_t packetSize)
 }
 
 double
-AirtimeAdmissionControl::CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type)
+AirtimeAdmissionControl::CalculateTimePerPacket(uint32_t packetSize, TrafficType type, uint8_t mcs) const
 {
-    NS_LOG_FUNCTION(this << packetSize << dataRate << type);
-    
     // Add MAC overhead
     uint32_t totalPacketSize = packetSize + GetMacOverhead(type);
     
     // Calculate PHY transmission time
-    double txTime = CalculatePhyTxTime(totalPacketSize);
+    double txTime = CalculatePhyTxTime(totalPacketSize, mcs);
     
-    // Add MAC protocol overhead
-    const double difs = 34e-6;           // DIFS: 34 μs
-    const double sifs = 16e-6;           // SIFS: 16 μs
-    const double ackTime = 44e-6;        // ACK transmission time
-    const double avgBackoff = 67.5e-6;   // Average backoff time (CW_min = 15)
+    // Total time per packet transmission, with the MAC protocol overhead
+    return WifiAirtimeProvider::DIFS + WifiAirtimeProvider::AVG_BACKOFF + txTime +
+           WifiAirtimeProvider::SIFS + WifiAirtimeProvider::ACK_TIME;
+}
+
+double
+AirtimeAdmissionControl::CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type)
+{
+    return CalculateRequiredAirtime(packetSize, dataRate, type, m_mcs);
+}
+
+double
+AirtimeAdmissionControl::CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type,
+                                                  uint8_t mcs)
+{
+    NS_LOG_FUNCTION(this << packetSize << dataRate << type << (uint16_t)mcs);
     
-    // Total time per packet transmission
-    double timePerPacket = difs + avgBackoff + txTime + sifs + ackTime;
+    // Total time per packet transmission, from the precomputed cost table
+    double timePerPacket = GetTimePerPacket(packetSize, type, mcs);
     
     // Calculate packet rate from data rate
     double packetRate = dataRate / (packetSize * 8.0);
@@ -190,8 +303,9 @@ AirtimeAdmissionControl::RequestAdmission(FlowDescriptor& flow)
     
     m_totalFlowRequests++;
     
-    // Calculate required airtime for this flow
-    flow.requiredAirtime = CalculateRequiredAirtime(flow.packetSize, flow.dataRate, flow.type);
+    // Calculate required airtime for this flow at its station's current MCS
+    flow.requiredAirtime = CalculateRequiredAirtime(flow.packetSize, flow.dataRate, flow.type,
+                                                    GetStationMcs(flow.source));
     
     // Set QoS parameters
     flow.accessCategory = GetAccessCategory(flow.type);
@@ -207,6 +321,8 @@ AirtimeAdmissionControl::RequestAdmission(FlowDescriptor& flow)
         flow.admissionTime = Simulator::Now();
         
         m_admittedFlows[flow.flowId] = flow;
+        m_stationFlows[flow.source].insert(flow.flowId);
+        UpdateClassAggregates(flow, flow.requiredAirtime, 1);
         m_currentAirtimeUtilization = newUtilization;
         
         // Initialize flow statistics
@@ -221,6 +337,8 @@ AirtimeAdmissionControl::RequestAdmission(FlowDescriptor& flow)
         stats.minDelay = std::numeric_limits<double>::max();
         stats.firstPacketTime = Simulator::Now();
         stats.lastPacketTime = Simulator::Now();
+        stats.sentSequences = 0;
+        stats.rxSequences = 0;
         m_flowStats[flow.flowId] = stats;
         
         NS_LOG_INFO("Flow " << flow.flowId << " ADMITTED. Type=" << flow.type 
@@ -251,12 +369,141 @@ AirtimeAdmissionControl::ReleaseFlow(uint32_t flowId)
     auto it = m_admittedFlows.find(flowId);
     if (it != m_admittedFlows.end()) {
         m_currentAirtimeUtilization -= it->second.requiredAirtime;
+        UpdateClassAggregates(it->second, -it->second.requiredAirtime, -1);
+        
+        auto stationIt = m_stationFlows.find(it->second.source);
+        if (stationIt != m_stationFlows.end()) {
+            stationIt->second.erase(flowId);
+            if (stationIt->second.empty()) {
+                m_stationFlows.erase(stationIt);
+            }
+        }
         m_admittedFlows.erase(it);
         
         NS_LOG_INFO("Flow " << flowId << " released. New utilization=" << m_currentAirtimeUtilization);
     }
 }
 
+void
+AirtimeAdmissionControl::SetStationMcs(Mac48Address station, uint8_t mcs)
+{
+    NS_LOG_FUNCTION(this << station << (uint16_t)mcs);
+    NS_ASSERT(mcs < AIRTIME_TABLE_NUM_MCS);
+    
+    uint8_t oldMcs = GetStationMcs(station);
+    m_stationMcs[station] = mcs;
+    if (mcs == oldMcs) {
+        return;
+    }
+    
+    // Re-cost only the flows of this station
+    auto stationIt = m_stationFlows.find(station);
+    if (stationIt == m_stationFlows.end()) {
+        return;
+    }
+    
+    for (uint32_t flowId : stationIt->second) {
+        FlowDescriptor& flow = m_admittedFlows[flowId];
+        double newAirtime = CalculateRequiredAirtime(flow.packetSize, flow.dataRate, flow.type, mcs);
+        m_currentAirtimeUtilization += newAirtime - flow.requiredAirtime;
+        UpdateClassAggregates(flow, newAirtime - flow.requiredAirtime, 0);
+        flow.requiredAirtime = newAirtime;
+    }
+    
+    NS_LOG_INFO("Station " << station << " MCS " << (uint16_t)oldMcs << " -> " << (uint16_t)mcs
+                << ": re-costed " << stationIt->second.size() << " flows. New utilization="
+                << m_currentAirtimeUtilization);
+}
+
+uint8_t
+AirtimeAdmissionControl::GetStationMcs(Mac48Address station) const
+{
+    auto it = m_stationMcs.find(station);
+    if (it != m_stationMcs.end()) {
+        return it->second;
+    }
+    return m_mcs;
+}
+
+void
+AirtimeAdmissionControl::NotifyStationRate(Mac48Address station, uint64_t rate)
+{
+    NS_LOG_FUNCTION(this << station << rate);
+    
+    // Highest MCS whose rate does not exceed the reported one (MCS 0 as floor)
+    uint8_t mcs = 0;
+    for (uint8_t i = 1; i < AIRTIME_TABLE_NUM_MCS; i++) {
+        if (m_mcsDataRates[i] <= rate) {
+            mcs = i;
+        }
+    }
+    SetStationMcs(station, mcs);
+}
+
+bool
+AirtimeAdmissionControl::TrackStationRate(Ptr<WifiNetDevice> device)
+{
+    NS_LOG_FUNCTION(this << device);
+    
+    Mac48Address station = Mac48Address::ConvertFrom(device->GetAddress());
+    Ptr<WifiRemoteStationManager> manager = device->GetRemoteStationManager();
+    
+    if (manager->TraceConnectWithoutContext("Rate",
+                                            MakeCallback(&AirtimeAdmissionControl::RateTrace,
+                                                         this, station))) {
+        return true;
+    }
+    return manager->TraceConnectWithoutContext("RateChange",
+                                               MakeCallback(&AirtimeAdmissionControl::RateChangeTrace,
+                                                            this, station));
+}
+
+void
+AirtimeAdmissionControl::RateTrace(Mac48Address station, uint64_t /* oldRate */, uint64_t newRate)
+{
+    NotifyStationRate(station, newRate);
+}
+
+void
+AirtimeAdmissionControl::RateChangeTrace(Mac48Address station, DataRate /* oldRate */,
+                                         DataRate newRate, Mac48Address /* remote */)
+{
+    NotifyStationRate(station, newRate.GetBitRate());
+}
+
+void
+AirtimeAdmissionControl::UpdateClassAggregates(const FlowDescriptor& flow, double airtimeDelta,
+                                               int32_t flowDelta)
+{
+    NS_ASSERT(flow.type < AIRTIME_TABLE_NUM_TYPES);
+    NS_ASSERT(flow.accessCategory <= AC_VO);
+    
+    m_classAggregates.typeAirtime[flow.type] += airtimeDelta;
+    m_classAggregates.typeFlows[flow.type] += flowDelta;
+    m_classAggregates.acAirtime[flow.accessCategory] += airtimeDelta;
+    m_classAggregates.acFlows[flow.accessCategory] += flowDelta;
+}
+
+const ClassAggregates&
+AirtimeAdmissionControl::GetClassAggregates() const
+{
+    return m_classAggregates;
+}
+
+double
+AirtimeAdmissionControl::GetTrafficTypeUtilization(TrafficType type) const
+{
+    NS_ASSERT(type < AIRTIME_TABLE_NUM_TYPES);
+    return m_classAggregates.typeAirtime[type];
+}
+
+double
+AirtimeAdmissionControl::GetAccessCategoryUtilization(AcIndex ac) const
+{
+    NS_ASSERT(ac <= AC_VO);
+    return m_classAggregates.acAirtime[ac];
+}
+
 double
 AirtimeAdmissionControl::GetCurrentAirtimeUtilization() const
 {
@@ -296,18 +543,64 @@ AirtimeAdmissionControl::UpdateFlowStats(uint32_t flowId, uint32_t packetSize, d
         it->second.maxDelay = std::max(it->second.maxDelay, delay);
         it->second.minDelay = std::min(it->second.minDelay, delay);
         it->second.lastPacketTime = Simulator::Now();
-        it->second.delayVector.push_back(delay);
+        it->second.delaySummary.Add(delay);
     }
 }
 
-FlowStats
+void
+AirtimeAdmissionControl::RecordTxPacket(uint32_t flowId, uint32_t sequence)
+{
+    auto it = m_flowStats.find(flowId);
+    if (it != m_flowStats.end()) {
+        it->second.sentSequences = std::max(it->second.sentSequences, sequence + 1);
+    }
+}
+
+void
+AirtimeAdmissionControl::UpdateFlowStats(uint32_t flowId, uint32_t packetSize, double delay,
+                                         uint32_t sequence)
+{
+    auto it = m_flowStats.find(flowId);
+    if (it == m_flowStats.end()) {
+        return;
+    }
+    
+    FlowStats& stats = it->second;
+    if (sequence >= stats.receivedSequence.size()) {
+        stats.receivedSequence.resize(sequence + 1, false);
+    }
+    if (!stats.receivedSequence[sequence]) {
+        stats.receivedSequence[sequence] = true;
+        stats.rxSequences++;
+    }
+    
+    UpdateFlowStats(flowId, packetSize, delay);
+}
+
+const FlowStats&
 AirtimeAdmissionControl::GetFlowStats(uint32_t flowId) const
 {
+    static const FlowStats emptyStats = FlowStats();
+    
     auto it = m_flowStats.find(flowId);
     if (it != m_flowStats.end()) {
         return it->second;
     }
-    return FlowStats();
+    return emptyStats;
+}
+
+void
+AirtimeAdmissionControl::WriteFlowStats(std::ostream& os) const
+{
+    os << "FlowId,LostPackets,";
+    DelaySummary::WriteCsvHeader(os);
+    os << "\n";
+    
+    for (const auto& pair : m_flowStats) {
+        os << pair.first << "," << pair.second.GetLostPackets() << ",";
+        pair.second.delaySummary.WriteCsv(os);
+        os << "\n";
+    }
 }
 
 std::vector<FlowDescriptor>
@@ -330,6 +623,19 @@ AirtimeAdmissionControl::PrintStatistics(std::ostream& os) const
     os << "Admitted Flows: " << m_admittedFlows.size() << "\n";
     os << "Blocked Flows: " << m_blockedFlows << "\n";
     os << "Blocking Probability: " << GetBlockingProbability() << "\n";
+    
+    os << "\n=== Per-Class Airtime ===\n";
+    const char* typeNames[] = {"VoIP", "Video", "Bursty", "Web"};
+    for (uint8_t type = 0; type < AIRTIME_TABLE_NUM_TYPES; type++) {
+        os << typeNames[type] << ": " << m_classAggregates.typeFlows[type] << " flows, "
+           << m_classAggregates.typeAirtime[type] << " airtime\n";
+    }
+    const char* acNames[] = {"AC_BE", "AC_BK", "AC_VI", "AC_VO"};
+    for (uint8_t ac = AC_BE; ac <= AC_VO; ac++) {
+        os << acNames[ac] << ": " << m_classAggregates.acFlows[ac] << " flows, "
+           << m_classAggregates.acAirtime[ac] << " airtime\n";
+    }
+    
     os << "\n=== Per-Flow Statistics ===\n";
     
     for (const auto& pair : m_flowStats) {
@@ -347,10 +653,14 @@ AirtimeAdmissionControl::PrintStatistics(std::ostream& os) const
         os << "Flow " << flowId << ":\n";
         os << "  RX Packets: " << stats.rxPackets << "\n";
         os << "  RX Bytes: " << stats.rxBytes << "\n";
+        os << "  Lost Packets: " << stats.GetLostPackets() << "\n";
         os << "  Throughput: " << throughput << " Mbps\n";
         os << "  Avg Delay: " << avgDelay * 1000 << " ms\n";
         os << "  Min Delay: " << stats.minDelay * 1000 << " ms\n";
         os << "  Max Delay: " << stats.maxDelay * 1000 << " ms\n";
+        os << "  Delay Std Dev: " << stats.delaySummary.GetStdDev() * 1000 << " ms\n";
+        os << "  P95/P99 Delay: " << stats.delaySummary.GetQuantile(0.95) * 1000 << " / "
+           << stats.delaySummary.GetQuantile(0.99) * 1000 << " ms\n";
     }
 }
 
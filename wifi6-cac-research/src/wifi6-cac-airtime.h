@@ -16,7 +16,10 @@
 #include "ns3/core-module.h"
 #include "ns3/network-module.h"
 #include "ns3/wifi-module.h"
+#include "wifi6-cac-airtime-provider.h"
+#include "wifi6-cac-delay-stats.h"
 #include <map>
+#include <set>
 #include <vector>
 
 namespace ns3 {
@@ -64,7 +67,32 @@ struct FlowStats {
     double minDelay;
     Time firstPacketTime;
     Time lastPacketTime;
-    std::vector<double> delayVector; // For detailed analysis
+    uint32_t sentSequences;   // One past the highest sequence number sent
+    uint32_t rxSequences;     // Distinct sequence numbers received
+    std::vector<bool> receivedSequence; // Whether each sequence number was received
+    DelaySummary delaySummary; // Streaming mean/variance, quantiles and jitter
+
+    /**
+     * \brief Packets sent but not received so far (duplicates are not counted)
+     * \return sentSequences - rxSequences
+     */
+    uint64_t GetLostPackets() const
+    {
+        return sentSequences - rxSequences;
+    }
+};
+
+/**
+ * \brief Running per-class aggregates of admitted flows
+ *
+ * Maintained incrementally on admission, release and re-costing, so
+ * reading them never walks the flow table.
+ */
+struct ClassAggregates {
+    double typeAirtime[4] = {};   // Admitted airtime per TrafficType
+    uint32_t typeFlows[4] = {};   // Admitted flows per TrafficType
+    double acAirtime[4] = {};     // Admitted airtime per EDCA access category (AC_BE..AC_VO)
+    uint32_t acFlows[4] = {};     // Admitted flows per EDCA access category
 };
 
 /**
@@ -128,6 +156,58 @@ public:
      */
     double CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type);
     
+    /**
+     * \brief Calculate required airtime for a flow at a given MCS
+     * \param packetSize Average packet size in bytes
+     * \param dataRate Data rate in bps
+     * \param type Traffic type
+     * \param mcs HE MCS index (0-11)
+     * \return Required airtime fraction (0.0 to 1.0)
+     */
+    double CalculateRequiredAirtime(uint32_t packetSize, double dataRate, TrafficType type, uint8_t mcs);
+    
+    /**
+     * \brief Set the MCS currently used by a station
+     *
+     * Admitted flows sourced at the station are re-costed at the new MCS
+     * and the total utilization is adjusted by the difference; flows of
+     * other stations are not visited.
+     *
+     * \param station Station MAC address
+     * \param mcs HE MCS index (0-11)
+     */
+    void SetStationMcs(Mac48Address station, uint8_t mcs);
+    
+    /**
+     * \brief Get the MCS used to cost flows of a station
+     * \param station Station MAC address
+     * \return Last reported MCS, or the default MCS if none was reported
+     */
+    uint8_t GetStationMcs(Mac48Address station) const;
+    
+    /**
+     * \brief Report the data rate currently selected for a station
+     *
+     * The rate is mapped to the highest HE MCS whose data rate does not
+     * exceed it for the configured channel width, GI and NSS.
+     *
+     * \param station Station MAC address
+     * \param rate Data rate in bps
+     */
+    void NotifyStationRate(Mac48Address station, uint64_t rate);
+    
+    /**
+     * \brief Follow the rate selected by a station's remote station manager
+     *
+     * Connects to the manager's "Rate" trace (Ideal, Minstrel, ...) or, if
+     * absent, its "RateChange" trace (PARF, APARF, RRPAA). Meant for the
+     * station side of uplink flows, whose manager only tracks the AP.
+     *
+     * \param device Station WiFi device; flows are matched on its address
+     * \return true if a rate trace was connected
+     */
+    bool TrackStationRate(Ptr<WifiNetDevice> device);
+    
     /**
      * \brief Get current total airtime utilization
      * \return Current airtime utilization (0.0 to 1.0)
@@ -155,9 +235,19 @@ public:
     /**
      * \brief Get flow statistics
      * \param flowId Flow ID
-     * \return Flow statistics structure
+     * \return Flow statistics structure (empty statistics for unknown flows)
+     */
+    const FlowStats& GetFlowStats(uint32_t flowId) const;
+    
+    /**
+     * \brief Write per-flow delay summaries as CSV
+     *
+     * One row per flow: FlowId, LostPackets, the DelaySummary columns (delays in ms)
+     * and the jitter histogram.
+     *
+     * \param os Output stream
      */
-    FlowStats GetFlowStats(uint32_t flowId) const;
+    void WriteFlowStats(std::ostream& os) const;
     
     /**
      * \brief Update flow statistics
@@ -167,6 +257,46 @@ public:
      */
     void UpdateFlowStats(uint32_t flowId, uint32_t packetSize, double delay);
     
+    /**
+     * \brief Record a sequenced packet sent by a flow
+     * \param flowId Flow ID
+     * \param sequence Per-flow sequence number of the packet
+     */
+    void RecordTxPacket(uint32_t flowId, uint32_t sequence);
+
+    /**
+     * \brief Update flow statistics for a sequenced packet
+     *
+     * Each sequence number is counted as received once, so loss
+     * (sent - received, see RecordTxPacket) ignores duplicates.
+     *
+     * \param flowId Flow ID
+     * \param packetSize Packet size
+     * \param delay End-to-end delay
+     * \param sequence Per-flow sequence number of the packet
+     */
+    void UpdateFlowStats(uint32_t flowId, uint32_t packetSize, double delay, uint32_t sequence);
+    
+    /**
+     * \brief Get per-class airtime and flow count aggregates
+     * \return Reference to the running aggregates (valid for the lifetime of this object)
+     */
+    const ClassAggregates& GetClassAggregates() const;
+    
+    /**
+     * \brief Get airtime currently admitted for one traffic type
+     * \param type Traffic type
+     * \return Admitted airtime fraction of that type
+     */
+    double GetTrafficTypeUtilization(TrafficType type) const;
+    
+    /**
+     * \brief Get airtime currently admitted for one access category
+     * \param ac EDCA access category (AC_BE, AC_BK, AC_VI or AC_VO)
+     * \return Admitted airtime fraction of that access category
+     */
+    double GetAccessCategoryUtilization(AcIndex ac) const;
+    
     /**
      * \brief Get all admitted flows
      * \return Vector of admitted flow descriptors
@@ -180,11 +310,56 @@ public:
     
     /**
      * \brief Set WiFi PHY parameters for airtime calculation
+     *
+     * Rebuilds the per-packet airtime cost table for the new PHY
+     * configuration, so admission decisions become table lookups.
+     *
      * \param channelWidth Channel width in MHz
      * \param guardInterval Guard interval in nanoseconds
      * \param nss Number of spatial streams
+     * \param mcs HE MCS index (0-11) used for admission decisions
+     */
+    void SetWifiPhyParameters(uint16_t channelWidth, uint16_t guardInterval, uint8_t nss,
+                              uint8_t mcs = 5);
+
+    /**
+     * \brief Use the ns-3 PHY model for PPDU durations
+     *
+     * Replaces the hand-written HE timing with durations from the given
+     * provider and rebuilds the airtime cost table. Pass a null pointer
+     * to revert to the hand-written model.
+     *
+     * \param provider Airtime provider (may be shared with other controllers)
+     */
+    void SetAirtimeProvider(Ptr<WifiAirtimeProvider> provider);
+
+    /**
+     * \brief Get the channel access time of a single packet transmission
+     *
+     * Looks up the precomputed cost table (DIFS + backoff + PHY TX time +
+     * SIFS + ACK). Packets larger than the table range are computed directly.
+     *
+     * \param packetSize Packet size in bytes (without MAC overhead)
+     * \param type Traffic type
+     * \param mcs HE MCS index (0-11)
+     * \return Time per packet in seconds
+     */
+    double GetTimePerPacket(uint32_t packetSize, TrafficType type, uint8_t mcs) const;
+
+    /**
+     * \brief Write the airtime cost table as CSV
+     *
+     * Columns: ChannelWidth,Nss,GuardInterval,Mcs,TrafficType,PacketSize,TimePerPacket
+     * where PacketSize is the upper edge of each packet-size bucket.
+     *
+     * \param os Output stream
      */
-    void SetWifiPhyParameters(uint16_t channelWidth, uint16_t guardInterval, uint8_t nss);
+    void WriteAirtimeTable(std::ostream& os) const;
+
+    static const uint32_t AIRTIME_TABLE_BUCKET_BYTES = 8;    ///< Packet-size bucket width
+    static const uint32_t AIRTIME_TABLE_MAX_PACKET = 2304;   ///< Largest tabulated packet (max MSDU)
+    static const uint8_t AIRTIME_TABLE_NUM_MCS = 12;         ///< HE MCS 0-11
+    static const uint8_t AIRTIME_TABLE_NUM_TYPES = 4;        ///< Number of TrafficType values
 
 private:
     double m_airtimeThreshold;              ///< Maximum airtime threshold
@@ -195,25 +370,75 @@ private:
     
     std::map<uint32_t, FlowDescriptor> m_admittedFlows;  ///< Currently admitted flows
     std::map<uint32_t, FlowStats> m_flowStats;           ///< Flow statistics
+    ClassAggregates m_classAggregates;                   ///< Per-class running totals
     
     // WiFi PHY parameters for airtime calculation
     uint16_t m_channelWidth;     ///< Channel width in MHz
     uint16_t m_guardInterval;    ///< Guard interval in ns
     uint8_t m_nss;               ///< Number of spatial streams
+    uint8_t m_mcs;               ///< HE MCS index used for admission
+    Ptr<WifiAirtimeProvider> m_airtimeProvider;  ///< Optional PHY duration oracle
+    
+    std::map<Mac48Address, uint8_t> m_stationMcs;                ///< Last reported MCS per station
+    std::map<Mac48Address, std::set<uint32_t>> m_stationFlows;   ///< Admitted flow IDs per station
+    std::vector<uint64_t> m_mcsDataRates;                        ///< HE data rate (bps) per MCS
+    
+    /// Time per packet in seconds, indexed by [mcs][traffic type][size bucket]
+    std::vector<double> m_airtimeTable;
+    
+    /**
+     * \brief Rebuild the airtime cost table for the current PHY parameters
+     */
+    void BuildAirtimeTable();
+    
+    /**
+     * \brief Apply an airtime and flow count change to the per-class aggregates
+     * \param flow Admitted flow
+     * \param airtimeDelta Airtime to add (negative to remove)
+     * \param flowDelta Flow count change (+1, -1 or 0)
+     */
+    void UpdateClassAggregates(const FlowDescriptor& flow, double airtimeDelta, int32_t flowDelta);
+    
+    /**
+     * \brief Trace sink for TracedValue-based rate traces
+     * \param station Station bound at connection time
+     * \param oldRate Previous rate in bps
+     * \param newRate New rate in bps
+     */
+    void RateTrace(Mac48Address station, uint64_t oldRate, uint64_t newRate);
+    
+    /**
+     * \brief Trace sink for RateChange traces
+     * \param station Station bound at connection time
+     * \param oldRate Previous rate
+     * \param newRate New rate
+     * \param remote Peer address reported by the manager
+     */
+    void RateChangeTrace(Mac48Address station, DataRate oldRate, DataRate newRate, Mac48Address remote);
     
     /**
      * \brief Calculate PHY transmission time
      * \param packetSize Packet size in bytes
+     * \param mcs HE MCS index (0-11)
      * \return Transmission time in seconds
      */
-    double CalculatePhyTxTime(uint32_t packetSize);
+    double CalculatePhyTxTime(uint32_t packetSize, uint8_t mcs) const;
+    
+    /**
+     * \brief Calculate channel access time of one packet from scratch
+     * \param packetSize Packet size in bytes (without MAC overhead)
+     * \param type Traffic type
+     * \param mcs HE MCS index (0-11)
+     * \return Time per packet in seconds
+     */
+    double CalculateTimePerPacket(uint32_t packetSize, TrafficType type, uint8_t mcs) const;
     
     /**
      * \brief Get MAC overhead for traffic type
      * \param type Traffic type
      * \return MAC overhead in bytes
      */
-    uint32_t GetMacOverhead(TrafficType type);
+    uint32_t GetMacOverhead(TrafficType type) const;
     
     /**
      * \brief Get access category for traffic type
@@ -0,0 +1,222 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * WiFi 6 CAC Delay Statistics Implementation
+ */
+
+#include "wifi6-cac-delay-stats.h"
+#include "ns3/assert.h"
+#include <algorithm>
+#include <cmath>
+
+namespace ns3 {
+
+const uint32_t DelaySummary::JITTER_BINS;
+constexpr double DelaySummary::JITTER_BIN_WIDTH;
+const uint32_t DelaySummary::MAX_SKETCH_BINS;
+
+namespace {
+
+/// Delays below 1 ns are counted in the sketch's zero bucket
+const double kMinIndexableDelay = 1e-9;
+
+} // namespace
+
+DelaySummary::DelaySummary(double relativeAccuracy)
+    : m_count(0),
+      m_mean(0.0),
+      m_m2(0.0),
+      m_min(0.0),
+      m_max(0.0),
+      m_gamma((1.0 + relativeAccuracy) / (1.0 - relativeAccuracy)),
+      m_logGamma(std::log(m_gamma)),
+      m_zeroCount(0),
+      m_jitterHistogram(JITTER_BINS + 1, 0),
+      m_lastDelay(0.0)
+{
+    NS_ASSERT(relativeAccuracy > 0.0 && relativeAccuracy < 1.0);
+}
+
+void
+DelaySummary::Add(double delay)
+{
+    // Jitter between consecutive packets
+    if (m_count > 0) {
+        uint32_t bin = static_cast<uint32_t>(std::fabs(delay - m_lastDelay) / JITTER_BIN_WIDTH);
+        m_jitterHistogram[std::min(bin, JITTER_BINS)]++;
+    }
+    m_lastDelay = delay;
+
+    // Welford update
+    m_count++;
+    double deviation = delay - m_mean;
+    m_mean += deviation / m_count;
+    m_m2 += deviation * (delay - m_mean);
+    m_min = (m_count == 1) ? delay : std::min(m_min, delay);
+    m_max = (m_count == 1) ? delay : std::max(m_max, delay);
+
+    // Quantile sketch
+    if (delay < kMinIndexableDelay) {
+        m_zeroCount++;
+    } else {
+        m_buckets[GetBucketIndex(delay)]++;
+        if (m_buckets.size() > MAX_SKETCH_BINS) {
+            CollapseSketch();
+        }
+    }
+}
+
+void
+DelaySummary::Merge(const DelaySummary& other)
+{
+    NS_ASSERT_MSG(std::fabs(m_gamma - other.m_gamma) < 1e-12, "Merging sketches of different accuracy");
+
+    if (other.m_count == 0) {
+        return;
+    }
+    if (m_count == 0) {
+        m_min = other.m_min;
+        m_max = other.m_max;
+    } else {
+        m_min = std::min(m_min, other.m_min);
+        m_max = std::max(m_max, other.m_max);
+    }
+
+    // Chan et al. parallel combination of the moments
+    uint64_t total = m_count + other.m_count;
+    double deviation = other.m_mean - m_mean;
+    m_m2 += other.m_m2 + deviation * deviation * m_count * other.m_count / total;
+    m_mean += deviation * other.m_count / total;
+    m_count = total;
+
+    m_zeroCount += other.m_zeroCount;
+    for (const auto& bucket : other.m_buckets) {
+        m_buckets[bucket.first] += bucket.second;
+    }
+    if (m_buckets.size() > MAX_SKETCH_BINS) {
+        CollapseSketch();
+    }
+
+    for (uint32_t i = 0; i <= JITTER_BINS; i++) {
+        m_jitterHistogram[i] += other.m_jitterHistogram[i];
+    }
+}
+
+uint64_t
+DelaySummary::GetCount() const
+{
+    return m_count;
+}
+
+double
+DelaySummary::GetMean() const
+{
+    return m_mean;
+}
+
+double
+DelaySummary::GetVariance() const
+{
+    return (m_count > 1) ? m_m2 / (m_count - 1) : 0.0;
+}
+
+double
+DelaySummary::GetStdDev() const
+{
+    return std::sqrt(GetVariance());
+}
+
+double
+DelaySummary::GetMin() const
+{
+    return m_min;
+}
+
+double
+DelaySummary::GetMax() const
+{
+    return m_max;
+}
+
+double
+DelaySummary::GetQuantile(double q) const
+{
+    NS_ASSERT(q >= 0.0 && q <= 1.0);
+
+    if (m_count == 0) {
+        return 0.0;
+    }
+
+    uint64_t rank = static_cast<uint64_t>(q * (m_count - 1));
+    if (rank < m_zeroCount) {
+        return 0.0;
+    }
+
+    uint64_t seen = m_zeroCount;
+    for (const auto& bucket : m_buckets) {
+        seen += bucket.second;
+        if (seen > rank) {
+            // Clamp to the exact extremes tracked by Welford
+            return std::min(std::max(GetBucketValue(bucket.first), m_min), m_max);
+        }
+    }
+    return m_max;
+}
+
+const std::vector<uint64_t>&
+DelaySummary::GetJitterHistogram() const
+{
+    return m_jitterHistogram;
+}
+
+void
+DelaySummary::WriteCsvHeader(std::ostream& os)
+{
+    os << "Packets,MeanDelay,StdDevDelay,MinDelay,MaxDelay,P50Delay,P95Delay,P99Delay";
+    for (uint32_t i = 0; i <= JITTER_BINS; i++) {
+        os << ",JitterBin" << i;
+    }
+}
+
+void
+DelaySummary::WriteCsv(std::ostream& os) const
+{
+    os << m_count << ","
+       << GetMean() * 1000 << ","
+       << GetStdDev() * 1000 << ","
+       << GetMin() * 1000 << ","
+       << GetMax() * 1000 << ","
+       << GetQuantile(0.50) * 1000 << ","
+       << GetQuantile(0.95) * 1000 << ","
+       << GetQuantile(0.99) * 1000;
+    for (uint64_t count : m_jitterHistogram) {
+        os << "," << count;
+    }
+}
+
+int32_t
+DelaySummary::GetBucketIndex(double value) const
+{
+    return static_cast<int32_t>(std::ceil(std::log(value) / m_logGamma));
+}
+
+double
+DelaySummary::GetBucketValue(int32_t index) const
+{
+    return 2.0 * std::pow(m_gamma, index) / (m_gamma + 1.0);
+}
+
+void
+DelaySummary::CollapseSketch()
+{
+    // Lowest quantiles lose accuracy first; the tail (p95/p99) is preserved
+    while (m_buckets.size() > MAX_SKETCH_BINS) {
+        auto lowest = m_buckets.begin();
+        auto next = std::next(lowest);
+        next->second += lowest->second;
+        m_buckets.erase(lowest);
+    }
+}
+
+} // namespace ns3
@@ -0,0 +1,163 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * WiFi 6 CAC Delay Statistics
+ * Constant-memory streaming summary of per-flow packet delays
+ */
+
+#ifndef WIFI6_CAC_DELAY_STATS_H
+#define WIFI6_CAC_DELAY_STATS_H
+
+#include <cstdint>
+#include <map>
+#include <ostream>
+#include <vector>
+
+namespace ns3 {
+
+/**
+ * \brief Streaming summary of packet delays
+ *
+ * Combines Welford's running mean/variance, a DDSketch quantile sketch
+ * with bounded relative error and a fixed-bin histogram of the delay
+ * variation between consecutive packets (jitter). Memory use does not
+ * grow with the number of samples, and summaries of several flows or
+ * runs can be merged.
+ */
+class DelaySummary
+{
+public:
+    static const uint32_t JITTER_BINS = 40;        ///< Regular jitter bins (plus one overflow bin)
+    static constexpr double JITTER_BIN_WIDTH = 0.5e-3;  ///< Jitter bin width in seconds
+    static const uint32_t MAX_SKETCH_BINS = 2048;  ///< Sketch bins kept before collapsing the lowest
+
+    /**
+     * \brief Constructor
+     * \param relativeAccuracy Relative error bound of quantile estimates
+     */
+    DelaySummary(double relativeAccuracy = 0.01);
+
+    /**
+     * \brief Add a delay sample
+     * \param delay Delay in seconds
+     */
+    void Add(double delay);
+
+    /**
+     * \brief Merge another summary into this one
+     * \param other Summary built with the same relative accuracy
+     */
+    void Merge(const DelaySummary& other);
+
+    /**
+     * \brief Get number of samples
+     * \return Sample count
+     */
+    uint64_t GetCount() const;
+
+    /**
+     * \brief Get mean delay
+     * \return Mean in seconds (0 if empty)
+     */
+    double GetMean() const;
+
+    /**
+     * \brief Get sample variance of the delay
+     * \return Variance in s^2 (0 with fewer than two samples)
+     */
+    double GetVariance() const;
+
+    /**
+     * \brief Get sample standard deviation of the delay
+     * \return Standard deviation in seconds
+     */
+    double GetStdDev() const;
+
+    /**
+     * \brief Get smallest delay
+     * \return Minimum in seconds (0 if empty)
+     */
+    double GetMin() const;
+
+    /**
+     * \brief Get largest delay
+     * \return Maximum in seconds (0 if empty)
+     */
+    double GetMax() const;
+
+    /**
+     * \brief Estimate a delay quantile
+     * \param q Quantile in [0, 1]
+     * \return Delay in seconds, within the relative accuracy (0 if empty)
+     */
+    double GetQuantile(double q) const;
+
+    /**
+     * \brief Get the jitter histogram
+     *
+     * Bin i counts inter-packet delay variations in
+     * [i * JITTER_BIN_WIDTH, (i + 1) * JITTER_BIN_WIDTH); the last bin
+     * counts everything from JITTER_BINS * JITTER_BIN_WIDTH upwards.
+     *
+     * \return JITTER_BINS + 1 counters
+     */
+    const std::vector<uint64_t>& GetJitterHistogram() const;
+
+    /**
+     * \brief Write the CSV column names matching WriteCsv
+     * \param os Output stream
+     */
+    static void WriteCsvHeader(std::ostream& os);
+
+    /**
+     * \brief Write the summary as CSV fields (delays in ms, no line end)
+     * \param os Output stream
+     */
+    void WriteCsv(std::ostream& os) const;
+
+private:
+    /**
+     * \brief Sketch bucket of a positive value
+     * \param value Value in seconds
+     * \return Bucket index
+     */
+    int32_t GetBucketIndex(double value) const;
+
+    /**
+     * \brief Representative value of a sketch bucket
+     * \param index Bucket index
+     * \return Value in seconds
+     */
+    double GetBucketValue(int32_t index) const;
+
+    /**
+     * \brief Fold the lowest buckets together until the sketch fits MAX_SKETCH_BINS
+     */
+    void CollapseSketch();
+
+    // Welford running moments
+    uint64_t m_count;            ///< Number of samples
+    double m_mean;               ///< Running mean
+    double m_m2;                 ///< Sum of squared deviations from the mean
+    double m_min;                ///< Smallest sample
+    double m_max;                ///< Largest sample
+
+    // DDSketch
+    double m_gamma;              ///< Bucket growth factor (1 + a) / (1 - a)
+    double m_logGamma;           ///< ln(m_gamma)
+    uint64_t m_zeroCount;        ///< Samples too small to index
+    std::map<int32_t, uint64_t> m_buckets;  ///< Sparse bucket counts
+
+    // Jitter
+    std::vector<uint64_t> m_jitterHistogram;  ///< Fixed-bin jitter counts
+    double m_lastDelay;          ///< Previous sample, for jitter
+};
+
+} // namespace ns3
+
+#endif /* WIFI6_CAC_DELAY_STATS_H */
@@ -0,0 +1,118 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * WiFi 6 CAC Run Metrics Implementation
+ */
+
+#include "wifi6-cac-metrics.h"
+#include "ns3/abort.h"
+#include <cmath>
+#include <cstdio>
+#include <fstream>
+#include <limits>
+#include <sstream>
+
+namespace ns3 {
+
+namespace {
+
+/// JSON string literal of a string
+std::string
+Quote(const std::string& value)
+{
+    std::string quoted = "\"";
+    for (char c : value) {
+        switch (c) {
+            case '"':
+                quoted += "\\\"";
+                break;
+            case '\\':
+                quoted += "\\\\";
+                break;
+            case '\n':
+                quoted += "\\n";
+                break;
+            case '\t':
+                quoted += "\\t";
+                break;
+            default:
+                if (static_cast<unsigned char>(c) < 0x20) {
+                    char escaped[8];
+                    std::snprintf(escaped, sizeof(escaped), "\\u%04x", c);
+                    quoted += escaped;
+                } else {
+                    quoted += c;
+                }
+        }
+    }
+    return quoted + "\"";
+}
+
+} // namespace
+
+MetricsRecord&
+MetricsRecord::SetJson(const std::string& name, const std::string& json)
+{
+    for (auto& field : m_fields) {
+        if (field.first == name) {
+            field.second = json;
+            return *this;
+        }
+    }
+    m_fields.emplace_back(name, json);
+    return *this;
+}
+
+MetricsRecord&
+MetricsRecord::SetDouble(const std::string& name, double value)
+{
+    if (!std::isfinite(value)) {
+        return SetJson(name, "null");
+    }
+    std::ostringstream json;
+    json.precision(std::numeric_limits<double>::max_digits10);
+    json << value;
+    return SetJson(name, json.str());
+}
+
+MetricsRecord&
+MetricsRecord::SetInteger(const std::string& name, int64_t value)
+{
+    return SetJson(name, std::to_string(value));
+}
+
+MetricsRecord&
+MetricsRecord::SetBool(const std::string& name, bool value)
+{
+    return SetJson(name, value ? "true" : "false");
+}
+
+MetricsRecord&
+MetricsRecord::SetString(const std::string& name, const std::string& value)
+{
+    return SetJson(name, Quote(value));
+}
+
+std::string
+MetricsRecord::ToJson() const
+{
+    std::string json = "{";
+    for (size_t i = 0; i < m_fields.size(); ++i) {
+        if (i > 0) {
+            json += ", ";
+        }
+        json += Quote(m_fields[i].first) + ": " + m_fields[i].second;
+    }
+    return json + "}";
+}
+
+void
+MetricsRecord::Append(const std::string& filename) const
+{
+    std::ofstream file(filename, std::ios::app);
+    NS_ABORT_MSG_UNLESS(file.is_open(), "Cannot open metrics file " << filename);
+    file << ToJson() << "\n";
+}
+
+} // namespace ns3
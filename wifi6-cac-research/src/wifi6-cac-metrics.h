@@ -0,0 +1,92 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * WiFi 6 CAC Run Metrics
+ * One machine-readable record of summary metrics per simulation run
+ */
+
+#ifndef WIFI6_CAC_METRICS_H
+#define WIFI6_CAC_METRICS_H
+
+#include <cstdint>
+#include <string>
+#include <utility>
+#include <vector>
+
+namespace ns3 {
+
+/**
+ * \brief Summary metrics of one simulation run, written as a JSON line
+ *
+ * Fields keep their insertion order. Append() adds the record as one line
+ * to a JSON-lines file, so the runs of a sweep (or of several scenarios)
+ * can share a file; scripts/sim_metrics.py reads it back. Non-finite
+ * numbers are written as null.
+ */
+class MetricsRecord
+{
+public:
+    /**
+     * \brief Set a numeric field
+     * \param name Field name
+     * \param value Value
+     * \return this record
+     */
+    MetricsRecord& SetDouble(const std::string& name, double value);
+
+    /**
+     * \brief Set an integer field
+     * \param name Field name
+     * \param value Value
+     * \return this record
+     */
+    MetricsRecord& SetInteger(const std::string& name, int64_t value);
+
+    /**
+     * \brief Set a boolean field
+     * \param name Field name
+     * \param value Value
+     * \return this record
+     */
+    MetricsRecord& SetBool(const std::string& name, bool value);
+
+    /**
+     * \brief Set a string field
+     * \param name Field name
+     * \param value Value
+     * \return this record
+     */
+    MetricsRecord& SetString(const std::string& name, const std::string& value);
+
+    /**
+     * \brief Format the record
+     * \return the record as a single-line JSON object
+     */
+    std::string ToJson() const;
+
+    /**
+     * \brief Append the record as one line to a JSON-lines file
+     * \param filename Output file (created if missing)
+     */
+    void Append(const std::string& filename) const;
+
+private:
+    /**
+     * \brief Set a field to an already formatted JSON value
+     * \param name Field name
+     * \param json JSON value
+     * \return this record
+     */
+    MetricsRecord& SetJson(const std::string& name, const std::string& json);
+
+    std::vector<std::pair<std::string, std::string>> m_fields;  ///< (name, JSON value) in order
+};
+
+} // namespace ns3
+
+#endif /* WIFI6_CAC_METRICS_H */
@@ -15,24 +15,27 @@
 #include "ns3/applications-module.h"
 #include "ns3/flow-monitor-module.h"
 #include "wifi6-cac-airtime.h"
+#include "wifi6-cac-trace-sink.h"
 
 #include <fstream>
 #include <vector>
 #include <map>
+#include <memory>
 
 using namespace ns3;
 
 NS_LOG_COMPONENT_DEFINE("Wifi6CacSimulation");
 
 // Global variables for statistics
-std::map<uint32_t, Time> g_txTimeMap;  // Track packet transmission times
-std::map<uint32_t, uint32_t> g_flowIdMap;  // Map packet UID to flow ID
 Ptr<AirtimeAdmissionControl> g_cac;
-std::ofstream g_throughputFile;
-std::ofstream g_delayFile;
-std::ofstream g_admissionFile;
+std::unique_ptr<TraceSink> g_throughputTrace;
+std::unique_ptr<DelayTraceSampler> g_delayTrace;
+std::unique_ptr<TraceSink> g_admissionTrace;
 
-// Packet tagging for flow identification
+// Traffic type codes as written to the trace files
+const std::vector<std::string> g_trafficTypeLabels = {"VOIP", "VIDEO", "BURSTY", "WEB"};
+
+// Packet tagging for flow identification, sequencing and delay measurement
 class FlowIdTag : public Tag
 {
 public:
@@ -48,10 +51,18 @@ public:
     
     void SetTrafficType(TrafficType type) { m_type = type; }
     TrafficType GetTrafficType(void) const { return m_type; }
+    
+    void SetSequence(uint32_t sequence) { m_sequence = sequence; }
+    uint32_t GetSequence(void) const { return m_sequence; }
+    
+    void SetTxTime(Time txTime) { m_txTime = txTime; }
+    Time GetTxTime(void) const { return m_txTime; }
 
 private:
     uint32_t m_flowId;
     TrafficType m_type;
+    uint32_t m_sequence;   // Per-flow packet sequence number
+    Time m_txTime;         // Application transmit time
 };
 
 TypeId
@@ -72,7 +83,7 @@ FlowIdTag::GetInstanceTypeId(void) const
 uint32_t
 FlowIdTag::GetSerializedSize(void) const
 {
-    return 8;  // 4 bytes for flowId + 4 bytes for type
+    return 20;  // 4 bytes flowId + 4 bytes type + 4 bytes sequence + 8 bytes TX time
 }
 
 void
@@ -80,6 +91,8 @@ FlowIdTag::Serialize(TagBuffer i) const
 {
     i.WriteU32(m_flowId);
     i.WriteU32(static_cast<uint32_t>(m_type));
+    i.WriteU32(m_sequence);
+    i.WriteU64(m_txTime.GetTimeStep());
 }
 
 void
@@ -87,23 +100,28 @@ FlowIdTag::Deserialize(TagBuffer i)
 {
     m_flowId = i.ReadU32();
     m_type = static_cast<TrafficType>(i.ReadU32());
+    m_sequence = i.ReadU32();
+    m_txTime = TimeStep(i.ReadU64());
 }
 
 void
 FlowIdTag::Print(std::ostream &os) const
 {
-    os << "FlowId=" << m_flowId << " Type=" << m_type;
+    os << "FlowId=" << m_flowId << " Type=" << m_type
+       << " Seq=" << m_sequence << " TxTime=" << m_txTime;
 }
 
-// Packet transmission callback
+// Tag an outgoing packet with its flow, sequence number and transmit time
 void
-TxCallback(Ptr<const Packet> packet)
+TagPacket(Ptr<Packet> packet, uint32_t flowId, TrafficType type, uint32_t sequence)
 {
     FlowIdTag tag;
-    if (packet->PeekPacketTag(tag)) {
-        g_txTimeMap[packet->GetUid()] = Simulator::Now();
-        g_flowIdMap[packet->GetUid()] = tag.GetFlowId();
-    }
+    tag.SetFlowId(flowId);
+    tag.SetTrafficType(type);
+    tag.SetSequence(sequence);
+    tag.SetTxTime(Simulator::Now());
+    packet->AddPacketTag(tag);
+    g_cac->RecordTxPacket(flowId, sequence);
 }
 
 // Packet reception callback
@@ -112,24 +130,16 @@ RxCallback(Ptr<const Packet> packet, const Address &address)
 {
     FlowIdTag tag;
     if (packet->PeekPacketTag(tag)) {
-        uint32_t uid = packet->GetUid();
-        auto it = g_txTimeMap.find(uid);
+        Time delay = Simulator::Now() - tag.GetTxTime();
+        double delayMs = delay.GetMilliSeconds();
         
-        if (it != g_txTimeMap.end()) {
-            Time delay = Simulator::Now() - it->second;
-            double delayMs = delay.GetMilliSeconds();
-            
-            // Update CAC statistics
-            g_cac->UpdateFlowStats(tag.GetFlowId(), packet->GetSize(), delay.GetSeconds());
-            
-            // Log delay for analysis
-            g_delayFile << Simulator::Now().GetSeconds() << ","
-                       << tag.GetFlowId() << ","
-                       << tag.GetTrafficType() << ","
-                       << delayMs << "\n";
-            
-            g_txTimeMap.erase(it);
-        }
+        // Update CAC statistics (loss is sent minus received sequence numbers)
+        g_cac->UpdateFlowStats(tag.GetFlowId(), packet->GetSize(), delay.GetSeconds(),
+                               tag.GetSequence());
+        
+        // Log delay for analysis
+        g_delayTrace->Record(Simulator::Now().GetSeconds(), tag.GetFlowId(),
+                             tag.GetTrafficType(), delayMs);
     }
 }
 
@@ -220,13 +230,9 @@ VoipApplication::SendPacket(void)
     Ptr<Packet> packet = Create<Packet>(m_packetSize);
     
     // Add flow ID tag
-    FlowIdTag tag;
-    tag.SetFlowId(m_flowId);
-    tag.SetTrafficType(VOIP);
-    packet->AddPacketTag(tag);
+    TagPacket(packet, m_flowId, VOIP, m_packetsSent);
     
     m_socket->Send(packet);
-    TxCallback(packet);
     
     if (++m_packetsSent < m_nPackets) {
         ScheduleTx();
@@ -264,6 +270,7 @@ private:
     DataRate m_baseDataRate;
     EventId m_sendEvent;
     bool m_running;
+    uint32_t m_packetsSent;
     uint32_t m_flowId;
     Ptr<UniformRandomVariable> m_rateVariation;
 };
@@ -274,6 +281,7 @@ VideoStreamApplication::VideoStreamApplication()
       m_basePacketSize(0),
       m_baseDataRate(0),
       m_running(false),
+      m_packetsSent(0),
       m_flowId(0)
 {
     m_rateVariation = CreateObject<UniformRandomVariable>();
@@ -301,6 +309,7 @@ void
 VideoStreamApplication::StartApplication(void)
 {
     m_running = true;
+    m_packetsSent = 0;
     m_socket->Bind();
     m_socket->Connect(m_peer);
     SendPacket();
@@ -329,13 +338,9 @@ VideoStreamApplication::SendPacket(void)
     
     Ptr<Packet> packet = Create<Packet>(packetSize);
     
-    FlowIdTag tag;
-    tag.SetFlowId(m_flowId);
-    tag.SetTrafficType(VIDEO_STREAM);
-    packet->AddPacketTag(tag);
+    TagPacket(packet, m_flowId, VIDEO_STREAM, m_packetsSent++);
     
     m_socket->Send(packet);
-    TxCallback(packet);
     
     if (m_running) {
         Time tNext(Seconds(packetSize * 8 / static_cast<double>(m_baseDataRate.GetBitRate())));
@@ -357,6 +362,14 @@ main(int argc, char *argv[])
     bool enableCac = true;             // Enable/disable CAC
     uint32_t channelWidth = 80;        // Channel width in MHz
     std::string outputPrefix = "wifi6-cac";
+    std::string airtimeTableFile = "";  // Optional CSV dump of the CAC airtime cost table
+    bool usePhyAirtime = false;        // Use WifiPhy PPDU durations in the CAC
+    std::string rateManager = "ns3::ConstantRateWifiManager";  // Rate control algorithm
+    std::string traceFormat = "csv";   // Trace output format (csv or binary)
+    std::string delayTrace = "all";    // Delay trace decimation (all/sample/window/reservoir)
+    uint32_t delaySampleRate = 10;     // 1-in-N packets per flow for delayTrace=sample
+    double delayWindow = 100.0;        // Window length in ms for delayTrace=window
+    uint32_t delayReservoir = 1000;    // Samples per flow for delayTrace=reservoir
     
     // Command line arguments
     CommandLine cmd;
@@ -370,6 +383,15 @@ main(int argc, char *argv[])
     cmd.AddValue("enableCac", "Enable CAC (1=yes, 0=no)", enableCac);
     cmd.AddValue("channelWidth", "Channel width (20/40/80/160 MHz)", channelWidth);
     cmd.AddValue("outputPrefix", "Output file prefix", outputPrefix);
+    cmd.AddValue("airtimeTable", "Write the CAC airtime cost table to this CSV file", airtimeTableFile);
+    cmd.AddValue("rateManager", "Remote station manager (e.g. ns3::IdealWifiManager, ns3::MinstrelHtWifiManager)",
+                 rateManager);
+    cmd.AddValue("usePhyAirtime", "Compute CAC airtime from the WifiPhy model (1=yes, 0=no)", usePhyAirtime);
+    cmd.AddValue("traceFormat", "Format of the delay/throughput/admission traces (csv or binary)", traceFormat);
+    cmd.AddValue("delayTrace", "Delay trace mode (all, sample, window, reservoir)", delayTrace);
+    cmd.AddValue("delaySampleRate", "Trace 1 in N packets per flow (delayTrace=sample)", delaySampleRate);
+    cmd.AddValue("delayWindow", "Aggregation window in ms (delayTrace=window)", delayWindow);
+    cmd.AddValue("delayReservoir", "Delay samples kept per flow (delayTrace=reservoir)", delayReservoir);
     cmd.Parse(argc, argv);
     
     // Enable logging
@@ -385,18 +407,39 @@ main(int argc, char *argv[])
     NS_LOG_INFO("Airtime threshold: " << airtimeThreshold);
     
     // Open output files
-    g_throughputFile.open(outputPrefix + "-throughput.csv");
-    g_delayFile.open(outputPrefix + "-delay.csv");
-    g_admissionFile.open(outputPrefix + "-admission.csv");
-    
-    g_throughputFile << "Time,FlowId,TrafficType,Throughput\n";
-    g_delayFile << "Time,FlowId,TrafficType,Delay\n";
-    g_admissionFile << "FlowId,TrafficType,Admitted,RequiredAirtime\n";
+    g_throughputTrace = CreateTraceSink(traceFormat, outputPrefix + "-throughput",
+                                        {{"Time", TRACE_F64, {}},
+                                         {"FlowId", TRACE_U32, {}},
+                                         {"TrafficType", TRACE_U8, {}},
+                                         {"Throughput", TRACE_F64, {}}});
+    DelayTraceMode delayTraceMode = DelayTraceSampler::ParseMode(delayTrace);
+    std::string delayTraceName = (delayTraceMode == DELAY_TRACE_WINDOW) ? "-delaywindow" : "-delay";
+    g_delayTrace.reset(new DelayTraceSampler(delayTraceMode,
+                                             CreateTraceSink(traceFormat, outputPrefix + delayTraceName,
+                                                             DelayTraceSampler::GetColumns(delayTraceMode))));
+    g_delayTrace->SetSampleRate(delaySampleRate);
+    g_delayTrace->SetWindow(delayWindow / 1000.0);
+    g_delayTrace->SetReservoirSize(delayReservoir);
+    g_admissionTrace = CreateTraceSink(traceFormat, outputPrefix + "-admission",
+                                       {{"FlowId", TRACE_U32, {}},
+                                        {"TrafficType", TRACE_U8, g_trafficTypeLabels},
+                                        {"Admitted", TRACE_U8, {}},
+                                        {"RequiredAirtime", TRACE_F64, {}}});
     
     // Create CAC controller
     g_cac = CreateObject<AirtimeAdmissionControl>();
     g_cac->SetAirtimeThreshold(airtimeThreshold);
     g_cac->SetWifiPhyParameters(channelWidth, 800, 2);  // 80 MHz, 800ns GI, 2 SS
+    if (usePhyAirtime) {
+        g_cac->SetAirtimeProvider(CreateObject<WifiAirtimeProvider>());
+    }
+    
+    if (!airtimeTableFile.empty()) {
+        std::ofstream tableFile(airtimeTableFile);
+        g_cac->WriteAirtimeTable(tableFile);
+        tableFile.close();
+        NS_LOG_INFO("Airtime cost table written to " << airtimeTableFile);
+    }
     
     // Create nodes
     NodeContainer wifiStaNodes;
@@ -419,9 +462,13 @@ main(int argc, char *argv[])
     
     WifiHelper wifi;
     wifi.SetStandard(WIFI_STANDARD_80211ax);
-    wifi.SetRemoteStationManager("ns3::ConstantRateWifiManager",
-                                  "DataMode", StringValue("HeMcs5"),
-                                  "ControlMode", StringValue("HeMcs0"));
+    if (rateManager == "ns3::ConstantRateWifiManager") {
+        wifi.SetRemoteStationManager("ns3::ConstantRateWifiManager",
+                                      "DataMode", StringValue("HeMcs5"),
+                                      "ControlMode", StringValue("HeMcs0"));
+    } else {
+        wifi.SetRemoteStationManager(rateManager);
+    }
     
     WifiMacHelper mac;
     Ssid ssid = Ssid("wifi6-cac-network");
@@ -439,6 +486,11 @@ main(int argc, char *argv[])
     
     NetDeviceContainer apDevice = wifi.Install(phy, mac, wifiApNode);
     
+    // Per-station MCS-aware airtime accounting (uplink flows, so follow the STA side)
+    for (uint32_t i = 0; i < staDevices.GetN(); i++) {
+        g_cac->TrackStationRate(DynamicCast<WifiNetDevice>(staDevices.Get(i)));
+    }
+    
     // Mobility model - dense deployment
     MobilityHelper mobility;
     
@@ -509,8 +561,10 @@ main(int argc, char *argv[])
             flow.admitted = true;
         }
         
-        g_admissionFile << flow.flowId << ",VOIP," << admitted << "," 
-                       << flow.requiredAirtime << "\n";
+        g_admissionTrace->Append({static_cast<double>(flow.flowId),
+                                  static_cast<double>(VOIP),
+                                  static_cast<double>(admitted),
+                                  flow.requiredAirtime});
         
         if (admitted) {
             Ptr<Socket> socket = Socket::CreateSocket(wifiStaNodes.Get(i), UdpSocketFactory::GetTypeId());
@@ -544,8 +598,10 @@ main(int argc, char *argv[])
             flow.admitted = true;
         }
         
-        g_admissionFile << flow.flowId << ",VIDEO," << admitted << "," 
-                       << flow.requiredAirtime << "\n";
+        g_admissionTrace->Append({static_cast<double>(flow.flowId),
+                                  static_cast<double>(VIDEO_STREAM),
+                                  static_cast<double>(admitted),
+                                  flow.requiredAirtime});
         
         if (admitted) {
             Ptr<Socket> socket = Socket::CreateSocket(wifiStaNodes.Get(nodeIdx), UdpSocketFactory::GetTypeId());
@@ -582,8 +638,10 @@ main(int argc, char *argv[])
             flow.admitted = true;
         }
         
-        g_admissionFile << flow.flowId << ",BURSTY," << admitted << "," 
-                       << flow.requiredAirtime << "\n";
+        g_admissionTrace->Append({static_cast<double>(flow.flowId),
+                                  static_cast<double>(BURSTY),
+                                  static_cast<double>(admitted),
+                                  flow.requiredAirtime});
         
         if (admitted) {
             OnOffHelper onoff("ns3::UdpSocketFactory",
@@ -620,8 +678,10 @@ main(int argc, char *argv[])
             flow.admitted = true;
         }
         
-        g_admissionFile << flow.flowId << ",WEB," << admitted << "," 
-                       << flow.requiredAirtime << "\n";
+        g_admissionTrace->Append({static_cast<double>(flow.flowId),
+                                  static_cast<double>(WEB_BROWSING),
+                                  static_cast<double>(admitted),
+                                  flow.requiredAirtime});
         
         if (admitted) {
             OnOffHelper onoff("ns3::UdpSocketFactory",
@@ -686,12 +746,17 @@ main(int argc, char *argv[])
     }
     flowmonFile.close();
     
+    // Per-flow streaming delay summaries (mean/std, p50/p95/p99, jitter histogram)
+    std::ofstream delayStatsFile(outputPrefix + "-delaystats.csv");
+    g_cac->WriteFlowStats(delayStatsFile);
+    delayStatsFile.close();
+    
     // Close output files
-    g_throughputFile.close();
-    g_delayFile.close();
-    g_admissionFile.close();
+    g_throughputTrace->Close();
+    g_delayTrace->Close();
+    g_admissionTrace->Close();
     
-    NS_LOG_INFO("Results saved to " << outputPrefix << "-*.csv files");
+    NS_LOG_INFO("Results saved to " << outputPrefix << "-* files (" << traceFormat << " traces)");
     
     Simulator::Destroy();
     return 0;
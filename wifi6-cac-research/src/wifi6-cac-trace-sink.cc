@@ -0,0 +1,373 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * WiFi 6 CAC Trace Sinks Implementation
+ */
+
+#include "wifi6-cac-trace-sink.h"
+#include "ns3/abort.h"
+#include "ns3/assert.h"
+#include <algorithm>
+#include <cstring>
+
+namespace ns3 {
+
+const uint32_t BinaryTraceSink::DEFAULT_BLOCK_ROWS;
+
+namespace {
+
+/// Size in bytes of a column type
+uint32_t
+GetTypeSize(TraceColumnType type)
+{
+    switch (type) {
+        case TRACE_U8:
+            return 1;
+        case TRACE_U32:
+            return 4;
+        case TRACE_F64:
+        default:
+            return 8;
+    }
+}
+
+/// Schema name of a column type
+const char*
+GetTypeName(TraceColumnType type)
+{
+    switch (type) {
+        case TRACE_U8:
+            return "u8";
+        case TRACE_U32:
+            return "u32";
+        case TRACE_F64:
+        default:
+            return "f64";
+    }
+}
+
+/// Write the low \p size bytes of \p value to \p out, least significant byte first
+void
+PutLittleEndian(uint8_t* out, uint64_t value, uint32_t size)
+{
+    for (uint32_t i = 0; i < size; i++) {
+        out[i] = static_cast<uint8_t>(value >> (8 * i));
+    }
+}
+
+} // namespace
+
+TraceSink::~TraceSink()
+{
+}
+
+CsvTraceSink::CsvTraceSink(const std::string& filename, const std::vector<TraceColumn>& columns)
+    : m_file(filename),
+      m_columns(columns)
+{
+    NS_ABORT_MSG_UNLESS(m_file.is_open(), "Cannot open trace file " << filename);
+
+    for (size_t i = 0; i < m_columns.size(); i++) {
+        m_file << (i > 0 ? "," : "") << m_columns[i].name;
+    }
+    m_file << "\n";
+}
+
+CsvTraceSink::~CsvTraceSink()
+{
+    Close();
+}
+
+void
+CsvTraceSink::Append(std::initializer_list<double> values)
+{
+    NS_ASSERT(values.size() == m_columns.size());
+
+    size_t i = 0;
+    for (double value : values) {
+        const TraceColumn& column = m_columns[i];
+        if (i > 0) {
+            m_file << ",";
+        }
+        if (column.type == TRACE_F64) {
+            m_file << value;
+        } else if (!column.labels.empty()) {
+            m_file << column.labels.at(static_cast<uint32_t>(value));
+        } else {
+            m_file << static_cast<uint32_t>(value);
+        }
+        i++;
+    }
+    m_file << "\n";
+}
+
+void
+CsvTraceSink::Close()
+{
+    if (m_file.is_open()) {
+        m_file.close();
+    }
+}
+
+BinaryTraceSink::BinaryTraceSink(const std::string& filename, const std::vector<TraceColumn>& columns,
+                                 uint32_t blockRows)
+    : m_file(filename, std::ios::binary),
+      m_columns(columns),
+      m_buffers(columns.size()),
+      m_blockRows(blockRows),
+      m_rows(0)
+{
+    NS_ABORT_MSG_UNLESS(m_file.is_open(), "Cannot open trace file " << filename);
+    NS_ASSERT(blockRows > 0);
+
+    m_file << "CACTRACE 1\n";
+    for (size_t i = 0; i < m_columns.size(); i++) {
+        m_file << (i > 0 ? "," : "") << m_columns[i].name << ":" << GetTypeName(m_columns[i].type);
+        for (size_t j = 0; j < m_columns[i].labels.size(); j++) {
+            m_file << (j == 0 ? ":" : "|") << m_columns[i].labels[j];
+        }
+        m_buffers[i].reserve(m_blockRows * GetTypeSize(m_columns[i].type));
+    }
+    m_file << "\n";
+}
+
+BinaryTraceSink::~BinaryTraceSink()
+{
+    Close();
+}
+
+void
+BinaryTraceSink::Append(std::initializer_list<double> values)
+{
+    NS_ASSERT(values.size() == m_columns.size());
+
+    size_t i = 0;
+    for (double value : values) {
+        std::vector<uint8_t>& buffer = m_buffers[i];
+        size_t offset = buffer.size();
+        buffer.resize(offset + GetTypeSize(m_columns[i].type));
+
+        switch (m_columns[i].type) {
+            case TRACE_U8: {
+                buffer[offset] = static_cast<uint8_t>(value);
+                break;
+            }
+            case TRACE_U32: {
+                PutLittleEndian(&buffer[offset], static_cast<uint32_t>(value), 4);
+                break;
+            }
+            case TRACE_F64:
+            default: {
+                uint64_t bits;
+                std::memcpy(&bits, &value, sizeof(bits));
+                PutLittleEndian(&buffer[offset], bits, 8);
+                break;
+            }
+        }
+        i++;
+    }
+
+    if (++m_rows == m_blockRows) {
+        Flush();
+    }
+}
+
+void
+BinaryTraceSink::Flush()
+{
+    if (m_rows == 0) {
+        return;
+    }
+
+    uint8_t rows[4];
+    PutLittleEndian(rows, m_rows, sizeof(rows));
+    m_file.write(reinterpret_cast<const char*>(rows), sizeof(rows));
+    for (std::vector<uint8_t>& buffer : m_buffers) {
+        m_file.write(reinterpret_cast<const char*>(buffer.data()), buffer.size());
+        buffer.clear();
+    }
+    m_rows = 0;
+}
+
+void
+BinaryTraceSink::Close()
+{
+    if (m_file.is_open()) {
+        Flush();
+        m_file.close();
+    }
+}
+
+std::unique_ptr<TraceSink>
+CreateTraceSink(const std::string& format, const std::string& prefix,
+                const std::vector<TraceColumn>& columns)
+{
+    if (format == "csv") {
+        return std::unique_ptr<TraceSink>(new CsvTraceSink(prefix + ".csv", columns));
+    }
+    NS_ABORT_MSG_UNLESS(format == "binary", "Unknown trace format " << format);
+    return std::unique_ptr<TraceSink>(new BinaryTraceSink(prefix + ".bin", columns));
+}
+
+DelayTraceSampler::DelayTraceSampler(DelayTraceMode mode, std::unique_ptr<TraceSink> sink)
+    : m_mode(mode),
+      m_sink(std::move(sink)),
+      m_sampleRate(10),
+      m_window(0.1),
+      m_reservoirSize(1000)
+{
+}
+
+DelayTraceMode
+DelayTraceSampler::ParseMode(const std::string& name)
+{
+    if (name == "all") {
+        return DELAY_TRACE_ALL;
+    } else if (name == "sample") {
+        return DELAY_TRACE_SAMPLE;
+    } else if (name == "window") {
+        return DELAY_TRACE_WINDOW;
+    }
+    NS_ABORT_MSG_UNLESS(name == "reservoir", "Unknown delay trace mode " << name);
+    return DELAY_TRACE_RESERVOIR;
+}
+
+std::vector<TraceColumn>
+DelayTraceSampler::GetColumns(DelayTraceMode mode)
+{
+    if (mode == DELAY_TRACE_WINDOW) {
+        return {{"Time", TRACE_F64, {}},
+                {"FlowId", TRACE_U32, {}},
+                {"TrafficType", TRACE_U8, {}},
+                {"Packets", TRACE_U32, {}},
+                {"MeanDelay", TRACE_F64, {}},
+                {"MaxDelay", TRACE_F64, {}}};
+    }
+    return {{"Time", TRACE_F64, {}},
+            {"FlowId", TRACE_U32, {}},
+            {"TrafficType", TRACE_U8, {}},
+            {"Delay", TRACE_F64, {}}};
+}
+
+void
+DelayTraceSampler::SetSampleRate(uint32_t sampleRate)
+{
+    NS_ASSERT(sampleRate > 0);
+    m_sampleRate = sampleRate;
+}
+
+void
+DelayTraceSampler::SetWindow(double window)
+{
+    NS_ASSERT(window > 0.0);
+    m_window = window;
+}
+
+void
+DelayTraceSampler::SetReservoirSize(uint32_t reservoirSize)
+{
+    NS_ASSERT(reservoirSize > 0);
+    m_reservoirSize = reservoirSize;
+}
+
+void
+DelayTraceSampler::Record(double time, uint32_t flowId, uint8_t trafficType, double delay)
+{
+    if (m_mode == DELAY_TRACE_ALL) {
+        m_sink->Append({time, static_cast<double>(flowId), static_cast<double>(trafficType), delay});
+        return;
+    }
+
+    auto it = m_flows.find(flowId);
+    if (it == m_flows.end()) {
+        FlowState state;
+        state.trafficType = trafficType;
+        state.seen = 0;
+        state.window = -1;
+        state.windowPackets = 0;
+        state.windowSum = 0.0;
+        state.windowMax = 0.0;
+        it = m_flows.emplace(flowId, state).first;
+    }
+    FlowState& state = it->second;
+    uint64_t index = state.seen++;
+
+    switch (m_mode) {
+        case DELAY_TRACE_SAMPLE: {
+            if (index % m_sampleRate == 0) {
+                m_sink->Append({time, static_cast<double>(flowId), static_cast<double>(trafficType), delay});
+            }
+            break;
+        }
+        case DELAY_TRACE_WINDOW: {
+            int64_t window = static_cast<int64_t>(time / m_window);
+            if (window != state.window) {
+                FlushWindow(flowId, state);
+                state.window = window;
+            }
+            state.windowPackets++;
+            state.windowSum += delay;
+            state.windowMax = std::max(state.windowMax, delay);
+            break;
+        }
+        case DELAY_TRACE_RESERVOIR: {
+            // Algorithm R: packet i replaces a random slot with probability K / (i + 1)
+            if (state.reservoir.size() < m_reservoirSize) {
+                state.reservoir.emplace_back(time, delay);
+            } else {
+                // Created on first use so that the sampler does not shift the RNG
+                // streams of the topology (and results) in the other modes
+                if (!m_random) {
+                    m_random = CreateObject<UniformRandomVariable>();
+                }
+                uint64_t slot = static_cast<uint64_t>(m_random->GetValue(0.0, index + 1.0));
+                if (slot < m_reservoirSize) {
+                    state.reservoir[slot] = std::make_pair(time, delay);
+                }
+            }
+            break;
+        }
+        default:
+            break;
+    }
+}
+
+void
+DelayTraceSampler::FlushWindow(uint32_t flowId, FlowState& state)
+{
+    if (state.windowPackets > 0) {
+        m_sink->Append({state.window * m_window,
+                        static_cast<double>(flowId),
+                        static_cast<double>(state.trafficType),
+                        static_cast<double>(state.windowPackets),
+                        state.windowSum / state.windowPackets,
+                        state.windowMax});
+    }
+    state.windowPackets = 0;
+    state.windowSum = 0.0;
+    state.windowMax = 0.0;
+}
+
+void
+DelayTraceSampler::Close()
+{
+    for (auto& flow : m_flows) {
+        FlowState& state = flow.second;
+        if (m_mode == DELAY_TRACE_WINDOW) {
+            FlushWindow(flow.first, state);
+        } else if (m_mode == DELAY_TRACE_RESERVOIR) {
+            std::sort(state.reservoir.begin(), state.reservoir.end());
+            for (const auto& sample : state.reservoir) {
+                m_sink->Append({sample.first,
+                                static_cast<double>(flow.first),
+                                static_cast<double>(state.trafficType),
+                                sample.second});
+            }
+        }
+    }
+    m_flows.clear();
+    m_sink->Close();
+}
+
+} // namespace ns3
@@ -0,0 +1,252 @@
+/* -*- Mode:C++; c-file-style:"gnu"; indent-tabs-mode:nil; -*- */
+/*
+ * Copyright (c) 2024
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License version 2 as
+ * published by the Free Software Foundation;
+ *
+ * WiFi 6 CAC Trace Sinks
+ * Pluggable CSV / columnar binary writers for simulation traces and
+ * decimation of the per-packet delay trace
+ */
+
+#ifndef WIFI6_CAC_TRACE_SINK_H
+#define WIFI6_CAC_TRACE_SINK_H
+
+#include <cstdint>
+#include <fstream>
+#include <initializer_list>
+#include <map>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "ns3/ptr.h"
+#include "ns3/random-variable-stream.h"
+
+namespace ns3 {
+
+/**
+ * \brief Storage type of a trace column
+ */
+enum TraceColumnType {
+    TRACE_U8,       // unsigned 8-bit integer
+    TRACE_U32,      // unsigned 32-bit integer
+    TRACE_F64       // IEEE 754 double
+};
+
+/**
+ * \brief Trace column description
+ */
+struct TraceColumn {
+    std::string name;                 // Column name
+    TraceColumnType type;             // Storage type
+    std::vector<std::string> labels;  // Optional names of integer codes (CSV writes the name)
+};
+
+/**
+ * \brief Row-oriented writer interface for simulation traces
+ */
+class TraceSink
+{
+public:
+    virtual ~TraceSink();
+
+    /**
+     * \brief Append one row
+     * \param values One value per column, in schema order
+     */
+    virtual void Append(std::initializer_list<double> values) = 0;
+
+    /**
+     * \brief Flush buffered rows and close the file
+     */
+    virtual void Close() = 0;
+};
+
+/**
+ * \brief Trace sink writing one CSV line per row
+ */
+class CsvTraceSink : public TraceSink
+{
+public:
+    /**
+     * \brief Constructor
+     * \param filename Output file
+     * \param columns Schema
+     */
+    CsvTraceSink(const std::string& filename, const std::vector<TraceColumn>& columns);
+    ~CsvTraceSink() override;
+
+    void Append(std::initializer_list<double> values) override;
+    void Close() override;
+
+private:
+    std::ofstream m_file;                ///< Output file
+    std::vector<TraceColumn> m_columns;  ///< Schema
+};
+
+/**
+ * \brief Trace sink writing fixed-size columnar blocks
+ *
+ * File layout (all integers little-endian):
+ *   - Line "CACTRACE 1\n"
+ *   - Schema line: comma-separated "name:type" entries, type one of
+ *     u8/u32/f64, optionally followed by ":label0|label1|..." for
+ *     coded columns, terminated by "\n"
+ *   - Blocks until end of file: uint32 row count N, then for each
+ *     column in schema order N contiguous values of its type
+ *
+ * Each column of a block can be mapped without copying (numpy.frombuffer);
+ * see scripts/trace_reader.py.
+ */
+class BinaryTraceSink : public TraceSink
+{
+public:
+    static const uint32_t DEFAULT_BLOCK_ROWS = 65536;  ///< Rows buffered per block
+
+    /**
+     * \brief Constructor
+     * \param filename Output file
+     * \param columns Schema
+     * \param blockRows Rows per block
+     */
+    BinaryTraceSink(const std::string& filename, const std::vector<TraceColumn>& columns,
+                    uint32_t blockRows = DEFAULT_BLOCK_ROWS);
+    ~BinaryTraceSink() override;
+
+    void Append(std::initializer_list<double> values) override;
+    void Close() override;
+
+private:
+    /**
+     * \brief Write buffered rows as one block
+     */
+    void Flush();
+
+    std::ofstream m_file;                        ///< Output file
+    std::vector<TraceColumn> m_columns;          ///< Schema
+    std::vector<std::vector<uint8_t>> m_buffers; ///< One byte buffer per column
+    uint32_t m_blockRows;                        ///< Rows per block
+    uint32_t m_rows;                             ///< Rows currently buffered
+};
+
+/**
+ * \brief Create a trace sink
+ * \param format "csv" or "binary"
+ * \param prefix Output path without extension (".csv" or ".bin" is appended)
+ * \param columns Schema
+ * \return the sink
+ */
+std::unique_ptr<TraceSink> CreateTraceSink(const std::string& format, const std::string& prefix,
+                                           const std::vector<TraceColumn>& columns);
+
+/**
+ * \brief How much of the per-packet delay trace is written
+ */
+enum DelayTraceMode {
+    DELAY_TRACE_ALL,        // Every received packet
+    DELAY_TRACE_SAMPLE,     // Every N-th packet of each flow
+    DELAY_TRACE_WINDOW,     // Per-flow packet count, mean and max delay per time window
+    DELAY_TRACE_RESERVOIR   // Uniform random sample of fixed size per flow, written at the end
+};
+
+/**
+ * \brief Decimates per-packet delay records before they reach a trace sink
+ *
+ * ALL, SAMPLE and RESERVOIR write rows with the delay trace schema
+ * (Time, FlowId, TrafficType, Delay); WINDOW writes
+ * (Time, FlowId, TrafficType, Packets, MeanDelay, MaxDelay) where Time is
+ * the start of the window. Output of WINDOW and RESERVOIR grows with the
+ * number of flows (and windows) rather than with the number of packets.
+ */
+class DelayTraceSampler
+{
+public:
+    /**
+     * \brief Constructor
+     * \param mode Decimation mode
+     * \param sink Sink created with GetColumns(mode)
+     */
+    DelayTraceSampler(DelayTraceMode mode, std::unique_ptr<TraceSink> sink);
+
+    /**
+     * \brief Parse a mode name
+     * \param name "all", "sample", "window" or "reservoir"
+     * \return the mode
+     */
+    static DelayTraceMode ParseMode(const std::string& name);
+
+    /**
+     * \brief Get the output schema of a mode
+     * \param mode Decimation mode
+     * \return the columns
+     */
+    static std::vector<TraceColumn> GetColumns(DelayTraceMode mode);
+
+    /**
+     * \brief Set N for DELAY_TRACE_SAMPLE
+     * \param sampleRate Keep one packet in sampleRate per flow
+     */
+    void SetSampleRate(uint32_t sampleRate);
+
+    /**
+     * \brief Set the window length for DELAY_TRACE_WINDOW
+     * \param window Window length in seconds
+     */
+    void SetWindow(double window);
+
+    /**
+     * \brief Set the per-flow sample size for DELAY_TRACE_RESERVOIR
+     * \param reservoirSize Samples kept per flow
+     */
+    void SetReservoirSize(uint32_t reservoirSize);
+
+    /**
+     * \brief Record a received packet
+     * \param time Reception time in seconds
+     * \param flowId Flow ID
+     * \param trafficType Traffic type code
+     * \param delay Delay in ms
+     */
+    void Record(double time, uint32_t flowId, uint8_t trafficType, double delay);
+
+    /**
+     * \brief Write pending windows / reservoirs and close the sink
+     */
+    void Close();
+
+private:
+    /**
+     * \brief Per-flow decimation state
+     */
+    struct FlowState {
+        uint8_t trafficType;           // Traffic type code
+        uint64_t seen;                 // Packets recorded for this flow
+        int64_t window;                // Index of the open window (-1 if none)
+        uint32_t windowPackets;        // Packets in the open window
+        double windowSum;              // Sum of delays in the open window
+        double windowMax;              // Largest delay in the open window
+        std::vector<std::pair<double, double>> reservoir;  // (time, delay) samples
+    };
+
+    /**
+     * \brief Write the open window of a flow
+     * \param flowId Flow ID
+     * \param state Flow state
+     */
+    void FlushWindow(uint32_t flowId, FlowState& state);
+
+    DelayTraceMode m_mode;                     ///< Decimation mode
+    std::unique_ptr<TraceSink> m_sink;         ///< Output
+    uint32_t m_sampleRate;                     ///< N for DELAY_TRACE_SAMPLE
+    double m_window;                           ///< Window length in seconds
+    uint32_t m_reservoirSize;                  ///< Samples kept per flow
+    std::map<uint32_t, FlowState> m_flows;     ///< Per-flow state
+    Ptr<UniformRandomVariable> m_random;       ///< Reservoir replacement draws (created on first use)
+};
+
+} // namespace ns3
+
+#endif /* WIFI6_CAC_TRACE_SINK_H */